@@ -10,6 +10,8 @@ Bu dosya:
 from datetime import datetime
 from pathlib import Path
 import os
+import sys
+import tempfile
 from decouple import config  # pip install python-decouple
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -124,9 +126,48 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # Yazma kilidi için en fazla bu kadar saniye beklenir. Randevu
+            # kaydı kilidi işlemin başında alır (`models.cihaz_kilidi`, BEGIN
+            # IMMEDIATE); diğer atomic bloklar varsayılan ertelenmiş moddadır.
+            "timeout": 20,
+        },
+        # EszamanliRandevuTestleri ayrı bağlantıların kilit beklemesini sınar;
+        # paylaşımlı bellek içi SQLite kilitte beklemeden hata verdiğinden test
+        # veritabanı dosyadır. Depo kökünde kalmasın diye geçici dizinde açılır
+        # (test sonunda silinir).
+        "TEST": {"NAME": Path(tempfile.gettempdir()) / "booklab_test.sqlite3"},
     }
 }
 
+# Önbellek: veri sürüm sayaçları, sürümlü sayfa/takvim önbellekleri ve badge
+# sayaçları (rezervasyon/onbellek.py, badge.py) TÜM işçi süreçlerinde ortak
+# olmalıdır; bir işçideki artış diğerlerinde görünmezse bayat sayfa/304 döner.
+# REDIS_URL verilirse Redis kullanılır (`pip install redis`). Verilmezse süreç
+# içi LocMemCache kullanılır: yalnızca tek süreçli kurulum (runserver, tek
+# işçi) ve testler içindir. Testler REDIS_URL olsa da LocMem'de koşar.
+# ISCI_SAYISI (uvicorn/gunicorn'un da okuduğu WEB_CONCURRENCY) 1'den büyükken
+# LocMem kullanılıyorsa `manage.py check` hata verir ve önbellek devre dışı
+# kalır (bkz. onbellek.onbellek_paylasimli_mi).
+TESTING = len(sys.argv) > 1 and sys.argv[1] == "test"
+REDIS_URL = config("REDIS_URL", default="")
+ISCI_SAYISI = config("WEB_CONCURRENCY", default=1, cast=int)
+if REDIS_URL and not TESTING:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "booklab",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "booklab",
+        }
+    }
+
 
 # ========================================================
 # 4. ŞİFRE DOĞRULAMA
@@ -213,6 +254,10 @@ SESSION_COOKIE_SAMESITE = "Lax"
 MAX_RANDEVU_SAATI = 24
 IPTAL_MIN_SURE_SAAT = 0
 EMAIL_DOGRULAMA_KOD_SURESI_DAKIKA = 10
+# True ise takvim event API'leri ve badge sayacı async view'larla sunulur.
+# Yalnızca ASGI sunucusunda anlamlıdır; açmadan önce `api_benchmark` ile ölçün
+# (bkz. docs/10_local_setup.md).
+ASYNC_API = config("ASYNC_API", default=False, cast=bool)
 #OKUL_MAIL_UZANTISI = "@ogr.btu.edu.tr"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
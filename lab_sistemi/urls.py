@@ -11,6 +11,18 @@ from django.conf.urls.static import static
 # Views modülünü bütün olarak çekiyoruz
 from rezervasyon import views
 
+# ASYNC_API açıksa okuma ağırlıklı JSON uçnoktaları async sürümleriyle sunulur
+# (ASGI dağıtımı için). WSGI'de async view her istekte bir olay döngüsüne
+# köprülendiğinden varsayılan sync sürümlerdir.
+if settings.ASYNC_API:
+    tum_events_api, lab_events_api, onay_bekleyen_sayisi = (
+        views.atum_events_api, views.alab_events_api, views.aonay_bekleyen_sayisi
+    )
+else:
+    tum_events_api, lab_events_api, onay_bekleyen_sayisi = (
+        views.tum_events_api, views.lab_events_api, views.onay_bekleyen_sayisi
+    )
+
 urlpatterns = [
     # ========================================================
     # 1. YÖNETİM VE API (SİSTEM)
@@ -18,9 +30,11 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     
     # --- API ENDPOINTS ---
-    path("api/onay-bekleyen-sayisi/", views.onay_bekleyen_sayisi, name="onay_bekleyen_sayisi"),
-    path("api/tum-randevular/", views.tum_events_api, name="tum_events_api"),
-    path('api/lab/<int:lab_id>/events/', views.lab_events_api, name='lab_events_api'),
+    path("api/onay-bekleyen-sayisi/", onay_bekleyen_sayisi, name="onay_bekleyen_sayisi"),
+    path("api/badge-akisi/", views.badge_akisi, name="badge_akisi"),
+    path("api/tum-randevular/", tum_events_api, name="tum_events_api"),
+    path('api/lab/<int:lab_id>/events/', lab_events_api, name='lab_events_api'),
+    path('api/lab/<int:lab_id>/musait/', views.lab_musaitlik_api, name='lab_musaitlik_api'),
     path('api/toplu-onay/', views.toplu_onay_ajax, name='toplu_onay_ajax'),
 
     # ========================================================
@@ -98,6 +112,8 @@ urlpatterns = [
     # ========================================================
     path("randevularim/", views.randevularim, name="randevularim"),
     path("randevularim/pdf-indir/", views.randevu_pdf_indir, name="randevu_pdf_indir"),
+    path("randevularim/pdf-durum/<str:anahtar>/", views.randevu_pdf_durum, name="randevu_pdf_durum"),
+    path("randevularim/pdf/<str:anahtar>/", views.randevu_pdf_dosya, name="randevu_pdf_dosya"),
     path("iptal/<int:randevu_id>/", views.randevu_iptal, name="randevu_iptal"),
     path("profil-duzenle/", views.profil_duzenle, name="profil_duzenle"),
     path("profil/email-dogrula/", views.email_degisim_dogrulama, name="email_degisim_dogrulama"),
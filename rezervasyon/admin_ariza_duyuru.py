@@ -8,6 +8,7 @@ from django.contrib.auth.models import User
 from django.db import models
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import path
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
@@ -20,6 +21,7 @@ from .admin_helpers import (
     BUTTON_STYLE_SECONDARY,
     BUTTON_WRAPPER,
     AdminMassMailMixin,
+    CihazSecimMixin,
     aktif_yap,
     excel_indir,
     mail_gonder,
@@ -38,19 +40,24 @@ from .models import (
     Duyuru,
     OnayBekleyenler,
     AktifKullanicilar,
+    EpostaKuyrugu,
 )
 
 logger = logging.getLogger('admin_operations')
 
 # TURKCE ARAMA: ariza admin, duyuru admin, teknik bakim
 @admin.register(Ariza)
-class ArizaAdmin(admin.ModelAdmin):
+class ArizaAdmin(CihazSecimMixin, admin.ModelAdmin):
     list_display = ("cihaz", "kullanici", "tarih", "aciklama_short", "cozuldu_badge", "buton")
     list_filter = ("cozuldu_mu", "tarih", "cihaz__lab")
     search_fields = ("cihaz__isim", "kullanici__username")
     date_hierarchy = "tarih"
     readonly_fields = ("tarih",)
 
+    def get_queryset(self, request):
+        """Cihaz.__str__ lab adını kullandığından lab da aynı sorguda çekilir"""
+        return super().get_queryset(request).select_related("kullanici", "cihaz__lab")
+
     def aciklama_short(self, obj):
         """Arıza açıklamasını kısaltarak göster"""
         text = obj.aciklama[:50] + "..." if len(obj.aciklama) > 50 else obj.aciklama
@@ -214,3 +221,23 @@ class DuyuruAdmin(admin.ModelAdmin):
         except Exception as e:
             messages.error(request, f"❌ Hata: {str(e)}")
         return safe_redirect(request)
+
+
+# TURKCE ARAMA: eposta kuyrugu admin, outbox izleme
+@admin.register(EpostaKuyrugu)
+class EpostaKuyruguAdmin(admin.ModelAdmin):
+    list_display = ("alici", "konu", "durum", "deneme_sayisi", "sonraki_deneme", "gonderilme_zamani")
+    list_filter = ("durum", "olusturulma_zamani")
+    search_fields = ("alici", "konu")
+    date_hierarchy = "olusturulma_zamani"
+    readonly_fields = ("olusturulma_zamani", "gonderilme_zamani", "deneme_sayisi", "son_hata")
+    actions = ["tekrar_dene"]
+
+    @admin.action(description="🔁 Seçilenleri Tekrar Kuyruğa Al")
+    def tekrar_dene(self, request, queryset):
+        """Başarısız/bekleyen e-postaları hemen tekrar denenecek şekilde sıfırlar"""
+        updated = queryset.exclude(durum=EpostaKuyrugu.GONDERILDI).update(
+            durum=EpostaKuyrugu.BEKLIYOR, deneme_sayisi=0, sonraki_deneme=timezone.now(),
+        )
+        messages.success(request, f"🔁 {updated} e-posta tekrar kuyruğa alındı.")
+        logger.info(f"E-posta Tekrar Kuyruk: {updated} - {request.user.username}")
@@ -7,17 +7,19 @@ from django.apps import apps
 from django.conf import settings
 from django.contrib import admin, messages
 from django.contrib.auth.models import User
-from django.core.exceptions import ValidationError
-from django.core.mail import EmailMultiAlternatives, send_mail
+from django.core.exceptions import FieldDoesNotExist, ValidationError
 from django.core.validators import validate_email
-from django.http import HttpResponse
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import redirect, render
 from django.template.loader import render_to_string
 from django.urls import path
 from django.utils.html import strip_tags
 from django.utils.http import url_has_allowed_host_and_scheme
 
+from .eposta import eposta_kuyruga_ekle, epostalari_kuyruga_ekle
 from .forms import AdminMassEmailForm
+from .view_helpers import kullanicilari_toplu_guncelle, profil_durumlarini_esitle
 
 logger = logging.getLogger('admin_operations')
 
@@ -61,18 +63,25 @@ def safe_redirect(request, fallback="/"):
 # GLOBAL ACTION FUNCTIONS
 # ============================================================
 
-@admin.action(description="📥 Excel (CSV) İndir")
-def excel_indir(modeladmin, request, queryset):
-    """Seçili satırları CSV olarak dışa aktarır"""
+# CSV dışa aktarımında veritabanından tek seferde çekilen satır sayısı.
+CSV_PARCA_BOYUTU = getattr(settings, "CSV_PARCA_BOYUTU", 2000)
+
+
+class _CsvTamponu:
+    """csv.writer için dosya benzeri nesne: yazılan satırı saklamadan geri döner."""
+
+    def write(self, deger):
+        return deger
+
+
+def _csv_satirlari(queryset, kullanici_adi):
+    """Başlık + her kayıt için bir CSV satırı üretir (bellekte biriktirmez)."""
+    writer = csv.writer(_CsvTamponu(), delimiter=';')
+    yield '\ufeff' + writer.writerow(["Kullanıcı", "Cihaz", "Tarih", "Saat Aralığı", "Durum"])
+
+    sayac = 0
     try:
-        response = HttpResponse(content_type="text/csv; charset=utf-8")
-        response["Content-Disposition"] = 'attachment; filename="rapor.csv"'
-        response.write(u'\ufeff'.encode('utf8'))
-        
-        writer = csv.writer(response, delimiter=';')
-        writer.writerow(["Kullanıcı", "Cihaz", "Tarih", "Saat Aralığı", "Durum"])
-        
-        for obj in queryset:
+        for obj in queryset.iterator(chunk_size=CSV_PARCA_BOYUTU):
             user = getattr(obj, "kullanici", None)
             if user:
                 full_name = f"{getattr(user, 'first_name', '')} {getattr(user, 'last_name', '')}".strip()
@@ -81,27 +90,55 @@ def excel_indir(modeladmin, request, queryset):
             else:
                 full_name = "-"
 
-            writer.writerow([
+            yield writer.writerow([
                 full_name,
                 getattr(obj, "cihaz", "-"),
                 getattr(obj, "tarih", "-"),
                 f"{getattr(obj, 'baslangic_saati', '')}-{getattr(obj, 'bitis_saati', '')}",
                 obj.get_durum_display() if hasattr(obj, "get_durum_display") else "-"
             ])
-        
-        logger.info(f"CSV Export: {request.user.username} - {queryset.count()} kayıt")
-        return response
+            sayac += 1
     except Exception as e:
+        # Akış başladıktan sonra yanıt değiştirilemez; dosya yarıda kesilir.
         logger.error(f"CSV Export Hatası: {str(e)}")
-        return response
+        return
+    logger.info(f"CSV Export: {kullanici_adi} - {sayac} kayıt")
+
+
+@admin.action(description="📥 Excel (CSV) İndir")
+def excel_indir(modeladmin, request, queryset):
+    """Seçili satırları CSV olarak dışa aktarır.
+
+    Yanıt akış (streaming) olarak üretilir: satırlar CSV_PARCA_BOYUTU'luk
+    parçalarla okunup yazılır, bellek kullanımı kayıt sayısından bağımsızdır.
+    Kullanıcı ve cihaz(+lab) JOIN ile aynı sorguda gelir (satır başına sorgu yok).
+    """
+    alanlar = {f.name for f in queryset.model._meta.get_fields()}
+    iliskiler = [ad for ad in ("kullanici", "cihaz__lab") if ad.split("__")[0] in alanlar]
+    if iliskiler:
+        queryset = queryset.select_related(*iliskiler)
+
+    response = StreamingHttpResponse(
+        _csv_satirlari(queryset, request.user.username),
+        content_type="text/csv; charset=utf-8",
+    )
+    response["Content-Disposition"] = 'attachment; filename="rapor.csv"'
+    return response
 
 @admin.action(description="📧 Bilgilendirme Maili Gönder")
 def mail_gonder(modeladmin, request, queryset):
-    """Seçili nesnelere bilgilendirme maili gönderi"""
+    """Seçili nesnelere bilgilendirme maili gönderir (kuyruğa yazar).
+
+    Kişiye özel içerikler tek INSERT ile e-posta kuyruğuna eklenir; gönderimi
+    `eposta_gonder` işçisi tek SMTP bağlantısı üzerinden yapar.
+    """
     try:
-        sayac = 0
         hatali = 0
-        
+        mesajlar = []
+
+        if queryset.model is not User and any(f.name == "kullanici" for f in queryset.model._meta.fields):
+            queryset = queryset.select_related("kullanici")
+
         for obj in queryset:
             user = obj.kullanici if hasattr(obj, "kullanici") else obj
             
@@ -118,32 +155,17 @@ def mail_gonder(modeladmin, request, queryset):
                         "mesaj": "Hesabınızla ilgili önemli bir bildirimi size göndermekteyiz.",
                     }
                 )
-                
-                # Düz metin versiyonu oluştur
-                text_content = strip_tags(html_content)
-                
-                # Email nesnesini oluştur
-                email_obj = EmailMultiAlternatives(
-                    subject="BookLab Sistemi - Bilgilendirme",
-                    body=text_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to=[user.email],
-                )
-                
-                # HTML versiyonunu ekle
-                email_obj.attach_alternative(html_content, "text/html")
-                email_obj.send()
-                
-                sayac += 1
+                mesajlar.append((user.email, "BookLab Sistemi - Bilgilendirme", strip_tags(html_content), html_content))
             except Exception:
                 hatali += 1
-        
+
+        sayac = epostalari_kuyruga_ekle(mesajlar) if mesajlar else 0
         if sayac > 0:
-            modeladmin.message_user(request, f"✅ {sayac} kullanıcıya mail gönderildi.", messages.SUCCESS)
+            modeladmin.message_user(request, f"✅ {sayac} kullanıcıya mail gönderim kuyruğuna eklendi.", messages.SUCCESS)
         if hatali > 0:
             modeladmin.message_user(request, f"⚠️ {hatali} hata oluştu.", messages.WARNING)
         
-        logger.info(f"Mass Mail: {request.user.username} - {sayac} gönderilen")
+        logger.info(f"Mass Mail: {request.user.username} - {sayac} kuyruğa eklendi")
     except Exception as e:
         logger.error(f"Mail Gönderme Hatası: {str(e)}")
         modeladmin.message_user(request, "❌ Mail gönderme hatası!", messages.ERROR)
@@ -160,6 +182,52 @@ def ozel_mail_action(modeladmin, request, queryset):
     }
     return redirect('admin:rezervasyon_ozel_mail')
 
+# ============================================================
+# TOPLU KULLANICI AKSİYONLARI (set tabanlı UPDATE)
+# ============================================================
+
+def secili_kullanicilar(queryset):
+    """Aksiyon sorgusunu (User, Profil, Randevu, Arıza...) kullanıcı sorgusuna çevirir.
+
+    Kayıtlar tek tek dolaşılmaz; seçim alt sorgu olarak kullanılır.
+    """
+    model = queryset.model
+    if issubclass(model, User):
+        return User.objects.filter(pk__in=queryset.order_by().values("pk"))
+    for alan in ("user", "kullanici"):
+        try:
+            model._meta.get_field(alan)
+        except FieldDoesNotExist:
+            continue
+        return User.objects.filter(pk__in=queryset.order_by().values(f"{alan}_id"))
+    return User.objects.none()
+
+
+def yonetici_korumasi(kullanicilar, request, kendisi_her_zaman=True):
+    """Kural 1: Kullanıcı kendini işleme alamaz (`kendisi_her_zaman=False` ise
+    yalnızca superuser olduğunda). Kural 2: Son aktif superuser korunur.
+
+    Yalnızca seçimdeki superuser'lar ve istekte bulunan kişi okunur.
+    Donus: (işlenecek kullanıcı sorgusu, atlanan sayısı).
+    """
+    adaylar = kullanicilar.filter(Q(is_superuser=True) | Q(pk=request.user.pk))
+    atlanan = []
+    aktif_superuser_sayisi = None
+    for pk, superuser, aktif in adaylar.order_by("pk").values_list("pk", "is_superuser", "is_active"):
+        if pk == request.user.pk and (superuser or kendisi_her_zaman):
+            atlanan.append(pk)
+            continue
+        if not superuser:
+            continue
+        if aktif_superuser_sayisi is None:
+            aktif_superuser_sayisi = User.objects.filter(is_superuser=True, is_active=True).count()
+        if aktif_superuser_sayisi <= 1:
+            atlanan.append(pk)
+        elif aktif:
+            aktif_superuser_sayisi -= 1
+    return kullanicilar.exclude(pk__in=atlanan), len(atlanan)
+
+
 @admin.action(description="🔻 Yönetici Yetkisini Geri Al")
 def yetkiyi_al(modeladmin, request, queryset):
     """Seçili kullanıcıların yönetici yetkisini geri al (sadece superuser yapabilir).
@@ -170,37 +238,8 @@ def yetkiyi_al(modeladmin, request, queryset):
         modeladmin.message_user(request, "❌ Bu işlem için yeterli izniniz yok.", messages.ERROR)
         return
 
-    guncellenen = 0
-    atlanan = 0
-    for obj in queryset:
-        user = None
-        if isinstance(obj, User):
-            user = obj
-        elif hasattr(obj, 'user'):
-            user = obj.user
-        elif hasattr(obj, 'kullanici'):
-            user = obj.kullanici
-
-        if not user:
-            continue
-
-        # Kural 1: Superuser kendi yetkisini düşüremesin
-        if user == request.user:
-            atlanan += 1
-            continue
-
-        # Kural 2: Hedef kullanıcı superuser ve sistemdeki son aktif superuser ise engelle
-        if user.is_superuser:
-            aktif_superuser_sayisi = User.objects.filter(is_superuser=True, is_active=True).count()
-            if aktif_superuser_sayisi <= 1:
-                atlanan += 1
-                continue
-
-        if user.is_staff or user.is_superuser:
-            user.is_staff = False
-            user.is_superuser = False
-            user.save()
-            guncellenen += 1
+    kullanicilar, atlanan = yonetici_korumasi(secili_kullanicilar(queryset), request)
+    guncellenen = kullanicilari_toplu_guncelle(kullanicilar, is_staff=False, is_superuser=False)
 
     if guncellenen > 0:
         modeladmin.message_user(request, f"✅ {guncellenen} kullanıcının yönetici yetkisi geri alındı.", messages.SUCCESS)
@@ -221,21 +260,9 @@ def super_kullanici_yap(modeladmin, request, queryset):
         modeladmin.message_user(request, "❌ Bu işlem için yeterli izniniz yok.", messages.ERROR)
         return
 
-    guncellenen = 0
-    for obj in queryset:
-        user = None
-        if isinstance(obj, User):
-            user = obj
-        elif hasattr(obj, 'user'):
-            user = obj.user
-        elif hasattr(obj, 'kullanici'):
-            user = obj.kullanici
-
-        if user and not user.is_superuser:
-            user.is_staff = True
-            user.is_superuser = True
-            user.save()
-            guncellenen += 1
+    guncellenen = kullanicilari_toplu_guncelle(
+        secili_kullanicilar(queryset), is_staff=True, is_superuser=True
+    )
 
     if guncellenen > 0:
         modeladmin.message_user(request, f"✅ {guncellenen} kullanıcı yönetici yapıldı.", messages.SUCCESS)
@@ -245,45 +272,22 @@ def super_kullanici_yap(modeladmin, request, queryset):
 @admin.action(description="🟢 Aktif Yap")
 def aktif_yap(modeladmin, request, queryset):
     """Seçili kullanıcıları aktif hale getir ve profillerini senkronize et"""
-    updated = 0
-    for obj in queryset:
-        user = obj if isinstance(obj, User) else getattr(obj, 'user', getattr(obj, 'kullanici', None))
-        if user:
-            user.is_active = True
-            user.save()
-            if hasattr(user, 'profil'):
-                user.profil.status = 'aktif_kullanici'
-                user.profil.save()
-            updated += 1
-            
+    updated = kullanicilari_toplu_guncelle(
+        secili_kullanicilar(queryset), profil_durumu="aktif_kullanici", is_active=True
+    )
+
     modeladmin.message_user(request, f"✅ {updated} kullanıcı aktif yapıldı.", messages.SUCCESS)
     logger.info(f"Aktifleştirme: {request.user.username} - {updated} kayıt")
 
 @admin.action(description="🔴 Pasif Yap")
 def pasif_yap(modeladmin, request, queryset):
-    """Seçili kullanıcıları pasif hale getir ve profillerini senkronize et"""
-    updated = 0
-    hatali = 0
-    for obj in queryset:
-        user = obj if isinstance(obj, User) else getattr(obj, 'user', getattr(obj, 'kullanici', None))
-        if user:
-            # Superuser'ı pasif yapmasını engelle
-            if user.is_superuser:
-                # Eğer kendisini pasif yapmaya çalışıyorsa
-                if user.id == request.user.id:
-                    hatali += 1
-                    continue
-                # Eğer son superuser ise (başka aktif superuser yoksa)
-                if User.objects.filter(is_superuser=True, is_active=True).count() == 1:
-                    hatali += 1
-                    continue
-            
-            user.is_active = False
-            user.save()
-            if hasattr(user, 'profil'):
-                user.profil.status = 'pasif_kullanici'
-                user.profil.save()
-            updated += 1
+    """Seçili kullanıcıları pasif hale getir ve profillerini senkronize et.
+    Superuser kendini veya son aktif superuser'ı pasif yapamaz.
+    """
+    kullanicilar, hatali = yonetici_korumasi(
+        secili_kullanicilar(queryset), request, kendisi_her_zaman=False
+    )
+    updated = kullanicilari_toplu_guncelle(kullanicilar, profil_durumu="pasif_kullanici", is_active=False)
     
     if updated > 0:
         modeladmin.message_user(request, f"🔴 {updated} kullanıcı pasif yapıldı.", messages.WARNING)
@@ -378,26 +382,20 @@ class AdminMassMailMixin:
                     else:
                         text_content = message
 
-                    sent = 0
+                    # Tüm alıcılar tek INSERT ile kuyruğa yazılır; gönderim
+                    # `eposta_gonder` işçisinde tek SMTP bağlantısıyla yapılır.
+                    sent = eposta_kuyruga_ekle(
+                        [email for _obj, email in recipients], subject, text_content, html_content
+                    )
                     failed = 0
                     errors = []
 
-                    for _obj, email in recipients:
-                        try:
-                            msg = EmailMultiAlternatives(subject, text_content, settings.DEFAULT_FROM_EMAIL, [email])
-                            msg.attach_alternative(html_content, "text/html")
-                            msg.send(fail_silently=False)
-                            sent += 1
-                        except Exception as e:
-                            failed += 1
-                            errors.append(f"{email}: {str(e)}")
-
                     try:
                         del request.session['ozel_mail_data']
                     except:
                         pass
 
-                    logger.info(f"Özel Mail: {request.user.username} - {sent} gönderilen")
+                    logger.info(f"Özel Mail: {request.user.username} - {sent} kuyruğa eklendi")
                     
                     return render(request, 'admin/rezervasyon/ozel_mail_result.html', {
                         'total': len(recipients), 'sent': sent, 'failed': failed,
@@ -417,3 +415,37 @@ class AdminMassMailMixin:
             logger.error(f"Özel Mail Hatası: {str(e)}")
             messages.error(request, f"❌ Mail işlemi hatası! Detay: {str(e)}")
             return redirect('..')
+
+
+# ============================================================
+# CİHAZ SEÇİM ALANI (Cihaz.__str__ lab'a erişir)
+# ============================================================
+
+class CihazSecimMixin:
+    """Cihaz FK seçim listesini lab ile birlikte tek sorguda yükler.
+
+    Cihaz.__str__ lab adını kullandığından, aksi halde ekle/değiştir
+    formundaki her seçenek için ayrı bir Laboratuvar sorgusu çalışır.
+    """
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "cihaz":
+            kwargs.setdefault("queryset", db_field.related_model._default_manager.select_related("lab"))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+# ============================================================
+# PROFİL STATÜ EŞİTLEME (kullanıcı formu)
+# ============================================================
+
+class ProfilDurumuMixin:
+    """Kullanıcı formunda aktiflik değiştiyse profil statüsünü eşitler.
+
+    Profil artık her User.save()'de kaydedilmez; diğer alan düzenlemeleri
+    profile yazmaz.
+    """
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and "is_active" in form.changed_data:
+            profil_durumlarini_esitle(User.objects.filter(pk=obj.pk))
@@ -20,12 +20,14 @@ from .admin_helpers import (
     BUTTON_STYLE_SECONDARY,
     BUTTON_WRAPPER,
     AdminMassMailMixin,
+    ProfilDurumuMixin,
     aktif_yap,
     excel_indir,
     mail_gonder,
     ozel_mail_action,
     pasif_yap,
     safe_redirect,
+    secili_kullanicilar,
     super_kullanici_yap,
     yetkiyi_al,
 )
@@ -39,12 +41,13 @@ from .models import (
     OnayBekleyenler,
     AktifKullanicilar,
 )
+from .view_helpers import kullanicilari_toplu_guncelle
 
 logger = logging.getLogger('admin_operations')
 
 # TURKCE ARAMA: kullanici admin, profil admin, onay bekleyen, aktif kullanici
 @admin.register(User)
-class CustomUserAdmin(AdminMassMailMixin, UserAdmin):
+class CustomUserAdmin(ProfilDurumuMixin, AdminMassMailMixin, UserAdmin):
     actions = [aktif_yap, pasif_yap, mail_gonder, ozel_mail_action, super_kullanici_yap, yetkiyi_al]
     list_display = ("username", "email", "get_full_name", "is_active_badge", "is_staff_badge")
     list_filter = ("is_active", "is_staff", "date_joined")
@@ -111,7 +114,7 @@ class CustomUserAdmin(AdminMassMailMixin, UserAdmin):
     is_staff_badge.short_description = "Yetki"
 
 @admin.register(OnayBekleyenler)
-class OnayBekleyenlerAdmin(AdminMassMailMixin, UserAdmin):
+class OnayBekleyenlerAdmin(ProfilDurumuMixin, AdminMassMailMixin, UserAdmin):
     actions = [aktif_yap, mail_gonder, ozel_mail_action]
     list_display = ("username", "email", "get_full_name", "aktiflik_durumu", "tek_tik_aktif_et")
     list_filter = ("date_joined",)
@@ -145,11 +148,9 @@ class OnayBekleyenlerAdmin(AdminMassMailMixin, UserAdmin):
         """Kullanıcıyı aktif et"""
         try:
             u = get_object_or_404(User, pk=pk)
-            u.is_active = True
-            u.save()
-            if hasattr(u, 'profil'):
-                u.profil.status = 'aktif_kullanici'
-                u.profil.save()
+            kullanicilari_toplu_guncelle(
+                User.objects.filter(pk=u.pk), profil_durumu='aktif_kullanici', is_active=True
+            )
             messages.success(request, f"✅ {u.username} AKTİF edildi!")
             logger.info(f"Kullanıcı Aktifleştirildi: {u.username}")
         except Exception as e:
@@ -157,7 +158,7 @@ class OnayBekleyenlerAdmin(AdminMassMailMixin, UserAdmin):
         return safe_redirect(request)
 
 @admin.register(AktifKullanicilar)
-class AktifKullanicilarAdmin(AdminMassMailMixin, UserAdmin):
+class AktifKullanicilarAdmin(ProfilDurumuMixin, AdminMassMailMixin, UserAdmin):
     actions = [pasif_yap, mail_gonder, ozel_mail_action]
     list_display = ("username", "email", "get_full_name", "aktiflik_durumu", "tek_tik_pasif_et")
     list_filter = ("date_joined",)
@@ -209,11 +210,9 @@ class AktifKullanicilarAdmin(AdminMassMailMixin, UserAdmin):
                     messages.error(request, f"❌ {u.username} bir yöneticidir (superuser), pasif yapılamaz!")
                 return safe_redirect(request)
 
-            u.is_active = False
-            u.save()
-            if hasattr(u, 'profil'):
-                u.profil.status = 'pasif_kullanici'
-                u.profil.save()
+            kullanicilari_toplu_guncelle(
+                User.objects.filter(pk=u.pk), profil_durumu='pasif_kullanici', is_active=False
+            )
             messages.warning(request, f"🔴 {u.username} PASİF yapıldı.")
             logger.info(f"Kullanıcı Pasifleştirildi: {u.username}")
         except Exception as e:
@@ -308,17 +307,21 @@ class ProfilAdmin(AdminMassMailMixin, admin.ModelAdmin):
     # STATÜ DEĞİŞTİRME AKSIYON FONKSİYONLARI
     # ============================================================
 
+    def _yoneticileri_ayir(self, kullanicilar, request):
+        """Superuser'ları ve işlemi yapanı seçimden çıkarır. Donus: (sorgu, atlanan)."""
+        korunan = kullanicilar.filter(models.Q(is_superuser=True) | models.Q(pk=request.user.pk))
+        atlanan = korunan.count()
+        if not atlanan:
+            return kullanicilar, 0
+        return kullanicilar.exclude(pk__in=korunan.values("pk")), atlanan
+
     @admin.action(description="✅ Seçilenleri AKTİF Öğrenci Yap")
     def studentleri_aktif_et(self, request, queryset):
         """Seçili öğrencileri aktif et"""
         try:
-            updated = 0
-            for profil in queryset:
-                profil.status = 'aktif_kullanici'
-                profil.user.is_active = True
-                profil.save()
-                profil.user.save()
-                updated += 1
+            updated = kullanicilari_toplu_guncelle(
+                secili_kullanicilar(queryset), profil_durumu='aktif_kullanici', is_active=True
+            )
             
             messages.success(
                 request, 
@@ -332,22 +335,9 @@ class ProfilAdmin(AdminMassMailMixin, admin.ModelAdmin):
     def studentleri_pasif_et(self, request, queryset):
         """Seçili öğrencileri pasif et (superuser profilleri korunur)"""
         try:
-            updated = 0
-            atlanan = 0
-            for profil in queryset:
-                # Superuser profilleri pasif yapılamaz
-                if profil.user.is_superuser:
-                    atlanan += 1
-                    continue
-                # Kendi profilini pasif yapamaz
-                if profil.user == request.user:
-                    atlanan += 1
-                    continue
-                profil.status = 'pasif_kullanici'
-                profil.user.is_active = False
-                profil.save()
-                profil.user.save()
-                updated += 1
+            # Superuser profilleri ve kişinin kendi profili değiştirilemez.
+            kullanicilar, atlanan = self._yoneticileri_ayir(secili_kullanicilar(queryset), request)
+            updated = kullanicilari_toplu_guncelle(kullanicilar, profil_durumu='pasif_kullanici', is_active=False)
 
             if updated > 0:
                 messages.warning(
@@ -367,22 +357,9 @@ class ProfilAdmin(AdminMassMailMixin, admin.ModelAdmin):
     def studentleri_iptal_et(self, request, queryset):
         """Seçili öğrencileri iptal et (superuser profilleri korunur)"""
         try:
-            updated = 0
-            atlanan = 0
-            for profil in queryset:
-                # Superuser profilleri iptal edilemez
-                if profil.user.is_superuser:
-                    atlanan += 1
-                    continue
-                # Kendi profilini iptal edemez
-                if profil.user == request.user:
-                    atlanan += 1
-                    continue
-                profil.status = 'iptal'
-                profil.user.is_active = False
-                profil.save()
-                profil.user.save()
-                updated += 1
+            # Superuser profilleri ve kişinin kendi profili değiştirilemez.
+            kullanicilar, atlanan = self._yoneticileri_ayir(secili_kullanicilar(queryset), request)
+            updated = kullanicilari_toplu_guncelle(kullanicilar, profil_durumu='iptal', is_active=False)
 
             if updated > 0:
                 messages.error(
@@ -6,6 +6,7 @@ from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import path
 from django.utils.html import format_html
@@ -39,6 +40,7 @@ from .models import (
     OnayBekleyenler,
     AktifKullanicilar,
 )
+from .view_helpers import acik_arizalari_coz
 
 logger = logging.getLogger('admin_operations')
 
@@ -47,20 +49,27 @@ logger = logging.getLogger('admin_operations')
 class LaboratuvarAdmin(admin.ModelAdmin):
     list_display = ("isim", "cihaz_sayisi", "cihaz_durumu")
     search_fields = ("isim",)
+
+    def get_queryset(self, request):
+        """Cihaz sayıları satır başına COUNT yerine listeyle aynı sorguda gelir"""
+        return super().get_queryset(request).annotate(
+            cihaz_toplam=Count("cihaz"),
+            aktif_cihaz=Count("cihaz", filter=Q(cihaz__aktif_mi=True)),
+        )
     
     def cihaz_sayisi(self, obj):
         """Laboratuardaki toplam cihaz sayısı"""
-        count = obj.cihaz_set.count()
         return format_html(
             '<span style="background:#0056b3; color:white; padding:6px 12px; border-radius:15px; font-weight:600; font-size:12px;">{} cihaz</span>',
-            count
+            obj.cihaz_toplam
         )
     cihaz_sayisi.short_description = "Cihaz Sayısı"
+    cihaz_sayisi.admin_order_field = "cihaz_toplam"
     
     def cihaz_durumu(self, obj):
         """Laboratuardaki cihazların genel durum özeti"""
-        aktif = obj.cihaz_set.filter(aktif_mi=True).count()
-        pasif = obj.cihaz_set.filter(aktif_mi=False).count()
+        aktif = obj.aktif_cihaz
+        pasif = obj.cihaz_toplam - obj.aktif_cihaz
         
         return format_html(
             '<span style="color:#28a745; font-weight:700; font-size:12px;">✅ {}</span>&nbsp;|&nbsp;<span style="color:#dc3545; font-weight:700; font-size:12px;">🔴 {}</span>',
@@ -87,14 +96,18 @@ class CihazAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """Lab ve son açık arıza metni listeyle aynı sorguda gelir"""
+        return super().get_queryset(request).select_related("lab").with_son_ariza()
+
     def ariza_notu(self, obj):
         """Cihazın son zamandaki arıza kaydını gösterir"""
-        son_ariza = Ariza.objects.filter(cihaz=obj, cozuldu_mu=False).order_by('-tarih').first()
-        if son_ariza:
-            text = son_ariza.aciklama[:40] + "..." if len(son_ariza.aciklama) > 40 else son_ariza.aciklama
+        aciklama = obj.son_ariza_aciklama
+        if aciklama:
+            text = aciklama[:40] + "..." if len(aciklama) > 40 else aciklama
             return format_html(
                 '<span title="{}" style="color:#dc3545; font-weight:600; font-size:11px; cursor:help;">{}</span>',
-                son_ariza.aciklama, text
+                aciklama, text
             )
         return mark_safe('<span style="color:#bbb; font-size:11px;">Kayıt Yok</span>')
     ariza_notu.short_description = "Son Arıza"
@@ -131,7 +144,7 @@ class CihazAdmin(admin.ModelAdmin):
             
             if durum == "aktif":
                 obj.aktif_mi = True
-                Ariza.objects.filter(cihaz=obj, cozuldu_mu=False).update(cozuldu_mu=True)
+                acik_arizalari_coz(Ariza.objects.filter(cihaz=obj))
                 self.message_user(request, f"✅ {obj.isim} aktif edildi!", messages.SUCCESS)
             else:
                 obj.aktif_mi = False
@@ -20,6 +20,7 @@ from .admin_helpers import (
     BUTTON_STYLE_SECONDARY,
     BUTTON_WRAPPER,
     AdminMassMailMixin,
+    CihazSecimMixin,
     aktif_yap,
     excel_indir,
     mail_gonder,
@@ -44,7 +45,7 @@ logger = logging.getLogger('admin_operations')
 
 # TURKCE ARAMA: randevu admin, randevu onay, geldi gelmedi, csv
 @admin.register(Randevu)
-class RandevuAdmin(AdminMassMailMixin, admin.ModelAdmin):
+class RandevuAdmin(CihazSecimMixin, AdminMassMailMixin, admin.ModelAdmin):
     list_display = ("kullanici", "cihaz", "tarih", "saat_araligi", "durum_renkli", "butonlar")
     list_filter = ("durum", "tarih", "cihaz__lab")
     actions = [excel_indir, mail_gonder, ozel_mail_action, super_kullanici_yap]
@@ -52,8 +53,11 @@ class RandevuAdmin(AdminMassMailMixin, admin.ModelAdmin):
     date_hierarchy = "tarih"
 
     def get_queryset(self, request):
-        """Onay bekleyenleri öne almak için queryset'i özelleştir"""
-        qs = super().get_queryset(request)
+        """Onay bekleyenleri öne almak için queryset'i özelleştir.
+
+        Cihaz.__str__ lab adını kullandığından lab da aynı sorguda çekilir.
+        """
+        qs = super().get_queryset(request).select_related("kullanici", "cihaz__lab")
         return qs.order_by(
             models.Case(
                 models.When(durum="onay_bekleniyor", then=0),
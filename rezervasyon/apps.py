@@ -1,11 +1,31 @@
 """App konfigürasyonu: `rezervasyon` uygulaması için AppConfig.
 
-Bu dosya Django'ya uygulamanın var olduğunu bildirir ve gelecekte sinyaller
-ve uygulama başlatma (ready) kodu koymak için kullanılabilir.
+Bu dosya Django'ya uygulamanın var olduğunu bildirir; `ready()` içinde
+sinyal alıcıları (signals.py) yüklenir, önbellek kurulumu denetlenir
+(onbellek.onbellek_kontrolu) ve PDF fontları süreç başına bir kez hazırlanır
+(utils.pdf_varliklarini_hazirla).
 """
 
+import logging
+
 from django.apps import AppConfig
+from django.core import checks
+
+logger = logging.getLogger(__name__)
 
 
 class RezervasyonConfig(AppConfig):
     name = "rezervasyon"
+
+    def ready(self):
+        from . import signals  # noqa: F401  (alıcıları bağlar)
+        from .onbellek import onbellek_kontrolu, onbellek_paylasimli_mi
+        from .utils import pdf_varliklarini_hazirla
+
+        checks.register(onbellek_kontrolu, checks.Tags.caches)
+        if not onbellek_paylasimli_mi():
+            logger.error(
+                "Önbellek işçiler arasında paylaşılmıyor (LocMemCache + çok işçi): "
+                "sayfa/takvim önbelleği, ETag ve badge sayaçları devre dışı. REDIS_URL tanımlayın."
+            )
+        pdf_varliklarini_hazirla()
@@ -1,26 +1,39 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Lower
 
 class EmailOrUsernameModelBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
         UserModel = get_user_model()
         if username is None:
             username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
 
         # Gelen verideki boşlukları temizle (strip)
         username = username.strip()
 
-        try:
-            # Önce kullanıcı adına bak
-            user = UserModel.objects.get(username__iexact=username)
-        except UserModel.DoesNotExist:
-            try:
-                # Olmazsa e-posta adresine bak
-                user = UserModel.objects.get(email__iexact=username)
-            except UserModel.DoesNotExist:
-                return None
+        # Kullanıcı adı ya da e-posta tek sorguda aranır. İki taraf da aynı
+        # LOWER() ile karşılaştırıldığından 0025 migration'ındaki lower()
+        # indeksleri kullanılır (iexact/LIKE indeks kullanamaz).
+        aranan = Lower(Value(username))
+        adaylar = list(
+            UserModel.objects
+            .alias(kucuk_ad=Lower(UserModel.USERNAME_FIELD), kucuk_eposta=Lower("email"))
+            .filter(Q(kucuk_ad=aranan) | Q(kucuk_eposta=aranan))
+            .annotate(ad_eslesti=Case(When(kucuk_ad=aranan, then=Value(True)), default=Value(False)))
+            # Önce kullanıcı adı eşleşmesi, olmazsa e-posta (eski öncelik)
+            .order_by("-ad_eslesti", "pk")[:2]
+        )
+        if not adaylar:
+            return None
+        user = adaylar[0]
+        if not user.ad_eslesti and len(adaylar) > 1:
+            # Aynı e-postayı paylaşan birden fazla hesap: hangisi olduğu belirsiz.
+            return None
 
         # Şifre kontrolü ve hesap aktiflik kontrolü
         if user.check_password(password) and self.user_can_authenticate(user):
             return user
-        return None
\ No newline at end of file
+        return None
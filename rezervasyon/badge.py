@@ -0,0 +1,108 @@
+# TURKCE ARAMA: badge sayaclari, bildirim sayaclari, artimli sayac, sse badge akisi
+#
+# Yönetim menüsündeki üç sayaç (pasif öğrenci, bekleyen randevu, açık arıza)
+# önbellekte tutulur ve her istekte yeniden SAYILMAZ: sinyaller (bkz.
+# signals.py) ve toplu güncelleme yardımcıları yalnızca farkı uygular.
+# Her değişiklik "badge:surum" sayacını da artırır; SSE akışı (`badge_akisi`)
+# bu sürümü izleyip yalnızca değişen sayaçları istemcilere iter.
+#
+# Sayaç önbellekte yoksa ilk okuyan TEK COUNT ile kurar. Sayaçlar
+# BADGE_SAYAC_SANIYE sonunda düşer ve yeniden sayılır; kurulum anında kaçan
+# bir farkın etkisi bu süreyle sınırlıdır.
+#
+# Farklar ve sürüm ancak tüm işçilerin gördüğü önbellekte (Redis) herkese
+# ulaşır. Önbellek paylaşılmıyorsa (`onbellek_paylasimli_mi`) sayaçlar her
+# okumada yeniden sayılır ve SSE akışı kapanır (istemci yoklamaya geçer).
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Ariza, Randevu
+from .onbellek import onbellek_paylasimli_mi
+
+BADGE_ALANLARI = ("pasif_ogrenci", "bekleyen_randevu", "acik_ariza")
+BADGE_SAYAC_SANIYE = getattr(settings, "BADGE_SAYAC_SANIYE", 600)
+_SURUM_ANAHTARI = "badge:surum"
+
+
+def _anahtar(alan):
+    return f"badge:{alan}"
+
+
+def _sayim_sorgulari():
+    return {
+        "pasif_ogrenci": User.objects.filter(is_active=False),
+        "bekleyen_randevu": Randevu.objects.filter(durum=Randevu.ONAY_BEKLENIYOR),
+        "acik_ariza": Ariza.objects.filter(cozuldu_mu=False),
+    }
+
+
+def badge_sayaclari():
+    """{alan: sayı}. Önbellekte olmayan sayaç bir kez sayılıp kurulur."""
+    if not onbellek_paylasimli_mi():
+        return {alan: qs.count() for alan, qs in _sayim_sorgulari().items()}
+    bulunan = cache.get_many([_anahtar(alan) for alan in BADGE_ALANLARI])
+    veri = {}
+    for alan, qs in _sayim_sorgulari().items():
+        deger = bulunan.get(_anahtar(alan))
+        if deger is None:
+            deger = qs.count()
+            cache.add(_anahtar(alan), deger, BADGE_SAYAC_SANIYE)
+        veri[alan] = deger
+    return veri
+
+
+async def abadge_sayaclari():
+    """`badge_sayaclari` async sürümü (ASGI view'ları için)."""
+    if not onbellek_paylasimli_mi():
+        return {alan: await qs.acount() for alan, qs in _sayim_sorgulari().items()}
+    bulunan = await cache.aget_many([_anahtar(alan) for alan in BADGE_ALANLARI])
+    veri = {}
+    for alan, qs in _sayim_sorgulari().items():
+        deger = bulunan.get(_anahtar(alan))
+        if deger is None:
+            deger = await qs.acount()
+            await cache.aadd(_anahtar(alan), deger, BADGE_SAYAC_SANIYE)
+        veri[alan] = deger
+    return veri
+
+
+async def abadge_surumu():
+    return await cache.aget(_SURUM_ANAHTARI, 0)
+
+
+def _surumu_artir():
+    try:
+        cache.incr(_SURUM_ANAHTARI)
+    except ValueError:
+        cache.add(_SURUM_ANAHTARI, 1, None)
+
+
+def _farklari_uygula(farklar):
+    for alan, fark in farklar.items():
+        try:
+            cache.incr(_anahtar(alan), fark)
+        except ValueError:
+            # Sayaç kurulmamış: ilk okuyan zaten güncel değeri sayacak.
+            pass
+    _surumu_artir()
+
+
+def _sayaclari_dusur(alanlar):
+    cache.delete_many([_anahtar(alan) for alan in alanlar])
+    _surumu_artir()
+
+
+def badge_degisikligi(**farklar):
+    """Sayaçlara farkı (ör. `acik_ariza=-3`) işlem onaylandığında uygular."""
+    farklar = {alan: fark for alan, fark in farklar.items() if fark}
+    if farklar:
+        transaction.on_commit(lambda: _farklari_uygula(farklar))
+
+
+def badge_yeniden_say(*alanlar):
+    """Farkı bilinemeyen değişiklikte sayaçları düşürür; ilk okuyan yeniden sayar."""
+    if alanlar:
+        transaction.on_commit(lambda: _sayaclari_dusur(alanlar))
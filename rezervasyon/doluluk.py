@@ -0,0 +1,187 @@
+# TURKCE ARAMA: cakisma indeksi, aralik indeksi, toplu cakisma kontrolu, doluluk,
+# slot bitmap, doluluk haritasi, bos slot arama
+
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import time
+
+from .models import Randevu
+from .view_helpers import SLOT_DAKIKA
+
+# Bir gundeki slot sayisi (SLOT_DAKIKA=10 icin 144).
+GUN_SLOT_SAYISI = 24 * 60 // SLOT_DAKIKA
+
+
+class AralikIndeksi:
+    """TURKCE ARAMA: bellek ici cakisma indeksi.
+
+    Tek bir (cihaz, tarih) icin aktif randevu araliklarini tutar. Araliklar
+    yuklenirken birlestirilir; boylece liste hem baslangica hem bitise gore
+    sirali, ayrik araliklardan olusur ve her cakisma sorusu tek bir ikili
+    arama ile (O(log M)) cevaplanir. N aday icin toplam maliyet O(N log M),
+    veritabani okumasi ise yalnizca yukleme sirasindaki tek sorgudur.
+
+    NOT: Cakisma SADECE cihaz bazlidir (bkz. `check_overlap`).
+    """
+
+    def __init__(self, araliklar=()):
+        self._baslangiclar = []
+        self._bitisler = []
+        for baslangic, bitis in sorted(araliklar):
+            if self._bitisler and baslangic < self._bitisler[-1]:
+                # Ortusen eski kayitlar tek aralikta birlesir.
+                self._bitisler[-1] = max(self._bitisler[-1], bitis)
+            else:
+                self._baslangiclar.append(baslangic)
+                self._bitisler.append(bitis)
+
+    @classmethod
+    def yukle(cls, cihaz, tarih, exclude_id=None):
+        """Cihazin o gunku aktif randevularini TEK sorguda yukler."""
+        qs = Randevu.objects.filter(
+            cihaz=cihaz,
+            tarih=tarih,
+            durum__in=Randevu.AKTIF_DURUMLAR,
+        )
+        if exclude_id:
+            qs = qs.exclude(pk=exclude_id)
+        return cls(qs.values_list("baslangic_saati", "bitis_saati"))
+
+    def __len__(self):
+        return len(self._baslangiclar)
+
+    def cakisiyor_mu(self, baslangic, bitis):
+        """[baslangic, bitis) araligi mevcut bir aralikla kesisiyor mu?"""
+        # Baslangici `bitis`ten once olan son aralik; ayrik ve sirali
+        # oldugundan en gec biten aday da odur.
+        i = bisect_left(self._baslangiclar, bitis) - 1
+        return i >= 0 and self._bitisler[i] > baslangic
+
+    def ekle(self, baslangic, bitis):
+        """Cakismadigi dogrulanmis yeni araligi indekse ekler."""
+        if self.cakisiyor_mu(baslangic, bitis):
+            raise ValueError("Cakisan aralik indekse eklenemez.")
+        i = bisect_left(self._baslangiclar, baslangic)
+        self._baslangiclar.insert(i, baslangic)
+        self._bitisler.insert(i, bitis)
+
+    def toplu_dogrula(self, adaylar):
+        """Bir slot seciminin tamamini dogrular.
+
+        `adaylar`: [(baslangic, bitis), ...]. Her aday icin True (uygun) /
+        False (dolu) listesi doner. Uygun bulunanlar indekse eklenir; boylece
+        ayni secim icindeki adaylarin birbirleriyle cakismasi da yakalanir.
+        """
+        sonuc = []
+        for baslangic, bitis in adaylar:
+            uygun = baslangic < bitis and not self.cakisiyor_mu(baslangic, bitis)
+            if uygun:
+                self.ekle(baslangic, bitis)
+            sonuc.append(uygun)
+        return sonuc
+
+
+def _dakika(saat):
+    return saat.hour * 60 + saat.minute
+
+
+class GunDolulugu:
+    """TURKCE ARAMA: slot doluluk bitmap'i.
+
+    Tek bir (cihaz, tarih) icin gunu GUN_SLOT_SAYISI adet SLOT_DAKIKA'lik
+    slota boler ve her slotu bir tamsayinin tek bitiyle tutar (bit i = 1 =>
+    i. slot dolu). Bitmap, gunun randevulari uzerinden TEK gecisle kurulur;
+    sonrasinda izgara cizimi, cakisma sorusu ve bos slot aramasi randevu
+    sayisindan bagimsiz bit islemleriyle cevaplanir.
+
+    Slota hizali olmayan bir randevu (orn. 09:05-09:25) dokundugu her slotu
+    dolu isaretler; yani bitmap slot cozunurlugunde muhafazakardir: gercek
+    bir cakismayi asla kacirmaz, en fazla hizasiz bir komsuyu dolu sayar.
+    Dakika hassasiyetinde kesin cevap gerektiginde `AralikIndeksi` kullanilir.
+    """
+
+    def __init__(self, araliklar=()):
+        self.bitler = 0
+        for baslangic, bitis in araliklar:
+            self.isaretle(baslangic, bitis)
+
+    @classmethod
+    def yukle(cls, cihaz, tarih):
+        """Cihazin o gunku aktif randevularindan bitmap'i TEK sorguda kurar."""
+        return cls(
+            Randevu.objects.filter(
+                cihaz=cihaz,
+                tarih=tarih,
+                durum__in=Randevu.AKTIF_DURUMLAR,
+            ).values_list("baslangic_saati", "bitis_saati")
+        )
+
+    @staticmethod
+    def maske(baslangic, bitis):
+        """[baslangic, bitis) araliginin dokundugu slotlarin bit maskesi."""
+        ilk = _dakika(baslangic) // SLOT_DAKIKA
+        # Bitis 00:00 ise gun sonu (24:00) kabul edilir.
+        bitis_dk = _dakika(bitis) or 24 * 60
+        son = min(-(-bitis_dk // SLOT_DAKIKA), GUN_SLOT_SAYISI)  # yukari yuvarla
+        if son <= ilk:
+            return 0
+        return ((1 << (son - ilk)) - 1) << ilk
+
+    @staticmethod
+    def slot_saati(slot):
+        """Slot numarasinin baslangic saati (GUN_SLOT_SAYISI => None, gun sonu)."""
+        if slot >= GUN_SLOT_SAYISI:
+            return None
+        dakika = slot * SLOT_DAKIKA
+        return time(dakika // 60, dakika % 60)
+
+    def isaretle(self, baslangic, bitis):
+        self.bitler |= self.maske(baslangic, bitis)
+
+    def dolu_mu(self, slot):
+        return bool(self.bitler >> slot & 1)
+
+    def cakisiyor_mu(self, baslangic, bitis):
+        """[baslangic, bitis) dolu bir slota dokunuyor mu?"""
+        return bool(self.bitler & self.maske(baslangic, bitis))
+
+    def dolu_slot_sayisi(self):
+        return bin(self.bitler).count("1")
+
+    def bos_baslangiclar(self, slot_sayisi, ilk_slot=0, son_slot=GUN_SLOT_SAYISI):
+        """Art arda `slot_sayisi` bos slotun basladigi slot numaralari (artan).
+
+        Aranan pencere [ilk_slot, son_slot) icinde kalir. Bos bitler L kez
+        kaydirilip AND'lenerek her uygun baslangic tek bitle isaretlenir.
+        """
+        if slot_sayisi <= 0 or son_slot - ilk_slot < slot_sayisi:
+            return []
+        pencere = ((1 << (son_slot - ilk_slot)) - 1) << ilk_slot
+        bos = ~self.bitler & pencere
+        uygun = bos
+        for k in range(1, slot_sayisi):
+            uygun &= bos >> k
+        sonuc = []
+        while uygun:
+            en_dusuk = uygun & -uygun
+            sonuc.append(en_dusuk.bit_length() - 1)
+            uygun ^= en_dusuk
+        return sonuc
+
+
+def doluluklari_yukle(cihazlar, baslangic_tarihi, bitis_tarihi):
+    """Birden cok cihaz ve gun icin bitmap'leri TEK sorguda kurar.
+
+    `bitis_tarihi` dahildir. Donus: {(cihaz_id, tarih): GunDolulugu};
+    randevusu olmayan anahtarlar icin bos bitmap doner.
+    """
+    doluluklar = defaultdict(GunDolulugu)
+    satirlar = Randevu.objects.filter(
+        cihaz__in=cihazlar,
+        tarih__gte=baslangic_tarihi,
+        tarih__lte=bitis_tarihi,
+        durum__in=Randevu.AKTIF_DURUMLAR,
+    ).values_list("cihaz_id", "tarih", "baslangic_saati", "bitis_saati")
+    for cihaz_id, tarih, baslangic, bitis in satirlar:
+        doluluklar[(cihaz_id, tarih)].isaretle(baslangic, bitis)
+    return doluluklar
@@ -0,0 +1,136 @@
+# TURKCE ARAMA: eposta kuyrugu, outbox, toplu mail, smtp baglanti yeniden kullanimi,
+# tekrar deneme, geri cekilme (backoff)
+#
+# View ve admin aksiyonlari e-postayi `eposta_kuyruga_ekle` ile yalnizca
+# veritabanina yazar (milisaniyeler). `eposta_gonder` yonetim komutu
+# `kuyrugu_isle` ile kuyrugu partiler halinde bosaltir: her parti TEK SMTP
+# baglantisi uzerinden gider; basarisiz gonderimler ustel artan bekleme ile
+# yeniden denenir.
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EpostaKuyrugu
+
+logger = logging.getLogger(__name__)
+
+# Bir partide (tek SMTP bağlantısı) gönderilecek en fazla e-posta.
+EPOSTA_PARTI_BOYUTU = getattr(settings, "EPOSTA_PARTI_BOYUTU", 50)
+# Bu kadar denemeden sonra e-posta "başarısız" olarak bırakılır.
+EPOSTA_MAX_DENEME = getattr(settings, "EPOSTA_MAX_DENEME", 5)
+# İlk tekrar denemesinden önceki bekleme; her denemede iki katına çıkar.
+EPOSTA_GERI_CEKILME_SANIYE = getattr(settings, "EPOSTA_GERI_CEKILME_SANIYE", 60)
+# Bir işçinin aldığı partiyi başka işçilerden sakladığı süre (kira).
+EPOSTA_KIRA_SANIYE = getattr(settings, "EPOSTA_KIRA_SANIYE", 300)
+
+
+def eposta_kuyruga_ekle(alicilar, konu, metin, html=""):
+    """Her alıcı için ayrı bir e-postayı kuyruğa yazar (TEK INSERT).
+
+    `alicilar` tek adres ya da adres listesi olabilir. Dönüş: eklenen sayısı.
+    """
+    if isinstance(alicilar, str):
+        alicilar = [alicilar]
+    return epostalari_kuyruga_ekle((alici, konu, metin, html) for alici in alicilar)
+
+
+def epostalari_kuyruga_ekle(mesajlar):
+    """Kişiye özel içerikli e-postaları TEK INSERT ile kuyruğa yazar.
+
+    `mesajlar`: [(alici, konu, metin, html), ...]. Dönüş: eklenen sayısı.
+    """
+    kayitlar = EpostaKuyrugu.objects.bulk_create(
+        [
+            EpostaKuyrugu(alici=alici, konu=konu, metin=metin, html=html)
+            for alici, konu, metin, html in mesajlar
+        ],
+        batch_size=500,
+    )
+    return len(kayitlar)
+
+
+def _parti_al(boyut):
+    """Gönderim zamanı gelmiş bir partiyi kiralar.
+
+    Kira süresince `sonraki_deneme` ileri alınır; eşzamanlı çalışan başka bir
+    işçi aynı e-postaları almaz (PostgreSQL'de SKIP LOCKED, SQLite'ta yazma
+    kilidi ile sıralanır). İşçi çökerse kira dolunca e-posta tekrar alınır.
+    """
+    simdi = timezone.now()
+    with transaction.atomic():
+        parti = list(
+            EpostaKuyrugu.objects.select_for_update(skip_locked=True)
+            .filter(durum=EpostaKuyrugu.BEKLIYOR, sonraki_deneme__lte=simdi)
+            .order_by("sonraki_deneme", "id")[:boyut]
+        )
+        if parti:
+            EpostaKuyrugu.objects.filter(pk__in=[e.pk for e in parti]).update(
+                sonraki_deneme=simdi + timedelta(seconds=EPOSTA_KIRA_SANIYE)
+            )
+    return parti
+
+
+def _basarisiz_isaretle(eposta, hata):
+    eposta.deneme_sayisi += 1
+    eposta.son_hata = str(hata)[:1000]
+    if eposta.deneme_sayisi >= EPOSTA_MAX_DENEME:
+        eposta.durum = EpostaKuyrugu.BASARISIZ
+        logger.error(f"E-posta kalıcı olarak başarısız: {eposta.alici} - {eposta.son_hata}")
+    else:
+        bekleme = EPOSTA_GERI_CEKILME_SANIYE * 2 ** (eposta.deneme_sayisi - 1)
+        eposta.sonraki_deneme = timezone.now() + timedelta(seconds=bekleme)
+    eposta.save(update_fields=["deneme_sayisi", "son_hata", "durum", "sonraki_deneme"])
+
+
+def kuyrugu_isle(parti_boyutu=EPOSTA_PARTI_BOYUTU):
+    """Kuyruktan bir parti alır ve tek SMTP bağlantısıyla gönderir.
+
+    Dönüş: (gonderilen, hatali). Kuyruk boşsa (0, 0).
+    """
+    parti = _parti_al(parti_boyutu)
+    if not parti:
+        return 0, 0
+
+    gonderilen = []
+    hatali = 0
+    baglanti = get_connection(fail_silently=False)
+    try:
+        baglanti.open()
+    except Exception as e:
+        # Sunucuya hiç bağlanılamadı: partinin tamamı sonra tekrar denenir.
+        logger.warning(f"SMTP bağlantısı açılamadı: {e}")
+        for eposta in parti:
+            _basarisiz_isaretle(eposta, e)
+        return 0, len(parti)
+
+    try:
+        for eposta in parti:
+            mesaj = EmailMultiAlternatives(
+                subject=eposta.konu,
+                body=eposta.metin,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[eposta.alici],
+                connection=baglanti,
+            )
+            if eposta.html:
+                mesaj.attach_alternative(eposta.html, "text/html")
+            try:
+                mesaj.send(fail_silently=False)
+            except Exception as e:
+                hatali += 1
+                _basarisiz_isaretle(eposta, e)
+            else:
+                gonderilen.append(eposta.pk)
+    finally:
+        baglanti.close()
+
+    if gonderilen:
+        EpostaKuyrugu.objects.filter(pk__in=gonderilen).update(
+            durum=EpostaKuyrugu.GONDERILDI, gonderilme_zamani=timezone.now(), son_hata="",
+        )
+    return len(gonderilen), hatali
@@ -0,0 +1,327 @@
+# TURKCE ARAMA: api benchmark, asgi wsgi karsilastirma, yuk testi, p99 gecikme,
+# eszamanli baglanti, async view olcumu
+#
+# Kullanim:
+#   # Uygulama ici (sunucusuz): WSGI + sync view'lar ile ASGI + async view'lar
+#   python manage.py api_benchmark --kullanici admin
+#   python manage.py api_benchmark --kullanici admin --eszamanli 300 --istek 5000 --isci 8
+#
+#   # Calisan bir sunucuya karsi (orn. uvicorn ve gunicorn ayri portlarda):
+#   python manage.py api_benchmark --kullanici admin --url http://127.0.0.1:8001
+#
+# Takvim event API'leri (tum / lab) ve badge sayaci icin, `--eszamanli` istemci
+# kapali dongude (yanit gelince bir sonraki istek) toplam `--istek` istek
+# gonderir; saniyedeki istek, p50 ve p99 gecikme raporlanir. Gecikme istemci
+# gozunden olculur (isci bekleme kuyrugu dahil).
+#
+# Uygulama ici modda her sunucu modeli ayri bir alt surecte calisir (URL'ler
+# ASYNC_API ayarina gore surec basina bir kez kurulur):
+#   wsgi : WSGIHandler, `--isci` is parcacigi (gunicorn gthread benzeri)
+#   asgi : ASGIHandler + async view'lar (ASYNC_API=True), tek olay dongusu (uvicorn benzeri)
+# Ag ve HTTP ayristirma maliyeti yoktur; sayilar sunucu-ici farki gosterir.
+# Gercek sunucu karsilastirmasi icin `--url` kullanin (bkz. docs/10_local_setup.md).
+#
+# Komut, verilen kullanici icin gecici bir oturum (session) acar ve sonunda siler.
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from importlib import import_module
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from rezervasyon.models import Laboratuvar
+
+MODLAR = ("wsgi", "asgi")
+
+
+def _uc_noktalari():
+    """(ad, yol) listesi. Takvim penceresi bugunu iceren bir aydir."""
+    ay_basi = timezone.localdate().replace(day=1)
+    sorgu = f"start={ay_basi.isoformat()}&end={(ay_basi + timedelta(days=35)).isoformat()}"
+    uclar = [("tum_events", f"/api/tum-randevular/?{sorgu}")]
+    lab_id = Laboratuvar.objects.order_by("id").values_list("id", flat=True).first()
+    if lab_id is not None:
+        uclar.append(("lab_events", f"/api/lab/{lab_id}/events/?{sorgu}"))
+    uclar.append(("badge", "/api/onay-bekleyen-sayisi/"))
+    return uclar
+
+
+def _oturum_ac(kullanici):
+    engine = import_module(settings.SESSION_ENGINE)
+    oturum = engine.SessionStore()
+    oturum[SESSION_KEY] = str(kullanici.pk)
+    oturum[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    oturum[HASH_SESSION_KEY] = kullanici.get_session_auth_hash()
+    oturum.create()
+    return oturum
+
+
+def _ozet(ad, mod, sureler, hata, toplam_sure):
+    sureler.sort()
+    return {
+        "uc": ad,
+        "mod": mod,
+        "istek": len(sureler),
+        "hata": hata,
+        "rps": len(sureler) / toplam_sure if toplam_sure else 0.0,
+        "p50": statistics.median(sureler) * 1000 if sureler else 0.0,
+        "p99": sureler[min(len(sureler) - 1, int(len(sureler) * 0.99))] * 1000 if sureler else 0.0,
+    }
+
+
+async def _kapali_dongu(istek_at, eszamanli, istek):
+    """`eszamanli` istemciyle toplam `istek` istek; (gecikmeler, hata, sure)."""
+    kalan = istek
+    sureler, hatalar = [], []
+
+    async def istemci():
+        nonlocal kalan
+        while kalan > 0:
+            kalan -= 1
+            baslangic = time.perf_counter()
+            durum = await istek_at()
+            sureler.append(time.perf_counter() - baslangic)
+            if durum != 200:
+                hatalar.append(durum)
+
+    baslangic = time.perf_counter()
+    await asyncio.gather(*(istemci() for _ in range(eszamanli)))
+    return sureler, len(hatalar), time.perf_counter() - baslangic
+
+
+# --- Uygulama ici suruculer ---
+
+def _wsgi_surucusu(yol, cerez, havuz):
+    from django.core.wsgi import get_wsgi_application
+
+    uygulama = get_wsgi_application()
+    path, _, sorgu = yol.partition("?")
+
+    def tek_istek():
+        durum = []
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": sorgu,
+            "SCRIPT_NAME": "",
+            "SERVER_NAME": "127.0.0.1",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": "127.0.0.1",
+            "HTTP_COOKIE": cerez,
+            "REMOTE_ADDR": "127.0.0.1",
+            "wsgi.input": BytesIO(),
+            "wsgi.errors": sys.stderr,
+            "wsgi.url_scheme": "http",
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        yanit = uygulama(environ, lambda status, headers, exc_info=None: durum.append(int(status[:3])))
+        try:
+            for _ in yanit:
+                pass
+        finally:
+            yanit.close()
+        return durum[0]
+
+    async def istek_at():
+        return await asyncio.get_running_loop().run_in_executor(havuz, tek_istek)
+
+    return istek_at
+
+
+def _asgi_surucusu(yol, cerez):
+    from django.core.asgi import get_asgi_application
+
+    uygulama = get_asgi_application()
+    path, _, sorgu = yol.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": sorgu.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"127.0.0.1"), (b"cookie", cerez.encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 80),
+    }
+
+    async def istek_at():
+        durum = []
+        govde_gonderildi = False
+
+        async def receive():
+            nonlocal govde_gonderildi
+            if not govde_gonderildi:
+                govde_gonderildi = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Istemci baglantiyi kapatmaz; Django yanit bitince bu gorevi iptal eder.
+            await asyncio.Event().wait()
+
+        async def send(mesaj):
+            if mesaj["type"] == "http.response.start":
+                durum.append(mesaj["status"])
+
+        await uygulama(dict(scope), receive, send)
+        return durum[0]
+
+    return istek_at
+
+
+# --- Calisan sunucuya karsi (HTTP/1.1 keep-alive, harici bagimlilik yok) ---
+
+async def _http_get(baglanti, host, yol, cerez):
+    okuyucu, yazici = baglanti
+    yazici.write(
+        f"GET {yol} HTTP/1.1\r\nHost: {host}\r\nCookie: {cerez}\r\nConnection: keep-alive\r\n\r\n".encode()
+    )
+    await yazici.drain()
+    durum = int((await okuyucu.readline()).split()[1])
+    basliklar = {}
+    while (satir := await okuyucu.readline()) not in (b"\r\n", b""):
+        anahtar, _, deger = satir.decode("latin-1").partition(":")
+        basliklar[anahtar.strip().lower()] = deger.strip()
+    if "content-length" in basliklar:
+        await okuyucu.readexactly(int(basliklar["content-length"]))
+    elif basliklar.get("transfer-encoding") == "chunked":
+        while (boyut := int((await okuyucu.readline()).strip(), 16)) > 0:
+            await okuyucu.readexactly(boyut + 2)
+        await okuyucu.readline()
+    return durum, basliklar.get("connection", "").lower() == "close"
+
+
+def _url_surucusu(taban, yol, cerez):
+    adres = urlsplit(taban)
+    host, port = adres.hostname, adres.port or 80
+    havuz = []
+
+    async def istek_at():
+        baglanti = havuz.pop() if havuz else await asyncio.open_connection(host, port)
+        try:
+            durum, kapat = await _http_get(baglanti, adres.netloc, yol, cerez)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            baglanti[1].close()
+            return 0
+        if kapat:
+            baglanti[1].close()
+        else:
+            havuz.append(baglanti)
+        return durum
+
+    return istek_at
+
+
+class Command(BaseCommand):
+    help = "Takvim event API'leri ve badge sayaci icin WSGI (sync) ile ASGI (async) verimini ve p99 gecikmesini karsilastirir."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kullanici", required=True, help="Istekleri yapacak staff kullanici adi.")
+        parser.add_argument("--eszamanli", type=int, default=200, help="Eszamanli istemci sayisi.")
+        parser.add_argument("--istek", type=int, default=3000, help="Uc nokta basina toplam istek.")
+        parser.add_argument("--isci", type=int, default=8, help="WSGI is parcacigi sayisi (uygulama ici mod).")
+        parser.add_argument("--url", help="Calisan sunucunun adresi; verilirse istekler HTTP ile gonderilir.")
+        # Alt surec parametreleri (dogrudan kullanilmaz).
+        parser.add_argument("--mod", choices=MODLAR, help=argparse.SUPPRESS)
+        parser.add_argument("--oturum", help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["mod"]:
+            sonuclar = asyncio.run(self._alt_surec(options))
+            self.stdout.write(json.dumps(sonuclar))
+            return
+
+        kullanici = User.objects.filter(username=options["kullanici"], is_staff=True, is_active=True).first()
+        if kullanici is None:
+            raise CommandError(f"Aktif staff kullanici bulunamadi: {options['kullanici']}")
+        oturum = _oturum_ac(kullanici)
+        try:
+            if options["url"]:
+                sonuclar = asyncio.run(self._sunucuya_karsi(options, oturum.session_key))
+            else:
+                sonuclar = []
+                for mod in MODLAR:
+                    sonuclar += self._alt_sureci_calistir(mod, options, oturum.session_key)
+        finally:
+            oturum.delete()
+        self._yazdir(sonuclar)
+
+    def _cerez(self, oturum_anahtari):
+        return f"{settings.SESSION_COOKIE_NAME}={oturum_anahtari}"
+
+    def _alt_sureci_calistir(self, mod, options, oturum_anahtari):
+        komut = [
+            sys.executable, sys.argv[0], "api_benchmark",
+            "--kullanici", options["kullanici"],
+            "--eszamanli", str(options["eszamanli"]),
+            "--istek", str(options["istek"]),
+            "--isci", str(options["isci"]),
+            "--mod", mod, "--oturum", oturum_anahtari,
+        ]
+        ortam = dict(os.environ, ASYNC_API="True" if mod == "asgi" else "False")
+        self.stderr.write(f"{mod} olculuyor...")
+        cikti = subprocess.run(komut, env=ortam, capture_output=True, text=True)
+        if cikti.returncode:
+            raise CommandError(f"{mod} alt sureci basarisiz:\n{cikti.stderr}")
+        return json.loads(cikti.stdout.strip().splitlines()[-1])
+
+    async def _alt_surec(self, options):
+        mod, cerez = options["mod"], self._cerez(options["oturum"])
+        uclar = await asyncio.to_thread(_uc_noktalari)
+        havuz = ThreadPoolExecutor(max_workers=max(options["isci"], 1)) if mod == "wsgi" else None
+        sonuclar = []
+        try:
+            for ad, yol in uclar:
+                istek_at = _wsgi_surucusu(yol, cerez, havuz) if havuz else _asgi_surucusu(yol, cerez)
+                # Isinma: onbellek, baglantilar ve URL cozumleyici hazirlanir.
+                await _kapali_dongu(istek_at, min(options["eszamanli"], 20), 100)
+                sureler, hata, sure = await _kapali_dongu(istek_at, options["eszamanli"], options["istek"])
+                sonuclar.append(_ozet(ad, mod, sureler, hata, sure))
+        finally:
+            if havuz:
+                havuz.submit(connections.close_all).result()
+                havuz.shutdown()
+        return sonuclar
+
+    async def _sunucuya_karsi(self, options, oturum_anahtari):
+        cerez = self._cerez(oturum_anahtari)
+        sonuclar = []
+        for ad, yol in await asyncio.to_thread(_uc_noktalari):
+            istek_at = _url_surucusu(options["url"], yol, cerez)
+            await _kapali_dongu(istek_at, min(options["eszamanli"], 20), 100)
+            sureler, hata, sure = await _kapali_dongu(istek_at, options["eszamanli"], options["istek"])
+            sonuclar.append(_ozet(ad, options["url"], sureler, hata, sure))
+        return sonuclar
+
+    def _yazdir(self, sonuclar):
+        self.stdout.write(f"{'uc nokta':12s} {'sunucu':24s} {'istek/sn':>10s} {'p50 ms':>9s} {'p99 ms':>9s} {'hata':>6s}")
+        for s in sonuclar:
+            self.stdout.write(
+                f"{s['uc']:12s} {s['mod']:24s} {s['rps']:10.0f} {s['p50']:9.1f} {s['p99']:9.1f} {s['hata']:6d}"
+            )
+        eslesen = {(s["uc"], s["mod"]): s for s in sonuclar}
+        for ad in dict.fromkeys(s["uc"] for s in sonuclar):
+            wsgi, asgi = eslesen.get((ad, "wsgi")), eslesen.get((ad, "asgi"))
+            if wsgi and asgi and wsgi["rps"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{ad}: ASGI/WSGI verim {asgi['rps'] / wsgi['rps']:.2f}x, p99 {wsgi['p99']:.1f} -> {asgi['p99']:.1f} ms"
+                ))
@@ -0,0 +1,282 @@
+# TURKCE ARAMA: bench, sorgu sayisi regresyonu, n+1 tespiti, sayfa suresi olcumu,
+# performans tabani, baseline
+#
+# Kullanim:
+#   python manage.py bench                          # olc, bench_taban.json ile karsilastir
+#   python manage.py bench --kaydet                 # sonuclari yeni taban olarak yaz
+#   python manage.py bench --yalniz-sorgu           # yalniz sorgu sayisi/HTTP durumu (CI icin)
+#   python manage.py bench --lab 10 --cihaz 8 --kullanici 500 --yil 3 --filtre admin:
+#
+# Gecici bir test veritabani kurar (gelistirme verisine dokunmaz), icine
+# sentetik_veri ile verilen boyutta veri uretir ve lab_sistemi/urls.py'deki
+# her URL'yi (admin'de kayitli her modelin liste/ekle/degistir/gecmis/sil
+# sayfalari dahil) anonim, ogrenci ve yonetici olarak GET ile ister.
+#
+# Her (rol, URL) icin: HTTP durumu, sorgu sayisi, toplam SQL suresi, duvar
+# saati suresi ve yanit boyutu. Her olcum oncesi onbellek temizlenir (soguk
+# istek); sorgu sayisi tekrarlarin en buyugu, sureler medyandir.
+#
+# Taban dosyasiyla karsilastirma:
+#   sorgu sayisi artisi ve HTTP durumu degisimi her zaman regresyondur;
+#   SQL suresi, duvar suresi ve boyut `--tolerans` oranindan (ve sureler
+#   `--min-fark-ms`den) fazla artarsa regresyondur.
+# Regresyon varsa komut hata koduyla biter.
+
+import json
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import NoReverseMatch, URLPattern, get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from rezervasyon.models import Cihaz, Laboratuvar, Randevu
+from rezervasyon.pdf_rapor import rapor_verisi
+from rezervasyon.sentetik_veri import sentetik_veri_olustur
+
+ROLLER = ("anonim", "ogrenci", "yonetici")
+TABAN_DOSYASI = Path(settings.BASE_DIR) / "bench_taban.json"
+# Sayilari karsilastirilan olcumler (sorgu ve durum ayrica, toleranssiz).
+SURE_OLCUMLERI = ("sql_ms", "sure_ms")
+
+
+def rol_kullanicilari():
+    """{rol: User | None}. Ogrenci: randevusu olan ilk aktif sentetik kullanici."""
+    ogrenci = (
+        User.objects.filter(is_active=True, is_staff=False, randevu__isnull=False)
+        .order_by("id").first()
+    )
+    yonetici = User.objects.create_superuser("bench_yonetici", "bench@example.com", "bench-sifre-123")
+    return {"anonim": None, "ogrenci": ogrenci, "yonetici": yonetici}
+
+
+def url_parametreleri(ogrenci):
+    """URL desenlerindeki parametre adlarina gercek degerler."""
+    randevu = (
+        Randevu.objects.filter(kullanici=ogrenci, durum=Randevu.ONAYLANDI)
+        .order_by("-tarih").first()
+    )
+    return {
+        "lab_id": Laboratuvar.objects.order_by("id").values_list("id", flat=True).first(),
+        "cihaz_id": Cihaz.objects.order_by("id").values_list("id", flat=True).first(),
+        "randevu_id": randevu.id if randevu else None,
+        "yeni_durum": Randevu.GELDI,
+        "anahtar": rapor_verisi(ogrenci)[1],
+        "uidb64": urlsafe_base64_encode(force_bytes(ogrenci.pk)),
+        "token": default_token_generator.make_token(ogrenci),
+    }
+
+
+def _site_urlleri(parametreler):
+    for desen in get_resolver().url_patterns:
+        # admin include'u (URLResolver) ayrica, modellerden uretilir;
+        # adsiz desenler (DEBUG'da static/media) olculmez.
+        if not isinstance(desen, URLPattern) or not desen.name:
+            continue
+        adlar = list(desen.pattern.regex.groupindex)
+        eksik = [ad for ad in adlar if parametreler.get(ad) is None]
+        if eksik:
+            yield desen.name, None, f"parametre yok: {', '.join(eksik)}"
+            continue
+        yield desen.name, reverse(desen.name, kwargs={ad: parametreler[ad] for ad in adlar}), None
+
+
+def _admin_urlleri():
+    yield "admin:index", reverse("admin:index"), None
+    for app_label in sorted({m._meta.app_label for m in admin.site._registry}):
+        yield f"admin:app_list:{app_label}", reverse("admin:app_list", args=[app_label]), None
+    for model in sorted(admin.site._registry, key=lambda m: m._meta.label):
+        onek = f"admin:{model._meta.app_label}_{model._meta.model_name}"
+        ilk_pk = model._default_manager.order_by("pk").values_list("pk", flat=True).first()
+        for sayfa in ("changelist", "add", "change", "history", "delete"):
+            ad = f"{onek}_{sayfa}"
+            args = [] if sayfa in ("changelist", "add") else [ilk_pk]
+            if args and ilk_pk is None:
+                yield ad, None, "kayit yok"
+                continue
+            try:
+                yield ad, reverse(ad, args=args), None
+            except NoReverseMatch:
+                # ModelAdmin bu sayfayi kapatmis (orn. get_urls ozellestirmesi).
+                continue
+
+
+def uc_noktalari(parametreler):
+    """(ad, yol, atlama_nedeni) listesi: once site, sonra admin URL'leri."""
+    return list(_site_urlleri(parametreler)) + list(_admin_urlleri())
+
+
+def _yanit_boyutu(yanit):
+    if yanit.streaming:
+        boyut = sum(len(parca) for parca in yanit.streaming_content)
+        yanit.close()
+        return boyut
+    return len(yanit.content)
+
+
+def tek_olcum(kullanici, yol):
+    """Soguk onbellekle tek GET. Donus: {durum, sorgu, sql_ms, sure_ms, boyut}."""
+    istemci = Client()
+    if kullanici is not None:
+        istemci.force_login(kullanici)
+    cache.clear()
+    # queries_log sinirli bir deque'dur; doluyken CaptureQueriesContext 0 sayar.
+    connection.queries_log.clear()
+    with CaptureQueriesContext(connection) as sorgular:
+        baslangic = time.perf_counter()
+        yanit = istemci.get(yol)
+        boyut = _yanit_boyutu(yanit)
+        sure = time.perf_counter() - baslangic
+    return {
+        "durum": yanit.status_code,
+        "sorgu": len(sorgular.captured_queries),
+        "sql_ms": sum(float(s["time"]) for s in sorgular.captured_queries) * 1000,
+        "sure_ms": sure * 1000,
+        "boyut": boyut,
+    }
+
+
+def olc(kullanici, yol, tekrar):
+    olcumler = [tek_olcum(kullanici, yol) for _ in range(tekrar)]
+    return {
+        "durum": olcumler[-1]["durum"],
+        "sorgu": max(o["sorgu"] for o in olcumler),
+        "sql_ms": round(statistics.median(o["sql_ms"] for o in olcumler), 2),
+        "sure_ms": round(statistics.median(o["sure_ms"] for o in olcumler), 2),
+        "boyut": olcumler[-1]["boyut"],
+    }
+
+
+def karsilastir(sonuclar, taban, tolerans=1.0, min_fark_ms=5.0, yalniz_sorgu=False):
+    """Tabana gore regresyonlari (metin listesi) doner. Tabanda olmayan URL'ler atlanir."""
+    regresyonlar = []
+    for anahtar, olcum in sonuclar.items():
+        eski = taban.get(anahtar)
+        if eski is None:
+            continue
+        if olcum["durum"] != eski["durum"]:
+            regresyonlar.append(f"{anahtar}: HTTP {eski['durum']} -> {olcum['durum']}")
+        if olcum["sorgu"] > eski["sorgu"]:
+            regresyonlar.append(f"{anahtar}: sorgu {eski['sorgu']} -> {olcum['sorgu']}")
+        if yalniz_sorgu:
+            continue
+        for alan in SURE_OLCUMLERI:
+            sinir = eski[alan] * (1 + tolerans)
+            if olcum[alan] > sinir and olcum[alan] - eski[alan] > min_fark_ms:
+                regresyonlar.append(f"{anahtar}: {alan} {eski[alan]:.1f} -> {olcum[alan]:.1f}")
+        if olcum["boyut"] > eski["boyut"] * (1 + tolerans):
+            regresyonlar.append(f"{anahtar}: boyut {eski['boyut']} -> {olcum['boyut']}")
+    return regresyonlar
+
+
+class Command(BaseCommand):
+    help = (
+        "Sentetik veriyle her URL'yi anonim/ogrenci/yonetici olarak ister; sorgu sayisi, "
+        "SQL suresi, sure ve boyutu olcup taban dosyasiyla karsilastirir."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lab", type=int, default=3, help="Laboratuvar sayisi.")
+        parser.add_argument("--cihaz", type=int, default=3, help="Laboratuvar basina cihaz sayisi.")
+        parser.add_argument("--kullanici", type=int, default=30, help="Sentetik kullanici sayisi.")
+        parser.add_argument("--yil", type=int, default=1, help="Randevu gecmisinin yil sayisi.")
+        parser.add_argument("--gunluk", type=int, default=4, help="Cihaz basina gunluk randevu sayisi.")
+        parser.add_argument("--tekrar", type=int, default=3, help="Her (rol, URL) icin istek sayisi.")
+        parser.add_argument("--filtre", default="", help="Yalniz adi bu metni iceren URL'ler.")
+        parser.add_argument("--taban", default=str(TABAN_DOSYASI), help="Taban JSON dosyasi.")
+        parser.add_argument("--kaydet", action="store_true", help="Sonuclari taban dosyasina yaz.")
+        parser.add_argument("--tolerans", type=float, default=1.0, help="Sure/boyut icin izin verilen artis orani.")
+        parser.add_argument("--min-fark-ms", type=float, default=5.0, help="Bundan kucuk sure artislari sayilmaz.")
+        parser.add_argument("--yalniz-sorgu", action="store_true", help="Yalniz sorgu sayisi ve HTTP durumu karsilastirilir.")
+
+    def handle(self, *args, **options):
+        veri = {k: options[k] for k in ("lab", "cihaz", "kullanici", "yil", "gunluk")}
+        eski_ad = connection.settings_dict["NAME"]
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        # 404/405 uyarilari ve PDF font uyarilari tabloyu bogmasin; 500'ler (ERROR) gorunur.
+        logging.disable(logging.WARNING)
+        try:
+            # Olcumler cache.clear() cagirir: REDIS_URL tanimli olsa da ortak
+            # onbellegi silmemek icin surec ici LocMem ile tek isci varsayilir.
+            with tempfile.TemporaryDirectory() as medya, override_settings(
+                MEDIA_ROOT=medya, PDF_RAPOR_ISCI_SAYISI=0, ISCI_SAYISI=1,
+                CACHES={"default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "bench",
+                }},
+            ):
+                sonuclar = self._olcumleri_yap(veri, options)
+        finally:
+            logging.disable(logging.NOTSET)
+            connection.creation.destroy_test_db(eski_ad, verbosity=0)
+            teardown_test_environment()
+
+        self._yazdir(sonuclar)
+        taban_yolu = Path(options["taban"])
+        if options["kaydet"]:
+            taban_yolu.write_text(
+                json.dumps({"veri": veri, "olcumler": sonuclar}, indent=2, ensure_ascii=False) + "\n",
+                encoding="utf-8",
+            )
+            self.stdout.write(self.style.SUCCESS(f"Taban yazildi: {taban_yolu}"))
+            return
+        if not taban_yolu.exists():
+            self.stdout.write(self.style.WARNING(f"Taban dosyasi yok ({taban_yolu}); karsilastirma yapilmadi."))
+            return
+        taban = json.loads(taban_yolu.read_text(encoding="utf-8"))
+        if taban.get("veri") != veri:
+            self.stdout.write(self.style.WARNING(
+                f"Taban farkli veri boyutuyla olculmus ({taban.get('veri')}); sure/boyut karsilastirmasi yaniltici olabilir."
+            ))
+        regresyonlar = karsilastir(
+            sonuclar, taban["olcumler"], options["tolerans"], options["min_fark_ms"], options["yalniz_sorgu"],
+        )
+        if regresyonlar:
+            for satir in regresyonlar:
+                self.stdout.write(self.style.ERROR(satir))
+            raise CommandError(f"{len(regresyonlar)} regresyon bulundu.")
+        self.stdout.write(self.style.SUCCESS("Tabana gore regresyon yok."))
+
+    def _olcumleri_yap(self, veri, options):
+        baslangic = time.perf_counter()
+        sayilar = sentetik_veri_olustur(**veri)
+        self.stderr.write(
+            "Veri: " + ", ".join(f"{ad}={adet}" for ad, adet in sayilar.items())
+            + f" ({time.perf_counter() - baslangic:.1f} sn)"
+        )
+        kullanicilar = rol_kullanicilari()
+        if kullanicilar["ogrenci"] is None:
+            raise CommandError("Randevusu olan aktif kullanici yok; --kullanici/--gunluk degerlerini artirin.")
+        sonuclar = {}
+        for ad, yol, neden in uc_noktalari(url_parametreleri(kullanicilar["ogrenci"])):
+            if options["filtre"] not in ad:
+                continue
+            if yol is None:
+                self.stderr.write(f"atlandi: {ad} ({neden})")
+                continue
+            for rol in ROLLER:
+                sonuclar[f"{rol} {ad}"] = olc(kullanicilar[rol], yol, options["tekrar"])
+        return sonuclar
+
+    def _yazdir(self, sonuclar):
+        self.stdout.write(
+            f"{'rol':9s} {'url':48s} {'http':>4s} {'sorgu':>6s} {'sql ms':>8s} {'sure ms':>8s} {'boyut':>9s}"
+        )
+        for anahtar, o in sonuclar.items():
+            rol, ad = anahtar.split(" ", 1)
+            self.stdout.write(
+                f"{rol:9s} {ad:48s} {o['durum']:4d} {o['sorgu']:6d} {o['sql_ms']:8.1f} {o['sure_ms']:8.1f} {o['boyut']:9d}"
+            )
@@ -0,0 +1,70 @@
+# TURKCE ARAMA: eposta gonder, mail kuyrugu isci, outbox worker
+#
+# Kullanim:
+#   python manage.py eposta_gonder                  # kuyrugu bir kez bosalt (cron)
+#   python manage.py eposta_gonder --dongu          # surekli calisan isci
+#   python manage.py eposta_gonder --dongu --aralik 5 --parti 100
+#
+# Kuyruktaki (EpostaKuyrugu) e-postalari partiler halinde gonderir; her parti
+# tek SMTP baglantisini yeniden kullanir. Hata alan e-postalar artan bekleme
+# ile EPOSTA_MAX_DENEME kez denenir.
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from rezervasyon.eposta import EPOSTA_PARTI_BOYUTU, kuyrugu_isle
+
+
+class Command(BaseCommand):
+    help = "E-posta kuyrugunu partiler halinde, tek SMTP baglantisiyla gonderir."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dongu",
+            action="store_true",
+            help="Kuyruk bosaldiktan sonra cikmak yerine belirtilen aralikla beklemeye devam et.",
+        )
+        parser.add_argument(
+            "--aralik",
+            type=int,
+            default=getattr(settings, "EPOSTA_GONDER_ARALIK_SANIYE", 5),
+            help="Dongu modunda kuyruk bosken bekleme (saniye).",
+        )
+        parser.add_argument(
+            "--parti",
+            type=int,
+            default=EPOSTA_PARTI_BOYUTU,
+            help="Bir SMTP baglantisiyla gonderilecek en fazla e-posta.",
+        )
+
+    def _bosalt(self, parti):
+        toplam_gonderilen = toplam_hatali = 0
+        while True:
+            gonderilen, hatali = kuyrugu_isle(parti)
+            toplam_gonderilen += gonderilen
+            toplam_hatali += hatali
+            # Parti dolu gelmediyse zamani gelmis baska e-posta yok.
+            if gonderilen + hatali < parti:
+                return toplam_gonderilen, toplam_hatali
+
+    def handle(self, *args, **options):
+        parti = max(options["parti"], 1)
+        if not options["dongu"]:
+            gonderilen, hatali = self._bosalt(parti)
+            self.stdout.write(self.style.SUCCESS(f"{gonderilen} e-posta gonderildi, {hatali} hata."))
+            return
+
+        aralik = max(options["aralik"], 1)
+        self.stdout.write(f"E-posta iscisi basladi ({aralik} sn aralik). Durdurmak icin Ctrl+C.")
+        try:
+            while True:
+                close_old_connections()
+                gonderilen, hatali = self._bosalt(parti)
+                if gonderilen or hatali:
+                    self.stdout.write(f"{gonderilen} e-posta gonderildi, {hatali} hata.")
+                time.sleep(aralik)
+        except KeyboardInterrupt:
+            self.stdout.write("E-posta iscisi durduruldu.")
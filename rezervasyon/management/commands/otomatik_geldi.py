@@ -1,15 +1,28 @@
-# TURKCE ARAMA: otomatik geldi, 48 saat, cron, zamanlanmis gorev
+# TURKCE ARAMA: otomatik geldi, 48 saat, cron, zamanlanmis gorev, zamanlayici dongusu
 #
-# Kullanim (ornek cron / zamanlanmis gorev):
-#   python manage.py otomatik_geldi
+# Kullanim:
+#   python manage.py otomatik_geldi                 # tek sefer (cron)
+#   python manage.py otomatik_geldi --dongu         # surekli calisan zamanlayici
+#   python manage.py otomatik_geldi --dongu --aralik 60
 #
 # Bitiminden OTOMATIK_GELDI_SURESI_SAAT (varsayilan 48) saatten fazla gecmis
 # ve hala "onaylandi" durumunda kalan randevulari "geldi" yapar.
 #
-# NOT: Ayni mantik liste/yonetim sayfalari acildiginda da (lazy) calisir;
-# bu komut, kullanici hic sayfa acmasa bile durumlarin guncel kalmasini saglar.
+# NOT: Bu is artik sayfa goruntulemelerinde (lazy) CALISMAZ; view'lar yalnizca
+# okur. Durumlarin guncel kalmasi icin bu komut cron ile ya da --dongu ile
+# surekli calistirilmalidir.
+#
+# Dongu modunda son calisma zamani (filigran) bellekte tutulur: ilk tur tum
+# tabloyu tarar, sonraki turlar yalnizca onceki turdan bu yana sinira giren
+# gunlere ve onceki turdan sonra guncellenen randevulara bakar (gec onaylanan
+# eski randevular da boylece isaretlenir).
+
+import time
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
 
 from rezervasyon.view_helpers import otomatik_geldi_isaretle
 
@@ -17,8 +30,44 @@ from rezervasyon.view_helpers import otomatik_geldi_isaretle
 class Command(BaseCommand):
     help = "48 saat gecmis onayli randevulari otomatik 'geldi' olarak isaretler."
 
-    def handle(self, *args, **options):
-        guncellenen = otomatik_geldi_isaretle()
-        self.stdout.write(
-            self.style.SUCCESS(f"{guncellenen} randevu otomatik 'geldi' olarak isaretlendi.")
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dongu",
+            action="store_true",
+            help="Tek sefer yerine belirtilen aralikla surekli calis.",
+        )
+        parser.add_argument(
+            "--aralik",
+            type=int,
+            default=getattr(settings, "OTOMATIK_GELDI_ARALIK_SANIYE", 300),
+            help="Dongu modunda iki calisma arasi bekleme (saniye).",
         )
+
+    def handle(self, *args, **options):
+        if not options["dongu"]:
+            guncellenen = otomatik_geldi_isaretle()
+            self.stdout.write(
+                self.style.SUCCESS(f"{guncellenen} randevu otomatik 'geldi' olarak isaretlendi.")
+            )
+            return
+
+        aralik = max(options["aralik"], 1)
+        self.stdout.write(f"Otomatik geldi zamanlayicisi basladi ({aralik} sn aralik). Durdurmak icin Ctrl+C.")
+        son_calisma = None
+        try:
+            while True:
+                # Uzun yasayan surecte kopmus/eskimis baglantilari birak.
+                close_old_connections()
+                baslangic = timezone.now()
+                guncellenen = otomatik_geldi_isaretle(son_calisma=son_calisma)
+                son_calisma = baslangic
+                if guncellenen:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"[{timezone.localtime(baslangic):%Y-%m-%d %H:%M:%S}] "
+                            f"{guncellenen} randevu otomatik 'geldi' olarak isaretlendi."
+                        )
+                    )
+                time.sleep(aralik)
+        except KeyboardInterrupt:
+            self.stdout.write("Zamanlayici durduruldu.")
@@ -0,0 +1,36 @@
+# TURKCE ARAMA: gunluk ozet yeniden olustur, rollup rebuild
+#
+# Kullanim:
+#   python manage.py ozet_yeniden_olustur                          # tum tablo
+#   python manage.py ozet_yeniden_olustur --baslangic 2026-01-01 --bitis 2026-01-31
+#
+# RandevuGunlukOzet tablosunu Randevu'dan set tabanli yeniden kurar. Normalde
+# sinyaller tabloyu guncel tutar; ham SQL, fixture yuklemesi veya sinyal
+# disi yazmalardan sonra calistirilir.
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from rezervasyon.ozet import ozet_yeniden_olustur
+
+
+class Command(BaseCommand):
+    help = "Randevu gunluk ozet tablosunu Randevu kayitlarindan yeniden olusturur."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--baslangic", help="Ilk gun (YYYY-MM-DD, dahil).")
+        parser.add_argument("--bitis", help="Son gun (YYYY-MM-DD, dahil).")
+
+    def handle(self, *args, **options):
+        baslangic = bitis = None
+        if options["baslangic"]:
+            baslangic = parse_date(options["baslangic"])
+            if baslangic is None:
+                raise CommandError("--baslangic YYYY-MM-DD biciminde olmali.")
+        if options["bitis"]:
+            bitis = parse_date(options["bitis"])
+            if bitis is None:
+                raise CommandError("--bitis YYYY-MM-DD biciminde olmali.")
+
+        satir = ozet_yeniden_olustur(baslangic, bitis)
+        self.stdout.write(self.style.SUCCESS(f"{satir} ozet satiri yazildi."))
@@ -0,0 +1,94 @@
+# TURKCE ARAMA: pdf benchmark, pdf uretim suresi, font onbellegi olcumu
+#
+# Kullanim:
+#   python manage.py pdf_benchmark                   # 20 tekrar, 20 satirlik rapor
+#   python manage.py pdf_benchmark --tekrar 50 --satir 100
+#
+# randevu_pdf.html raporunu veritabanina dokunmadan (kaydedilmemis ornek
+# nesnelerle) iki yoldan uretir ve PDF basina sureyi karsilastirir:
+#   eski : her PDF'te font kaydi + TTF dosyasini okuyup iki kez base64 gomme
+#   yeni : utils.render_to_pdf (fontlar surec basina bir kez hazirlanir)
+
+import base64
+import statistics
+import time
+from datetime import date, time as saat, timedelta
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.template.loader import get_template
+from xhtml2pdf import pisa
+
+from rezervasyon.models import Cihaz, Laboratuvar, Randevu
+from rezervasyon.utils import _find_font_path, link_callback, register_fonts, render_to_pdf
+
+
+def _ornek_context(satir):
+    lab = Laboratuvar(isim="Fizik Laboratuvarı")
+    cihaz = Cihaz(lab=lab, isim="Osiloskop Ğüşiöç")
+    kullanici = User(id=1, username="ornek", first_name="Örnek", last_name="Kullanıcı", email="ornek@example.com")
+    randevular = [
+        Randevu(
+            kullanici=kullanici, cihaz=cihaz, tarih=date(2026, 1, 1) + timedelta(days=i),
+            baslangic_saati=saat(9, 0), bitis_saati=saat(10, 0), durum=Randevu.ONAYLANDI,
+        )
+        for i in range(satir)
+    ]
+    return {"user": kullanici, "randevular": randevular}
+
+
+def _eski_yontem(context):
+    """Onbellek oncesi davranis: her cagrida font I/O + base64 CSS gomme."""
+    register_fonts()
+    html = get_template("randevu_pdf.html").render(context)
+    with open(_find_font_path("DejaVuSans.ttf"), "rb") as f:
+        font_b64 = base64.b64encode(f.read()).decode("ascii")
+    font_css = "<style>\n" + "".join(
+        "@font-face {\n"
+        "    font-family: 'DejaVuSans';\n"
+        f"    src: url(\"data:font/truetype;base64,{font_b64}\");\n"
+        f"    font-weight: {agirlik};\n"
+        "}\n"
+        for agirlik in ("normal", "bold")
+    ) + "</style>"
+    html = html.replace("</head>", font_css + "\n</head>", 1)
+    cikti = BytesIO()
+    pisa.CreatePDF(src=html, dest=cikti, link_callback=link_callback, encoding="UTF-8")
+    return cikti.getvalue()
+
+
+def _yeni_yontem(context):
+    return render_to_pdf("randevu_pdf.html", context).content
+
+
+class Command(BaseCommand):
+    help = "PDF basina uretim suresini eski (her seferinde font I/O) ve yeni (onbellekli) yolla olcer."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tekrar", type=int, default=20, help="Her yol icin uretilecek PDF sayisi.")
+        parser.add_argument("--satir", type=int, default=20, help="Rapordaki randevu satiri sayisi.")
+
+    def _olc(self, fonksiyon, context, tekrar):
+        fonksiyon(context)  # isinma (sablon derleme vb.)
+        sureler = []
+        for _ in range(tekrar):
+            baslangic = time.perf_counter()
+            boyut = len(fonksiyon(context))
+            sureler.append((time.perf_counter() - baslangic) * 1000)
+        return statistics.mean(sureler), statistics.median(sureler), boyut
+
+    def handle(self, *args, **options):
+        if not _find_font_path("DejaVuSans.ttf"):
+            self.stderr.write("DejaVuSans.ttf bulunamadi; karsilastirma anlamsiz.")
+            return
+        tekrar = max(options["tekrar"], 1)
+        context = _ornek_context(max(options["satir"], 0))
+
+        sonuclar = {}
+        for ad, fonksiyon in (("eski", _eski_yontem), ("yeni", _yeni_yontem)):
+            ort, medyan, boyut = self._olc(fonksiyon, context, tekrar)
+            sonuclar[ad] = ort
+            self.stdout.write(f"{ad:5s}: ortalama {ort:8.1f} ms | medyan {medyan:8.1f} ms | {boyut} bayt")
+
+        self.stdout.write(self.style.SUCCESS(f"Hizlanma: {sonuclar['eski'] / sonuclar['yeni']:.1f}x"))
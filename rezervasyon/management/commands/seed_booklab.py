@@ -0,0 +1,59 @@
+# TURKCE ARAMA: seed, sentetik veri yukleme, yuk testi verisi, toplu veri uretimi
+#
+# Kullanim:
+#   python manage.py seed_booklab                                    # ~0.7 milyon randevu
+#   python manage.py seed_booklab --lab 20 --cihaz 10 --kullanici 5000 --yil 5 --gunluk 10
+#
+# Gecerli veritabanina (settings.DATABASES["default"]) laboratuvar, cihaz,
+# kullanici + Profil, cakismasiz ve SLOT_DAKIKA'ya hizali randevu gecmisi,
+# ariza ve duyuru yukler; sonra gunluk ozet tablosunu yeniden kurar.
+# Randevu sayisi yaklasik: lab * cihaz * (365 * yil + 30) * gunluk.
+#
+# Satirlar sinyal ve Randevu.save()/clean() calistirmadan partiler halinde
+# yazilir (bkz. rezervasyon/sentetik_veri.py). Sentetik kullanicilarin sifresi
+# SENTETIK_SIFRE'dir. Komut sentetik veri zaten varsa calismaz; yeniden
+# yuklemek icin bos bir veritabani kullanin (`python manage.py flush`).
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rezervasyon.sentetik_veri import SENTETIK_ONEK, SENTETIK_SIFRE, sentetik_veri_olustur, sentetik_veri_var_mi
+
+
+class Command(BaseCommand):
+    help = "Yuk denemesi icin toplu sentetik veri (lab, cihaz, kullanici, randevu, ariza, duyuru) yukler."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lab", type=int, default=10, help="Laboratuvar sayisi.")
+        parser.add_argument("--cihaz", type=int, default=8, help="Laboratuvar basina cihaz sayisi.")
+        parser.add_argument("--kullanici", type=int, default=1000, help="Kullanici sayisi (her birine Profil).")
+        parser.add_argument("--yil", type=int, default=3, help="Randevu gecmisinin yil sayisi.")
+        parser.add_argument("--gunluk", type=int, default=8, help="Cihaz basina gunluk randevu sayisi.")
+        parser.add_argument("--ariza", type=int, default=3, help="Cihaz basina ariza kaydi.")
+        parser.add_argument("--duyuru", type=int, default=5, help="Duyuru sayisi.")
+        parser.add_argument("--tohum", type=int, default=0, help="Rastgele uretec tohumu (ayni tohum = ayni veri).")
+        parser.add_argument("--parti", type=int, default=10000, help="Yazma partisi (satir).")
+
+    def handle(self, *args, **options):
+        if min(options[k] for k in ("lab", "cihaz", "kullanici", "gunluk", "parti")) < 1 or options["yil"] < 0:
+            raise CommandError("--lab, --cihaz, --kullanici, --gunluk ve --parti en az 1, --yil en az 0 olmali.")
+        if sentetik_veri_var_mi():
+            raise CommandError(
+                "Veritabaninda sentetik veri zaten var. Yeniden yuklemek icin bos bir veritabani kullanin "
+                "(python manage.py flush)."
+            )
+
+        baslangic = time.perf_counter()
+        sayilar = sentetik_veri_olustur(**{
+            k: options[k] for k in ("lab", "cihaz", "kullanici", "yil", "gunluk", "ariza", "duyuru", "tohum", "parti")
+        })
+        sure = time.perf_counter() - baslangic
+
+        for model, adet in sayilar.items():
+            self.stdout.write(f"{model:20s} {adet:>10d}")
+        toplam = sum(sayilar.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{toplam} satir {sure:.1f} sn'de yuklendi ({toplam / max(sure, 1e-9):.0f} satir/sn). "
+            f"Kullanicilar: {SENTETIK_ONEK}00001..., sifre: {SENTETIK_SIFRE}"
+        ))
@@ -0,0 +1,25 @@
+# Takvim event API'lerinin artımlı (updated_since) sorgusu için Randevu'ya
+# son değişiklik zamanı eklenir. Mevcut kayıtlar migration anı ile doldurulur.
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rezervasyon", "0019_randevu_saatleri_10dk_yuvarla"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="randevu",
+            name="guncellenme_zamani",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="Son Güncellenme",
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Randevu sıcak sorguları için bileşik/kısmi indeksler: çakışma kontrolü
+# (cihaz, tarih, durum, saatler), kullanıcı randevuları (kullanici, tarih),
+# otomatik geldi işi (durum, tarih) ve onay bekleyenler.
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervasyon', '0020_randevu_guncellenme_zamani'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='randevu',
+            index=models.Index(fields=['cihaz', 'tarih', 'durum', 'baslangic_saati', 'bitis_saati'], name='randevu_cihaz_aralik_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='randevu',
+            index=models.Index(fields=['kullanici', 'tarih'], name='randevu_kullanici_tarih_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='randevu',
+            index=models.Index(fields=['durum', 'tarih'], name='randevu_durum_tarih_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='randevu',
+            index=models.Index(condition=models.Q(('durum', 'onay_bekleniyor')), fields=['tarih'], name='randevu_bekleyen_idx'),
+        ),
+    ]
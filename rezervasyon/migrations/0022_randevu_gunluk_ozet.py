@@ -0,0 +1,59 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:22
+
+# Panolar için (tarih, lab, cihaz, kullanici, durum) başına randevu sayısı
+# tutan özet tablosu; mevcut randevulardan ilk kez doldurulur.
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def ozeti_doldur(apps, schema_editor):
+    Randevu = apps.get_model('rezervasyon', 'Randevu')
+    RandevuGunlukOzet = apps.get_model('rezervasyon', 'RandevuGunlukOzet')
+    gruplar = (
+        Randevu.objects.values('tarih', 'cihaz_id', 'cihaz__lab_id', 'kullanici_id', 'durum')
+        .annotate(adet=Count('id'))
+        .order_by()
+    )
+    RandevuGunlukOzet.objects.bulk_create(
+        [
+            RandevuGunlukOzet(
+                tarih=g['tarih'], lab_id=g['cihaz__lab_id'], cihaz_id=g['cihaz_id'],
+                kullanici_id=g['kullanici_id'], durum=g['durum'], adet=g['adet'],
+            )
+            for g in gruplar
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervasyon', '0021_randevu_indeksleri'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RandevuGunlukOzet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarih', models.DateField(verbose_name='Tarih')),
+                ('durum', models.CharField(choices=[('onay_bekleniyor', 'Onay Bekleniyor'), ('onaylandi', 'Onaylandı'), ('reddedildi', 'Reddedildi'), ('geldi', 'Geldi'), ('gelmedi', 'Gelmedi'), ('iptal_edildi', 'İptal Edildi')], max_length=20, verbose_name='Durum')),
+                ('adet', models.PositiveIntegerField(default=0, verbose_name='Randevu Sayısı')),
+                ('cihaz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rezervasyon.cihaz', verbose_name='Cihaz')),
+                ('kullanici', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Kullanıcı')),
+                ('lab', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rezervasyon.laboratuvar', verbose_name='Laboratuvar')),
+            ],
+            options={
+                'verbose_name': 'Randevu Günlük Özeti',
+                'verbose_name_plural': 'Randevu Günlük Özetleri',
+                'indexes': [models.Index(fields=['tarih', 'lab'], name='randevu_ozet_tarih_lab_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tarih', 'cihaz', 'kullanici', 'durum'), name='randevu_ozet_tekil')],
+            },
+        ),
+        migrations.RunPython(ozeti_doldur, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervasyon', '0022_randevu_gunluk_ozet'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EpostaKuyrugu',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alici', models.EmailField(max_length=254, verbose_name='Alıcı')),
+                ('konu', models.CharField(max_length=255, verbose_name='Konu')),
+                ('metin', models.TextField(verbose_name='Düz Metin')),
+                ('html', models.TextField(blank=True, verbose_name='HTML İçerik')),
+                ('durum', models.CharField(choices=[('bekliyor', 'Gönderim Bekliyor'), ('gonderildi', 'Gönderildi'), ('basarisiz', 'Başarısız')], default='bekliyor', max_length=20, verbose_name='Durum')),
+                ('deneme_sayisi', models.PositiveSmallIntegerField(default=0, verbose_name='Deneme Sayısı')),
+                ('sonraki_deneme', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Sonraki Deneme')),
+                ('son_hata', models.TextField(blank=True, verbose_name='Son Hata')),
+                ('olusturulma_zamani', models.DateTimeField(auto_now_add=True)),
+                ('gonderilme_zamani', models.DateTimeField(blank=True, null=True, verbose_name='Gönderilme Zamanı')),
+            ],
+            options={
+                'verbose_name': 'E-posta Kuyruğu',
+                'verbose_name_plural': 'E-posta Kuyruğu',
+                'indexes': [models.Index(fields=['durum', 'sonraki_deneme'], name='eposta_kuyruk_bekleyen_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Veri migration'ı: Profil artık yalnızca kullanıcı oluşturulurken açılıyor
+# (önceden her User.save()'de get_or_create çalışıyordu). O sinyalden önce
+# oluşmuş ve profili hiç açılmamış kullanıcılar için profil eklenir.
+from django.db import migrations
+
+
+def eksik_profilleri_olustur(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    Profil = apps.get_model("rezervasyon", "Profil")
+    eksik = User.objects.filter(profil__isnull=True).values_list("pk", flat=True)
+    Profil.objects.bulk_create([Profil(user_id=pk) for pk in eksik.iterator()], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rezervasyon", "0023_eposta_kuyrugu"),
+    ]
+
+    operations = [
+        migrations.RunPython(eksik_profilleri_olustur, migrations.RunPython.noop),
+    ]
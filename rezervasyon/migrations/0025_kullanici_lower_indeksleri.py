@@ -0,0 +1,28 @@
+# Girişte kullanıcı adı/e-posta büyük-küçük harf duyarsız aranır
+# (backends.EmailOrUsernameModelBackend: LOWER(username) = LOWER(%s) OR
+# LOWER(email) = LOWER(%s)). Bu ifadeler için auth_user'a fonksiyonel
+# indeks eklenir; böylece sorgu tablo taraması yerine indeks kullanır.
+# auth_user Django'nun tablosu olduğundan indeksler RunSQL ile eklenir
+# (SQLite 3.9+ ve PostgreSQL aynı sözdizimini destekler).
+
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervasyon', '0024_eksik_profilleri_olustur'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "auth_user_lower_username_idx" ON "auth_user" (LOWER("username"));',
+            'DROP INDEX IF EXISTS "auth_user_lower_username_idx";',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "auth_user_lower_email_idx" ON "auth_user" (LOWER("email"));',
+            'DROP INDEX IF EXISTS "auth_user_lower_email_idx";',
+        ),
+    ]
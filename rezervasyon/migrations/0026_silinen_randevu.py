@@ -0,0 +1,30 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervasyon', '0025_kullanici_lower_indeksleri'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SilinenRandevu',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('randevu_id', models.PositiveBigIntegerField(verbose_name='Randevu ID')),
+                ('tarih', models.DateField(verbose_name='Randevu Tarihi')),
+                ('silinme_zamani', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Silinme Zamanı')),
+                ('lab', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rezervasyon.laboratuvar', verbose_name='Laboratuvar')),
+            ],
+            options={
+                'verbose_name': 'Silinen Randevu',
+                'verbose_name_plural': 'Silinen Randevular',
+                'indexes': [models.Index(fields=['silinme_zamani'], name='silinen_randevu_zaman_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervasyon', '0026_silinen_randevu'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='randevu',
+            name='cihaz',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='rezervasyon.cihaz', verbose_name='Seçilen Cihaz'),
+        ),
+        migrations.AlterField(
+            model_name='randevu',
+            name='kullanici',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Randevuyu Alan'),
+        ),
+    ]
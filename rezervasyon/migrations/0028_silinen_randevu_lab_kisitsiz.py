@@ -0,0 +1,19 @@
+# Generated by Django 5.2.11 on 2026-10-18 12:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervasyon', '0027_randevu_fk_tekil_indeksleri_kaldir'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='silinenrandevu',
+            name='lab',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='rezervasyon.laboratuvar', verbose_name='Laboratuvar'),
+        ),
+    ]
@@ -1,8 +1,13 @@
+from contextlib import contextmanager
+
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.db import connection, transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 # 1. Kapsayıcı: Laboratuvar
 class Laboratuvar(models.Model):
@@ -18,6 +23,20 @@ class Laboratuvar(models.Model):
 
 
 # 2. Rezerve Edilecek Nesne: Cihaz
+class CihazQuerySet(models.QuerySet):
+    def with_son_ariza(self):
+        """Her cihazın çözülmemiş en son arıza açıklamasını aynı sorguda ekler.
+
+        `son_ariza_notu` bu annotasyon varsa cihaz başına sorgu çalıştırmaz.
+        """
+        son_ariza = (
+            Ariza.objects.filter(cihaz=models.OuterRef("pk"), cozuldu_mu=False)
+            .order_by("-tarih", "-id")
+            .values("aciklama")[:1]
+        )
+        return self.annotate(son_ariza_aciklama=models.Subquery(son_ariza))
+
+
 # 2. Rezerve Edilecek Nesne: Cihaz
 class Cihaz(models.Model):
     lab = models.ForeignKey(Laboratuvar, on_delete=models.CASCADE, verbose_name="Bağlı Olduğu Laboratuvar")
@@ -26,6 +45,8 @@ class Cihaz(models.Model):
     aciklama = models.TextField(blank=True, null=True, verbose_name="Açıklama")
     resim = models.ImageField(upload_to="cihazlar/", blank=True, null=True, verbose_name="Cihaz Resmi")
 
+    objects = CihazQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Cihaz"
         verbose_name_plural = "Cihazlar"
@@ -36,12 +57,64 @@ class Cihaz(models.Model):
 
     @property
     def son_ariza_notu(self):
-        # Bu cihaza ait olan ve henüz çözülmemiş en son arıza kaydını bul
-        son_ariza = self.ariza_set.filter(cozuldu_mu=False).last() 
-        if son_ariza:
-            return son_ariza.aciklama
+        # Bu cihaza ait olan ve henüz çözülmemiş en son arıza kaydını bul.
+        # Cihaz.objects.with_son_ariza() ile gelindiyse ek sorgu yapılmaz.
+        if "son_ariza_aciklama" in self.__dict__:
+            aciklama = self.son_ariza_aciklama
+        else:
+            aciklama = (
+                self.ariza_set.filter(cozuldu_mu=False)
+                .order_by("-tarih", "-id")
+                .values_list("aciklama", flat=True)
+                .first()
+            )
+        if aciklama:
+            return aciklama
         return "Manuel pasife alındı veya not yok."
 
+def cihaz_kilitle(cihaz_id):
+    """Cihaz satırını içinde bulunulan transaction sonuna kadar kilitler.
+
+    Aynı cihaza yapılan eşzamanlı rezervasyonların "çakışma kontrolü + kayıt"
+    adımları böylece sıraya girer (PostgreSQL/MySQL: SELECT ... FOR UPDATE).
+    SQLite satır kilidi desteklemez; orada etkisiz bir UPDATE veritabanının
+    yazma kilidini o anda alır. transaction.atomic() içinde çağrılmalıdır;
+    yeni işlem açılacaksa `cihaz_kilidi` tercih edilir.
+    """
+    if connection.features.has_select_for_update:
+        list(Cihaz.objects.select_for_update().filter(pk=cihaz_id).values_list("pk", flat=True))
+    else:
+        Cihaz.objects.filter(pk=cihaz_id).update(id=models.F("id"))
+
+
+@contextmanager
+def cihaz_kilidi(cihaz_id):
+    """`transaction.atomic()` + cihaz kilidi.
+
+    SQLite'ta en dıştaki işlem `BEGIN IMMEDIATE` ile açılır: yazma kilidi
+    işlemin başında alınır, eşzamanlı istek kilidi `timeout` süresince bekler.
+    (Okuma yapmış ertelenmiş bir işlemin kilidi sonradan yükseltmesi beklemeden
+    "database is locked" verebilir.) Yalnız bu yol IMMEDIATE'tir; diğer
+    atomic bloklar varsayılan ertelenmiş modda kalır. İç içe çağrıda ve
+    diğer veritabanlarında `cihaz_kilitle` kullanılır.
+    """
+    anlik = connection.vendor == "sqlite" and not connection.in_atomic_block
+    if anlik:
+        # transaction_mode bağlantı kurulurken ayarlardan okunur; önce bağlan.
+        connection.ensure_connection()
+        eski_mod, connection.transaction_mode = connection.transaction_mode, "IMMEDIATE"
+    try:
+        with transaction.atomic():
+            if anlik:
+                connection.transaction_mode = eski_mod
+            else:
+                cihaz_kilitle(cihaz_id)
+            yield
+    finally:
+        if anlik:
+            connection.transaction_mode = eski_mod
+
+
 # 3. İşlem: Randevu
 class Randevu(models.Model):
     # DURUM SABİTLERİ 
@@ -60,13 +133,22 @@ class Randevu(models.Model):
         (GELMEDI, "Gelmedi"),
         (IPTAL, "İptal Edildi"),
     ]
-
-    kullanici = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Randevuyu Alan")
-    cihaz = models.ForeignKey(Cihaz, on_delete=models.PROTECT, verbose_name="Seçilen Cihaz")
+    # Cihazı meşgul eden (çakışma ve takvim için sayılan) durumlar
+    AKTIF_DURUMLAR = [ONAY_BEKLENIYOR, ONAYLANDI, GELDI]
+
+    # İki FK'nin tek kolonlu indeksi yok: Meta'daki bileşik indeksler bu
+    # kolonlarla başlar ve tek başına FK filtrelerini (cascade/protect
+    # kontrolleri dahil) de karşılar; ayrı indeks her yazmada boşuna güncellenirdi.
+    kullanici = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False, verbose_name="Randevuyu Alan")
+    cihaz = models.ForeignKey(Cihaz, on_delete=models.PROTECT, db_index=False, verbose_name="Seçilen Cihaz")
     tarih = models.DateField(verbose_name="Randevu Tarihi")
     baslangic_saati = models.TimeField(verbose_name="Başlangıç Saati")
     bitis_saati = models.TimeField(verbose_name="Bitiş Saati")
     olusturulma_zamani = models.DateTimeField(auto_now_add=True)
+    # Takvim akışının artımlı (updated_since) sorgusu için son değişiklik anı.
+    # NOT: QuerySet.update() auto_now alanını doldurmaz; toplu güncellemelerde
+    # bu alan elle set edilmelidir.
+    guncellenme_zamani = models.DateTimeField(auto_now=True, verbose_name="Son Güncellenme")
 
     durum = models.CharField(
         max_length=20,
@@ -90,6 +172,29 @@ class Randevu(models.Model):
     class Meta:
         verbose_name = "Randevu"
         verbose_name_plural = "Randevular"
+        indexes = [
+            # Çakışma kontrolü (check_overlap, clean), randevu_al ve
+            # toplu_randevu'nun gün yüklemesi (AralikIndeksi/GunDolulugu.yukle): cihaz + tarih
+            # eşitliği, durum filtresi; saat kolonları da indekste olduğundan
+            # bu sorgular tabloya hiç inmez (covering).
+            models.Index(
+                fields=["cihaz", "tarih", "durum", "baslangic_saati", "bitis_saati"],
+                name="randevu_cihaz_aralik_idx",
+            ),
+            # randevularim / anasayfa: kullanıcının randevuları (tarih aralığı)
+            models.Index(fields=["kullanici", "tarih"], name="randevu_kullanici_tarih_idx"),
+            # otomatik_geldi_isaretle ve takvim penceresi: durum + tarih aralığı
+            models.Index(fields=["durum", "tarih"], name="randevu_durum_tarih_idx"),
+            # Onay bekleyenler (badge sayacı, yönetim paneli) tablonun küçük bir
+            # kısmıdır; kısmi indeks yalnız onları tutar. NOT: SQLite parametreli
+            # sorguda kısmi indeksi seçemez (orada durum_tarih indeksi kullanılır);
+            # PostgreSQL'de değerler sorguya gömülü gittiği için devreye girer.
+            models.Index(
+                fields=["tarih"],
+                condition=models.Q(durum="onay_bekleniyor"),
+                name="randevu_bekleyen_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.kullanici.username} - {self.cihaz.isim} - {self.tarih}"
@@ -100,7 +205,7 @@ class Randevu(models.Model):
             cakisma_var_mi = Randevu.objects.filter(
                 cihaz=self.cihaz, 
                 tarih=self.tarih, 
-                durum__in=[self.ONAY_BEKLENIYOR, self.ONAYLANDI, self.GELDI]
+                durum__in=self.AKTIF_DURUMLAR
             ).exclude(pk=self.pk)
 
             cakisma = cakisma_var_mi.filter(
@@ -129,9 +234,22 @@ class Randevu(models.Model):
     def sonradan_iptal(self):
         """Herhangi bir aşamada randevuyu iptal/red durumuna çeker"""
         self.durum = self.REDDEDILDI  # Veya self.IPTAL
-    def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
+    def save(self, *args, cakisma_kontrolu=True, **kwargs):
+        # Çakışmayı aynı transaction içinde (cihaz kilidi altında) zaten
+        # doğrulamış çağıranlar veritabanı kontrolünü tekrarlamamak için
+        # cakisma_kontrolu=False geçer:
+        # - randevu_olustur: check_overlap ile dakika hassasiyetinde kesin kontrol.
+        # - toplu_randevu: doluluk.AralikIndeksi; günün aralıkları kilit
+        #   alındıktan sonra tek sorguda yüklenir, seçim dakika hassasiyetinde
+        #   doğrulanır ve oluşturulan her randevu indekse eklenir.
+        if not cakisma_kontrolu:
+            super().save(*args, **kwargs)
+            return
+        # Kontrol ve kayıt tek kritik bölgede: eşzamanlı iki kayıt ikisi de
+        # kontrolü geçip çakışan randevu oluşturamaz.
+        with cihaz_kilidi(self.cihaz_id) if self.durum != self.IPTAL else transaction.atomic():
+            self.clean()
+            super().save(*args, **kwargs)
 
 # 4. Profil
 class Profil(models.Model):
@@ -172,9 +290,12 @@ class Profil(models.Model):
         return f"{self.user.username} Profili"
 
 @receiver(post_save, sender=User)
-def create_or_save_user_profile(sender, instance, created, **kwargs):
-    profil, created = Profil.objects.get_or_create(user=instance)
-    profil.save()
+def create_or_save_user_profile(sender, instance, created, raw=False, **kwargs):
+    # Profil yalnızca kullanıcı ilk kaydedildiğinde açılır. Sonraki kayıtlar
+    # (girişteki last_login, admin düzenlemeleri) profile dokunmaz; statü
+    # eşitlemesi açıkça view_helpers.profil_durumlarini_esitle ile yapılır.
+    if created and not raw:
+        Profil.objects.get_or_create(user=instance)
 
 
 # 5. Arıza Bildirimi
@@ -212,7 +333,121 @@ class Duyuru(models.Model):
         return self.baslik
 
 
-# 7. Proxy Modeller
+# 7. Randevu Günlük Özeti (rollup)
+class RandevuGunlukOzet(models.Model):
+    """TURKCE ARAMA: gunluk ozet, rollup, dashboard sayaclari.
+
+    (tarih, lab, cihaz, kullanici, durum) başına randevu sayısı. Panolar ham
+    Randevu tablosu yerine bunu toplar; böylece sorgu maliyeti geçmişin
+    büyüklüğüyle değil, seçilen dönemdeki özet satır sayısıyla orantılıdır.
+    Sinyallerle artımlı güncellenir (bkz. ozet.py); `ozet_yeniden_olustur`
+    komutu tabloyu Randevu'dan baştan kurar.
+    """
+
+    tarih = models.DateField(verbose_name="Tarih")
+    lab = models.ForeignKey(Laboratuvar, on_delete=models.CASCADE, verbose_name="Laboratuvar")
+    cihaz = models.ForeignKey(Cihaz, on_delete=models.CASCADE, verbose_name="Cihaz")
+    kullanici = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Kullanıcı")
+    durum = models.CharField(max_length=20, choices=Randevu.DURUM_SECENEKLERI, verbose_name="Durum")
+    adet = models.PositiveIntegerField(default=0, verbose_name="Randevu Sayısı")
+
+    class Meta:
+        verbose_name = "Randevu Günlük Özeti"
+        verbose_name_plural = "Randevu Günlük Özetleri"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tarih", "cihaz", "kullanici", "durum"],
+                name="randevu_ozet_tekil",
+            ),
+        ]
+        indexes = [
+            # Panolar: ay aralığında lab bazlı toplamlar
+            models.Index(fields=["tarih", "lab"], name="randevu_ozet_tarih_lab_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.tarih} - {self.cihaz_id} - {self.kullanici_id} - {self.durum}: {self.adet}"
+
+
+# 8. E-posta Kuyruğu (outbox)
+class EpostaKuyrugu(models.Model):
+    """TURKCE ARAMA: eposta kuyrugu, outbox, arka plan mail gonderimi.
+
+    İstek içinde SMTP'ye bağlanmak yerine gönderilecek her e-posta buraya
+    yazılır; `eposta_gonder` komutu kuyruğu partiler halinde, tek SMTP
+    bağlantısını yeniden kullanarak boşaltır (bkz. eposta.py).
+    """
+
+    BEKLIYOR = "bekliyor"
+    GONDERILDI = "gonderildi"
+    BASARISIZ = "basarisiz"
+
+    DURUM_SECENEKLERI = [
+        (BEKLIYOR, "Gönderim Bekliyor"),
+        (GONDERILDI, "Gönderildi"),
+        (BASARISIZ, "Başarısız"),
+    ]
+
+    alici = models.EmailField(verbose_name="Alıcı")
+    konu = models.CharField(max_length=255, verbose_name="Konu")
+    metin = models.TextField(verbose_name="Düz Metin")
+    html = models.TextField(blank=True, verbose_name="HTML İçerik")
+    durum = models.CharField(max_length=20, choices=DURUM_SECENEKLERI, default=BEKLIYOR, verbose_name="Durum")
+    deneme_sayisi = models.PositiveSmallIntegerField(default=0, verbose_name="Deneme Sayısı")
+    sonraki_deneme = models.DateTimeField(default=timezone.now, verbose_name="Sonraki Deneme")
+    son_hata = models.TextField(blank=True, verbose_name="Son Hata")
+    olusturulma_zamani = models.DateTimeField(auto_now_add=True)
+    gonderilme_zamani = models.DateTimeField(null=True, blank=True, verbose_name="Gönderilme Zamanı")
+
+    class Meta:
+        verbose_name = "E-posta Kuyruğu"
+        verbose_name_plural = "E-posta Kuyruğu"
+        indexes = [
+            # İşçi: gönderim zamanı gelmiş bekleyenler
+            models.Index(fields=["durum", "sonraki_deneme"], name="eposta_kuyruk_bekleyen_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.alici} - {self.konu} ({self.get_durum_display()})"
+
+
+# 9. Silinen Randevu İzi (tombstone)
+class SilinenRandevu(models.Model):
+    """TURKCE ARAMA: silinen randevu, tombstone, artimli takvim.
+
+    Randevu satırı silindiğinde (admin silmesi, kullanıcı silinince cascade)
+    takvim akışının artımlı (`updated_since`) istemcileri kaydın kalktığını
+    ancak buradan öğrenebilir. `post_delete` sinyaliyle yazılır;
+    TAKVIM_SILINEN_SAKLAMA_GUN gününden eski izler silinir (bkz. signals.py).
+    """
+
+    randevu_id = models.PositiveBigIntegerField(verbose_name="Randevu ID")
+    # İz, laboratuvar silinse de zararsızdır; DO_NOTHING + kısıtsız FK sayesinde
+    # lab silme (ve admin onay sayfası) bu tabloyu hiç sorgulamaz.
+    lab = models.ForeignKey(
+        Laboratuvar, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+",
+        verbose_name="Laboratuvar",
+    )
+    tarih = models.DateField(verbose_name="Randevu Tarihi")
+    silinme_zamani = models.DateTimeField(default=timezone.now, verbose_name="Silinme Zamanı")
+
+    # Bu süreden eski imleçle gelen artımlı istek silinmeleri kaçırabileceği
+    # için reddedilir; istemci tam pencereyi yeniden yükler.
+    SAKLAMA_GUN = getattr(settings, "TAKVIM_SILINEN_SAKLAMA_GUN", 30)
+
+    class Meta:
+        verbose_name = "Silinen Randevu"
+        verbose_name_plural = "Silinen Randevular"
+        indexes = [
+            # Artımlı takvim sorgusu ve eski izlerin temizliği
+            models.Index(fields=["silinme_zamani"], name="silinen_randevu_zaman_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.randevu_id} ({self.silinme_zamani:%Y-%m-%d %H:%M})"
+
+
+# 10. Proxy Modeller
 class OnayBekleyenler(User):
     class Meta:
         proxy = True
@@ -0,0 +1,226 @@
+# TURKCE ARAMA: onbellek, cache, istatistik onbellegi, gecersiz kilma, invalidation,
+# veri surumu, versiyon sayaci, etag
+
+import hashlib
+import multiprocessing
+import sys
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+
+# İstatistik sayfası verisi bu süre (saniye) boyunca bellekten sunulur.
+# Anahtar veri sürümünü içerdiğinden bayat veri sunulmaz; süre yalnızca
+# sinyal tetiklenmeyen yazmalara (ham SQL vb.) karşı emniyettir.
+ISTATISTIK_ONBELLEK_SANIYE = getattr(settings, "ISTATISTIK_ONBELLEK_SANIYE", 300)
+# Takvim event JSON'u (lab, pencere) başına bu süre tutulur.
+TAKVIM_ONBELLEK_SANIYE = getattr(settings, "TAKVIM_ONBELLEK_SANIYE", 600)
+# Sayfa parçaları (lab detay, cihaz gün programı, randevularım) için süre.
+SAYFA_ONBELLEK_SANIYE = getattr(settings, "SAYFA_ONBELLEK_SANIYE", 600)
+
+
+# --- Veri sürüm sayaçları ---
+#
+# Her kapsam için artan bir sayaç tutulur. Sinyaller (bkz. signals.py)
+# kapsamın verisi değiştiğinde sayacı artırır; önbellek anahtarları ve
+# ETag'ler sayacı içerdiğinden eski kayıtlar silinmeden geçersiz kalır,
+# global temizlik (flush) gerekmez.
+#   lab:<id>       : laboratuvar, cihazları, arızaları ve randevuları
+#   cihaz:<id>     : cihaz, arızaları ve randevuları
+#   kullanici:<id> : kullanıcı, profili ve randevuları
+#   tum            : herhangi bir laboratuvarın sayacı arttığında artar
+#   genel          : tüm takvimleri etkileyen nadir değişiklikler (kullanıcı adı)
+#   katalog        : herhangi bir cihaz ya da laboratuvar kaydı (adlar);
+#                    randevu ve arıza yazmaları artırmaz
+#   istatistik     : istatistik sayfasına giren herhangi bir kayıt
+#
+# Sayaçlar ancak tüm işçi süreçlerinin gördüğü bir önbellekte (Redis) doğru
+# çalışır; bkz. settings CACHES ve `onbellek_paylasimli_mi`.
+
+
+def coklu_isci_mi():
+    """Uygulama birden çok işçi süreciyle mi sunuluyor?
+
+    ISCI_SAYISI (WEB_CONCURRENCY) ayarı ya da `uvicorn --workers N` (işçiler
+    multiprocessing ile başlatılır) ile anlaşılır. gunicorn işçi sayısını
+    süreçlere bildirmediğinden orada WEB_CONCURRENCY kullanılmalıdır.
+    """
+    if getattr(settings, "ISCI_SAYISI", 1) > 1:
+        return True
+    return "uvicorn" in sys.modules and multiprocessing.parent_process() is not None
+
+
+def onbellek_paylasimli_mi():
+    """Önbellekteki sayaçlar ve kayıtlar tüm işçilerce görülüyor mu?
+
+    Süreç içi LocMemCache birden çok işçiyle kullanılırsa bir işçideki sürüm
+    artışı diğerlerine ulaşmaz; o durumda False döner ve çağıranlar önbelleği
+    atlayıp (ETag üretmeden, sayaçları yeniden sayarak) veritabanından okur.
+    """
+    return not (coklu_isci_mi() and isinstance(caches["default"], LocMemCache))
+
+
+def onbellek_kontrolu(app_configs, **kwargs):
+    """`manage.py check` (runserver, migrate...): çok işçi + LocMem hatadır."""
+    if getattr(settings, "ISCI_SAYISI", 1) > 1 and isinstance(caches["default"], LocMemCache):
+        return [
+            checks.Error(
+                "WEB_CONCURRENCY > 1 iken önbellek süreç içi LocMemCache; sürüm ve "
+                "badge sayaçları işçiler arasında paylaşılmaz.",
+                hint="REDIS_URL ile ortak bir önbellek tanımlayın ya da tek işçiyle çalıştırın.",
+                id="rezervasyon.E001",
+            )
+        ]
+    return []
+
+
+def _versiyon_anahtari(kapsam):
+    return f"versiyon:{kapsam}"
+
+
+def _baslangic_degeri():
+    # Sayaç kaybolursa (yeniden başlatma, tahliye) eski değerlere dönmesin diye
+    # zamandan başlatılır; aksi halde eski bir ETag yeni veriyle eşleşebilirdi.
+    return time.time_ns()
+
+
+def versiyon(kapsam):
+    anahtar = _versiyon_anahtari(kapsam)
+    deger = cache.get(anahtar)
+    if deger is None:
+        cache.add(anahtar, _baslangic_degeri(), None)
+        deger = cache.get(anahtar) or _baslangic_degeri()
+    return deger
+
+
+def versiyonlar(*kapsamlar):
+    """Birden çok kapsamın sayacını tek önbellek okumasıyla döner (sıra korunur)."""
+    anahtarlar = [_versiyon_anahtari(k) for k in kapsamlar]
+    bulunan = cache.get_many(anahtarlar)
+    return tuple(
+        bulunan[a] if a in bulunan else versiyon(k)
+        for k, a in zip(kapsamlar, anahtarlar)
+    )
+
+
+async def aversiyonlar(*kapsamlar):
+    """`versiyonlar` async sürümü (ASGI view'ları için)."""
+    anahtarlar = [_versiyon_anahtari(k) for k in kapsamlar]
+    bulunan = await cache.aget_many(anahtarlar)
+    sonuc = []
+    for anahtar in anahtarlar:
+        if anahtar not in bulunan:
+            await cache.aadd(anahtar, _baslangic_degeri(), None)
+            bulunan[anahtar] = await cache.aget(anahtar) or _baslangic_degeri()
+        sonuc.append(bulunan[anahtar])
+    return tuple(sonuc)
+
+
+def _versiyonlari_simdi_artir(kapsamlar):
+    for kapsam in kapsamlar:
+        anahtar = _versiyon_anahtari(kapsam)
+        try:
+            cache.incr(anahtar)
+        except ValueError:
+            cache.add(anahtar, _baslangic_degeri(), None)
+
+
+def versiyonlari_artir(*kapsamlar):
+    """Sayaçları işlem (transaction) onaylandığında artırır.
+
+    Onaydan önce artırılsaydı eşzamanlı bir okuyucu henüz görünmeyen eski
+    veriyi yeni sürüm anahtarıyla önbelleğe yazabilirdi. Açık işlem yoksa
+    hemen çalışır.
+    """
+    kapsamlar = set(kapsamlar)
+    if kapsamlar:
+        transaction.on_commit(lambda: _versiyonlari_simdi_artir(kapsamlar))
+
+
+def kapsamlari_artir(lab_idleri=(), cihaz_idleri=(), kullanici_idleri=()):
+    """Verilen laboratuvar/cihaz/kullanıcı sayaçlarını artırır.
+
+    Bir laboratuvar değiştiğinde "tum" kapsamı da artar. None id'ler atlanır.
+    """
+    kapsamlar = {f"lab:{i}" for i in lab_idleri if i is not None}
+    if kapsamlar:
+        kapsamlar.add("tum")
+    kapsamlar |= {f"cihaz:{i}" for i in cihaz_idleri if i is not None}
+    kapsamlar |= {f"kullanici:{i}" for i in kullanici_idleri if i is not None}
+    versiyonlari_artir(*kapsamlar)
+
+
+def surumlu_onbellek(ad, kapsamlar, hesapla, sure=SAYFA_ONBELLEK_SANIYE):
+    """`ad` verisini kapsamların o anki sürümüyle anahtarlanmış olarak önbellekten
+    döner; yoksa `hesapla()` ile üretip yazar.
+
+    Sürümler hesaplamadan ÖNCE okunur: hesaplama sırasında gelen bir yazma
+    sayacı artırır ve burada yazılan kayıt bir sonraki istekte kullanılmaz.
+    Önbellek işçiler arasında paylaşılmıyorsa her seferinde hesaplanır.
+    """
+    if not onbellek_paylasimli_mi():
+        return hesapla()
+    surum = "-".join(str(v) for v in versiyonlar(*kapsamlar))
+    anahtar = f"{ad}:{surum}"
+    veri = cache.get(anahtar)
+    if veri is None:
+        veri = hesapla()
+        cache.set(anahtar, veri, sure)
+    return veri
+
+
+# --- İstatistik önbelleği ---
+
+def istatistik_anahtari(bolum="genel"):
+    """Önbellek anahtarı öneki. "Bu ay" sayacı ay dönümünde kendiliğinden
+    yenilensin diye yıl-ay içerir."""
+    return f"istatistik:{bolum}:{timezone.localdate():%Y-%m}"
+
+
+def istatistik_onbellegi(bolum, hesapla):
+    """`bolum` verisini önbellekten döner; yoksa `hesapla()` ile üretip yazar."""
+    return surumlu_onbellek(istatistik_anahtari(bolum), ("istatistik",), hesapla, ISTATISTIK_ONBELLEK_SANIYE)
+
+
+def istatistik_onbellegini_temizle():
+    """İstatistik önbelleğini (işlem onaylandığında) geçersiz kılar.
+
+    Model sinyalleri bunu otomatik çağırır. QuerySet.update() sinyal
+    tetiklemediğinden toplu güncelleme yapan kod bunu ayrıca çağırmalıdır.
+    """
+    versiyonlari_artir("istatistik")
+
+
+# --- Takvim event önbelleği / ETag ---
+
+def takvim_surumu(lab_id, baslangic, bitis):
+    """Takvim event yanıtının (kapsam, pencere, sürüm) kimliği.
+
+    Hem önbellek anahtarında hem ETag'de kullanılır; kapsamın verisi
+    değişmedikçe aynı kalır.
+    """
+    kapsam = _takvim_kapsami(lab_id)
+    return _takvim_surum_metni(kapsam, baslangic, bitis, versiyonlar(kapsam, "genel"))
+
+
+async def atakvim_surumu(lab_id, baslangic, bitis):
+    """`takvim_surumu` async sürümü."""
+    kapsam = _takvim_kapsami(lab_id)
+    return _takvim_surum_metni(kapsam, baslangic, bitis, await aversiyonlar(kapsam, "genel"))
+
+
+def _takvim_kapsami(lab_id):
+    return "tum" if lab_id is None else f"lab:{lab_id}"
+
+
+def _takvim_surum_metni(kapsam, baslangic, bitis, surumler):
+    surum = "-".join(str(v) for v in surumler)
+    return f"{kapsam}:{baslangic:%Y%m%d}:{bitis:%Y%m%d}:{surum}"
+
+
+def takvim_etag(surum):
+    return '"' + hashlib.sha256(surum.encode()).hexdigest()[:32] + '"'
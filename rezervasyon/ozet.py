@@ -0,0 +1,109 @@
+# TURKCE ARAMA: gunluk ozet, rollup, artimli guncelleme, ozet yeniden hesaplama
+#
+# RandevuGunlukOzet tablosunun bakımı. Tekil kayıt/silmeler signals.py
+# üzerinden `ozet_degisikligi_uygula` ile artımlı işlenir; sinyal
+# tetiklemeyen toplu QuerySet.update() yolları etkilenen günleri
+# `ozet_gunlerini_yeniden_hesapla` ile yeniden kurar; `ozet_yeniden_olustur`
+# tüm tabloyu (veya bir tarih aralığını) baştan kurar.
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F
+
+from .models import Cihaz, Randevu, RandevuGunlukOzet
+
+# Randevu üzerinde özet anahtarını oluşturan alanlar.
+OZET_ALANLARI = ("tarih", "cihaz_id", "kullanici_id", "durum")
+
+
+def ozet_anahtari(randevu):
+    """(tarih, cihaz_id, kullanici_id, durum). Alanlardan biri ertelenmişse
+    (.only/.defer) None döner; ek sorgu tetiklenmez."""
+    degerler = randevu.__dict__
+    if any(alan not in degerler for alan in OZET_ALANLARI):
+        return None
+    return tuple(degerler[alan] for alan in OZET_ALANLARI)
+
+
+def _artir(anahtar, fark, lab_id=None):
+    tarih, cihaz_id, kullanici_id, durum = anahtar
+    satirlar = RandevuGunlukOzet.objects.filter(
+        tarih=tarih, cihaz_id=cihaz_id, kullanici_id=kullanici_id, durum=durum,
+    )
+    if fark < 0:
+        # Sayaç sıfıra inecekse satır silinir (tablo yalnız dolu grupları tutar).
+        if not satirlar.filter(adet__gt=-fark).update(adet=F("adet") + fark):
+            satirlar.delete()
+        return
+    if satirlar.update(adet=F("adet") + fark):
+        return
+    if lab_id is None:
+        lab_id = Cihaz.objects.values_list("lab_id", flat=True).get(pk=cihaz_id)
+    try:
+        with transaction.atomic():
+            RandevuGunlukOzet.objects.create(
+                tarih=tarih, lab_id=lab_id, cihaz_id=cihaz_id,
+                kullanici_id=kullanici_id, durum=durum, adet=fark,
+            )
+    except IntegrityError:
+        # Eşzamanlı başka bir kayıt satırı az önce oluşturdu.
+        satirlar.update(adet=F("adet") + fark)
+
+
+def ozet_degisikligi_uygula(eski, yeni, lab_id=None):
+    """Bir randevunun özet anahtarı `eski`den `yeni`ye geçti (None = yok)."""
+    if eski == yeni:
+        return
+    if eski is not None:
+        _artir(eski, -1)
+    if yeni is not None:
+        _artir(yeni, 1, lab_id)
+
+
+def _yeniden_kur(kaynak, hedef):
+    # Gruplama ve yazma veritabanında tek INSERT ... SELECT ile yapılır;
+    # satırlar Python'a hiç gelmez (milyonlarca randevuda da tek sorgu).
+    gruplar = (
+        kaynak.values_list("tarih", "cihaz__lab_id", "cihaz_id", "kullanici_id", "durum")
+        .annotate(adet=Count("id"))
+        .order_by()
+    )
+    secim, parametreler = gruplar.query.sql_with_params()
+    qn = connection.ops.quote_name
+    kolonlar = ", ".join(
+        qn(RandevuGunlukOzet._meta.get_field(alan).column)
+        for alan in ("tarih", "lab", "cihaz", "kullanici", "durum", "adet")
+    )
+    with transaction.atomic():
+        hedef.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {qn(RandevuGunlukOzet._meta.db_table)} ({kolonlar}) {secim}", parametreler
+            )
+            return cursor.rowcount
+
+
+def ozet_gunlerini_yeniden_hesapla(tarihler):
+    """Verilen günlerin özet satırlarını Randevu'dan set tabanlı yeniden kurar.
+
+    Dönüş: yazılan özet satırı sayısı.
+    """
+    tarihler = set(tarihler)
+    if not tarihler:
+        return 0
+    return _yeniden_kur(
+        Randevu.objects.filter(tarih__in=tarihler),
+        RandevuGunlukOzet.objects.filter(tarih__in=tarihler),
+    )
+
+
+def ozet_yeniden_olustur(baslangic=None, bitis=None):
+    """[baslangic, bitis] (ikisi de dahil, None = sınırsız) aralığını yeniden kurar."""
+    filtre = {}
+    if baslangic is not None:
+        filtre["tarih__gte"] = baslangic
+    if bitis is not None:
+        filtre["tarih__lte"] = bitis
+    return _yeniden_kur(
+        Randevu.objects.filter(**filtre),
+        RandevuGunlukOzet.objects.filter(**filtre),
+    )
@@ -0,0 +1,243 @@
+# TURKCE ARAMA: pdf rapor kuyrugu, arka plan pdf, process pool, rapor onbellegi,
+# icerik ozeti (hash), pdf durum sorgulama
+#
+# `randevu_pdf_indir` PDF'i istek icinde uretmez. Kullanicinin rapor verisi
+# TEK sorguyla okunur ve icerigi bir SHA-256 ozetiyle anahtarlanir:
+#   MEDIA_ROOT/raporlar/<kullanici_id>/<ozet>.pdf
+# Dosya varsa dogrudan sunulur; yoksa uretim bir surec havuzuna
+# (ProcessPoolExecutor) verilir ve kullaniciya bekleme sayfasi doner. Sayfa
+# `randevu_pdf_durum` ile yoklar, dosya hazir olunca indirir.
+#
+# Isci surecleri veritabanina DOKUNMAZ: sablon, istekte hazirlanan duz veri
+# (dict) ile cizilir. Surecler arasi paylasilan tek durum dosya sistemidir:
+#   <ozet>.pdf        hazir rapor (gecici dosyadan os.replace ile atomik)
+#   <ozet>.isleniyor  uretim suruyor (O_EXCL ile olusturulur; ayni rapor iki
+#                     WSGI sureci tarafindan iki kez kuyruga alinmaz)
+#   <ozet>.hata       uretim basarisiz
+#
+# PDF_RAPOR_ISCI_SAYISI = 0 ise havuz kullanilmaz, PDF istek icinde uretilir
+# (testler ve havuz acilamayan ortamlar icin).
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Sablon ya da rapor duzeni degistiginde artirilir; eski dosyalar gecersiz olur.
+PDF_RAPOR_SURUMU = 1
+# "isleniyor" isareti bu sureden eskiyse (cokmus isci) rapor yeniden kuyruga alinir.
+PDF_RAPOR_ZAMAN_ASIMI_SANIYE = 600
+
+ANAHTAR_DESENI = re.compile(r"^[0-9a-f]{64}$")
+
+HAZIR = "hazir"
+HAZIRLANIYOR = "hazirlaniyor"
+HATA = "hata"
+YOK = "yok"
+
+_havuz = None
+_havuz_kilidi = threading.Lock()
+
+
+def _isci_sayisi():
+    # Ayar cagri aninda okunur; testler override_settings ile 0 verebilir.
+    return getattr(settings, "PDF_RAPOR_ISCI_SAYISI", 2)
+
+
+def rapor_dizini(kullanici_id):
+    return os.path.join(str(settings.MEDIA_ROOT), "raporlar", str(kullanici_id))
+
+
+def _yol(kullanici_id, anahtar, uzanti):
+    return os.path.join(rapor_dizini(kullanici_id), f"{anahtar}.{uzanti}")
+
+
+def rapor_yolu(kullanici_id, anahtar):
+    return _yol(kullanici_id, anahtar, "pdf")
+
+
+def rapor_verisi(kullanici):
+    """Rapor sablonunun ihtiyac duydugu veriyi TEK sorguda duz dict olarak toplar.
+
+    Donus: (context, anahtar). Anahtar, icerigin SHA-256 ozetidir; rapora
+    yansiyan herhangi bir alan degisirse yeni bir dosya uretilir.
+    """
+    # Model importu burada: bu modul spawn/forkserver ile baslayan isci
+    # sureclerinde django.setup()'tan once import edilir.
+    from .models import Randevu
+
+    satirlar = list(
+        Randevu.objects
+        .filter(kullanici=kullanici)
+        .order_by("tarih", "baslangic_saati")
+        .values_list("tarih", "baslangic_saati", "bitis_saati", "durum", "cihaz__isim", "cihaz__lab__isim")
+    )
+    kullanici_verisi = {
+        "id": kullanici.id,
+        "username": kullanici.username,
+        "first_name": kullanici.first_name,
+        "last_name": kullanici.last_name,
+        "email": kullanici.email,
+    }
+    randevular = [
+        {
+            "tarih": tarih,
+            "baslangic_saati": baslangic,
+            "bitis_saati": bitis,
+            "durum": durum,
+            "cihaz": {"isim": cihaz_isim, "lab": {"isim": lab_isim}},
+        }
+        for tarih, baslangic, bitis, durum, cihaz_isim, lab_isim in satirlar
+    ]
+    ozet = hashlib.sha256(
+        json.dumps([PDF_RAPOR_SURUMU, kullanici_verisi, satirlar], default=str).encode("utf-8")
+    ).hexdigest()
+    return {"user": kullanici_verisi, "randevular": randevular}, ozet
+
+
+def _django_hazirla():
+    # spawn ile baslayan (Windows) isci sureclerinde Django kurulmamistir.
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def pdf_dosyasi_uret(context, hedef):
+    """PDF'i uretip `hedef` yoluna atomik olarak yazar. Isci surecinde calisir."""
+    from xhtml2pdf import pisa
+    from django.template.loader import get_template
+
+    from .utils import link_callback, pdf_varliklarini_hazirla
+
+    pdf_varliklarini_hazirla()
+    html = get_template("randevu_pdf.html").render(context)
+    gecici = f"{hedef}.{os.getpid()}.tmp"
+    try:
+        with open(gecici, "wb") as cikti:
+            sonuc = pisa.CreatePDF(src=html, dest=cikti, link_callback=link_callback, encoding="UTF-8")
+        if sonuc.err:
+            raise RuntimeError(f"xhtml2pdf {sonuc.err} hata bildirdi")
+        os.replace(gecici, hedef)
+    finally:
+        if os.path.exists(gecici):
+            os.remove(gecici)
+    return hedef
+
+
+def _havuza_gonder(*args):
+    """Isi surec havuzuna verir; cokmus (broken) havuz bir kez yeniden kurulur."""
+    global _havuz
+    with _havuz_kilidi:
+        for deneme in range(2):
+            if _havuz is None:
+                _havuz = ProcessPoolExecutor(max_workers=_isci_sayisi(), initializer=_django_hazirla)
+            try:
+                return _havuz.submit(*args)
+            except BrokenProcessPool:
+                _havuz = None
+                if deneme:
+                    raise
+
+
+def _isareti_al(isaret):
+    """`isleniyor` isaretini atomik olarak alir; zaman asimina ugramissa devralir."""
+    try:
+        os.close(os.open(isaret, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(isaret) <= PDF_RAPOR_ZAMAN_ASIMI_SANIYE:
+                return False
+            os.utime(isaret)
+            return True
+        except FileNotFoundError:
+            # Is az once bitti; sonuc bir sonraki yoklamada gorulur.
+            return False
+
+
+def _sil(yol):
+    try:
+        os.remove(yol)
+    except FileNotFoundError:
+        pass
+
+
+def _eski_raporlari_temizle(kullanici_id, anahtar):
+    """Kullanicinin icerigi artik guncel olmayan eski raporlarini siler."""
+    dizin = rapor_dizini(kullanici_id)
+    for ad in os.listdir(dizin):
+        if not ad.startswith(anahtar) and not ad.endswith((".isleniyor", ".tmp")):
+            _sil(os.path.join(dizin, ad))
+
+
+def _hata_kaydet(kullanici_id, anahtar, hata):
+    logger.error(f"PDF Rapor Hatası (kullanıcı {kullanici_id}): {hata}")
+    with open(_yol(kullanici_id, anahtar, "hata"), "w", encoding="utf-8") as f:
+        f.write(str(hata))
+
+
+def _is_bitti(kullanici_id, anahtar, gelecek):
+    hata = gelecek.exception()
+    if hata is not None:
+        _hata_kaydet(kullanici_id, anahtar, hata)
+    _sil(_yol(kullanici_id, anahtar, "isleniyor"))
+
+
+def rapor_durumu(kullanici_id, anahtar):
+    if os.path.exists(rapor_yolu(kullanici_id, anahtar)):
+        return HAZIR
+    if os.path.exists(_yol(kullanici_id, anahtar, "isleniyor")):
+        return HAZIRLANIYOR
+    if os.path.exists(_yol(kullanici_id, anahtar, "hata")):
+        return HATA
+    return YOK
+
+
+def rapor_iste(kullanici):
+    """Kullanicinin guncel raporunu hazir hale getirir.
+
+    Donus: (anahtar, durum). Dosya varsa HAZIR; havuz kapaliysa (0 isci) PDF
+    burada uretilir ve HAZIR (ya da HATA) doner; aksi halde is kuyruga alinir ve
+    HAZIRLANIYOR doner.
+    """
+    context, anahtar = rapor_verisi(kullanici)
+    hedef = rapor_yolu(kullanici.id, anahtar)
+    if os.path.exists(hedef):
+        return anahtar, HAZIR
+
+    os.makedirs(rapor_dizini(kullanici.id), exist_ok=True)
+    isaret = _yol(kullanici.id, anahtar, "isleniyor")
+    if not _isareti_al(isaret):
+        return anahtar, HAZIRLANIYOR
+
+    _sil(_yol(kullanici.id, anahtar, "hata"))
+    _eski_raporlari_temizle(kullanici.id, anahtar)
+
+    if _isci_sayisi() <= 0:
+        try:
+            pdf_dosyasi_uret(context, hedef)
+        except Exception as e:
+            _hata_kaydet(kullanici.id, anahtar, e)
+            return anahtar, HATA
+        finally:
+            _sil(isaret)
+        return anahtar, HAZIR
+
+    try:
+        gelecek = _havuza_gonder(pdf_dosyasi_uret, context, hedef)
+    except Exception:
+        _sil(isaret)
+        raise
+    gelecek.add_done_callback(lambda g: _is_bitti(kullanici.id, anahtar, g))
+    return anahtar, HAZIRLANIYOR
@@ -0,0 +1,293 @@
+# TURKCE ARAMA: sentetik veri, sahte veri, yuk testi verisi, bench verisi,
+# toplu olusturma, bulk_create, seed
+#
+# Performans ölçümleri (bench), yerel yük denemeleri ve seed_booklab komutu
+# için yapılandırılabilir boyutta gerçekçi veri üretir. Randevu.save()/
+# clean() ve sinyaller çalışmaz: çakışmasızlık üretim sırasında garanti
+# edilir, günlük özet tablosu en sonda tek sorguyla yeniden kurulur ve
+# önbellek sürümleri/badge sayaçları işlem onaylanınca geçersiz kılınır.
+#
+# Küçük tablolar (lab, cihaz, kullanıcı, profil, duyuru) bulk_create ile
+# partiler halinde yazılır. Hacmin tamamı olan Randevu ve Arıza satırları
+# `_hizli_ekle` ile yazılır; bkz. oradaki not.
+#
+# Aynı `tohum` ve aynı gün için üretilen veri aynıdır; tarihler bugüne
+# göredir (geçmiş `yil` yıl + önümüzdeki GELECEK_GUN gün).
+
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .badge import BADGE_ALANLARI, badge_yeniden_say
+from .models import Ariza, Cihaz, Duyuru, Laboratuvar, Profil, Randevu
+from .onbellek import istatistik_onbellegini_temizle, kapsamlari_artir
+from .ozet import ozet_yeniden_olustur
+from .view_helpers import SLOT_DAKIKA
+
+SENTETIK_ONEK = "sentetik"
+SENTETIK_LAB_ONEK = "Sentetik Lab"
+SENTETIK_SIFRE = "sentetik-sifre-123"
+GELECEK_GUN = 30
+# Randevular bu saatten başlayıp gün içinde art arda dizilir.
+GUN_BASLANGIC_SAATI = 8
+# Randevu süresi ve iki randevu arası boşluk SLOT_DAKIKA'nın katlarıdır.
+SURE_SLOTLARI = (3, 6, 6, 9, 12)
+BOSLUK_SLOTLARI = (0, 0, 1, 3, 6)
+# Randevu, tarihinden bu kadar gün önce alınmış sayılır (1..N).
+EN_ERKEN_ALIM_GUNU = 14
+# Cihazların bu oranının son arızası açıktır (cihaz pasif).
+ACIK_ARIZA_ORANI = 0.1
+# SQLite sayfa önbelleği (KiB) yükleme boyunca büyütülür: varsayılan 2 MB'ta
+# indeks sayfaları diskten tekrar tekrar okunur.
+SQLITE_YUKLEME_ONBELLEGI_KIB = 256 * 1024
+
+_GECMIS_DURUMLAR = (
+    (Randevu.GELDI, 70), (Randevu.GELMEDI, 10), (Randevu.IPTAL, 12), (Randevu.REDDEDILDI, 8),
+)
+_GELECEK_DURUMLAR = (
+    (Randevu.ONAYLANDI, 75), (Randevu.ONAY_BEKLENIYOR, 15), (Randevu.IPTAL, 10),
+)
+_RANDEVU_ALANLARI = (
+    "kullanici", "cihaz", "tarih", "baslangic_saati", "bitis_saati", "durum",
+    "olusturulma_zamani", "guncellenme_zamani",
+)
+_ARIZA_ALANLARI = ("kullanici", "cihaz", "aciklama", "cozuldu_mu", "tarih")
+
+
+def _partiler(kaynak, parti):
+    kaynak = iter(kaynak)
+    while True:
+        dilim = list(islice(kaynak, parti))
+        if not dilim:
+            return
+        yield dilim
+
+
+def _durum_secici(rastgele, agirlikli):
+    durumlar = [d for d, _ in agirlikli]
+    agirliklar = [a for _, a in agirlikli]
+    return lambda: rastgele.choices(durumlar, agirliklar)[0]
+
+
+def _an(gun, saat=12):
+    return timezone.make_aware(datetime.combine(gun, time(saat)))
+
+
+def _hizli_ekle(model, alanlar, satirlar, parti):
+    """`satirlar`ı (alanlar sırasıyla, veritabanı biçimine çevrilmiş demetler)
+    partiler halinde tek INSERT + executemany ile yazar. Dönüş: satır sayısı.
+
+    bulk_create her satır için model örneği kurup SQL'i yeniden derler ve
+    SQLite'ta sorgu başına 999 parametreyle (Randevu için ~110 satır)
+    sınırlıdır; milyonlarca satırda sürenin çoğu buradadır. Ayrıca
+    auto_now_add/auto_now alanlarını ezdiğinden geçmişe ait oluşturulma
+    zamanı yazamaz.
+    """
+    qn = connection.ops.quote_name
+    kolonlar = [qn(model._meta.get_field(alan).column) for alan in alanlar]
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        qn(model._meta.db_table), ", ".join(kolonlar), ", ".join(["%s"] * len(kolonlar)),
+    )
+    adet = 0
+    with connection.cursor() as cursor:
+        for dilim in _partiler(satirlar, parti):
+            cursor.executemany(sql, dilim)
+            adet += len(dilim)
+    return adet
+
+
+@contextmanager
+def _yukleme_ayarlari():
+    if connection.vendor != "sqlite":
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA cache_size")
+        eski = cursor.fetchone()[0]
+        cursor.execute(f"PRAGMA cache_size = -{SQLITE_YUKLEME_ONBELLEGI_KIB}")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA cache_size = {int(eski)}")
+
+
+def laboratuvarlari_olustur(lab_sayisi, cihaz_sayisi):
+    """`lab_sayisi` laboratuvar ve her birine `cihaz_sayisi` cihaz. Dönüş: cihaz listesi."""
+    lablar = Laboratuvar.objects.bulk_create(
+        Laboratuvar(isim=f"{SENTETIK_LAB_ONEK} {i + 1}", aciklama="Sentetik veri") for i in range(lab_sayisi)
+    )
+    return Cihaz.objects.bulk_create(
+        Cihaz(lab=lab, isim=f"{lab.isim} Cihaz {j + 1}", aktif_mi=True)
+        for lab in lablar
+        for j in range(cihaz_sayisi)
+    )
+
+
+def kullanicilari_olustur(kullanici_sayisi, rastgele, pasif_orani=0.1, parti=5000):
+    """Kullanıcıları ve Profil satırlarını oluşturur; ~`pasif_orani` kadarı onay bekler.
+
+    Şifre bir kez hash'lenir ve herkes için aynıdır (SENTETIK_SIFRE).
+    """
+    sifre = make_password(SENTETIK_SIFRE)
+    simdi = timezone.now()
+    kullanicilar = User.objects.bulk_create(
+        (
+            User(
+                username=f"{SENTETIK_ONEK}{i + 1:05d}",
+                email=f"{SENTETIK_ONEK}{i + 1:05d}@example.com",
+                first_name="Sentetik",
+                last_name=f"Kullanıcı {i + 1}",
+                password=sifre,
+                is_active=rastgele.random() >= pasif_orani,
+                date_joined=simdi,
+            )
+            for i in range(kullanici_sayisi)
+        ),
+        batch_size=parti,
+    )
+    Profil.objects.bulk_create(
+        (
+            Profil(
+                user=k,
+                status="aktif_kullanici" if k.is_active else "pasif_kullanici",
+                email_dogrulandi=True,
+                email_dogrulama_tarihi=simdi,
+            )
+            for k in kullanicilar
+        ),
+        batch_size=parti,
+    )
+    return kullanicilar
+
+
+def randevu_uret(cihazlar, kullanici_idleri, baslangic, bitis, gunluk, rastgele):
+    """[baslangic, bitis) günleri için cihaz başına günde en çok `gunluk`
+    randevu satırı üretir (_RANDEVU_ALANLARI sırasıyla, veritabanı biçiminde).
+
+    Bir cihazın gün içindeki randevuları art arda dizildiğinden çakışmaz;
+    saatler SLOT_DAKIKA'ya hizalıdır ve gün sonunu aşmaz.
+    """
+    ops = connection.ops
+    bugun = timezone.localdate()
+    gecmis_durum = _durum_secici(rastgele, _GECMIS_DURUMLAR)
+    gelecek_durum = _durum_secici(rastgele, _GELECEK_DURUMLAR)
+    gun_sonu = 24 * 60
+    # Slot başlangıç saatleri bir kez çevrilir (satır başına dönüşüm yok).
+    saatler = [
+        ops.adapt_timefield_value(time(dakika // 60, dakika % 60))
+        for dakika in range(0, gun_sonu, SLOT_DAKIKA)
+    ]
+    cihaz_idleri = [c.id for c in cihazlar]
+    gun = baslangic
+    while gun < bitis:
+        durum_sec = gecmis_durum if gun < bugun else gelecek_durum
+        tarih = ops.adapt_datefield_value(gun)
+        alim = ops.adapt_datetimefield_value(
+            _an(gun - timedelta(days=rastgele.randint(1, EN_ERKEN_ALIM_GUNU)))
+        )
+        for cihaz_id in cihaz_idleri:
+            dakika = GUN_BASLANGIC_SAATI * 60
+            for _ in range(gunluk):
+                dakika += rastgele.choice(BOSLUK_SLOTLARI) * SLOT_DAKIKA
+                son = dakika + rastgele.choice(SURE_SLOTLARI) * SLOT_DAKIKA
+                if son >= gun_sonu:
+                    break
+                yield (
+                    rastgele.choice(kullanici_idleri), cihaz_id, tarih,
+                    saatler[dakika // SLOT_DAKIKA], saatler[son // SLOT_DAKIKA],
+                    durum_sec(), alim, alim,
+                )
+                dakika = son
+        gun += timedelta(days=1)
+
+
+def ariza_uret(cihazlar, kullanici_idleri, baslangic, adet, rastgele):
+    """Cihaz başına `adet` arıza satırı (_ARIZA_ALANLARI sırasıyla) üretir.
+
+    Arızalar geçmişe yayılır; son arızası açık kalan cihazların id'leri
+    `acik_cihazlar` kümesine eklenir (çağıran bunları pasife çeker).
+    """
+    ops = connection.ops
+    gun_sayisi = max((timezone.localdate() - baslangic).days, 1)
+    acik_cihazlar = set()
+    satirlar = []
+    for cihaz in cihazlar:
+        gunler = sorted(rastgele.randrange(gun_sayisi) for _ in range(adet))
+        acik = adet and rastgele.random() < ACIK_ARIZA_ORANI
+        if acik:
+            acik_cihazlar.add(cihaz.id)
+        for sira, gun in enumerate(gunler, 1):
+            satirlar.append((
+                rastgele.choice(kullanici_idleri), cihaz.id,
+                f"{cihaz.isim}: sentetik arıza bildirimi {sira}",
+                not (acik and sira == adet),
+                ops.adapt_datetimefield_value(_an(baslangic + timedelta(days=gun), saat=rastgele.randint(8, 18))),
+            ))
+    return satirlar, acik_cihazlar
+
+
+def duyurulari_olustur(adet, aktif=2):
+    return Duyuru.objects.bulk_create(
+        Duyuru(
+            baslik=f"Sentetik duyuru {i + 1}",
+            icerik="Yük denemesi için üretilmiş duyuru.",
+            aktif_mi=i >= adet - aktif,
+        )
+        for i in range(adet)
+    )
+
+
+def sentetik_veri_var_mi():
+    return (
+        User.objects.filter(username__startswith=SENTETIK_ONEK).exists()
+        or Laboratuvar.objects.filter(isim__startswith=SENTETIK_LAB_ONEK).exists()
+    )
+
+
+def sentetik_veri_olustur(
+    lab=3, cihaz=3, kullanici=30, yil=1, gunluk=4, ariza=2, duyuru=3, tohum=0, parti=5000,
+):
+    """Laboratuvar, cihaz, kullanıcı (+Profil), `yil` yıllık randevu geçmişi,
+    arıza ve duyuru oluşturur; ardından günlük özet tablosunu yeniden kurar.
+
+    Dönüş: {model adı: oluşturulan satır sayısı}.
+    """
+    rastgele = random.Random(tohum)
+    bugun = timezone.localdate()
+    baslangic = bugun - timedelta(days=365 * yil)
+    with _yukleme_ayarlari(), transaction.atomic():
+        cihazlar = laboratuvarlari_olustur(lab, cihaz)
+        kullanicilar = kullanicilari_olustur(kullanici, rastgele, parti=parti)
+        aktif_idler = [k.id for k in kullanicilar if k.is_active] or [k.id for k in kullanicilar]
+        randevu_sayisi = _hizli_ekle(
+            Randevu, _RANDEVU_ALANLARI,
+            randevu_uret(cihazlar, aktif_idler, baslangic, bugun + timedelta(days=GELECEK_GUN), gunluk, rastgele),
+            parti,
+        )
+        ariza_satirlari, acik_cihazlar = ariza_uret(cihazlar, aktif_idler, baslangic, ariza, rastgele)
+        ariza_sayisi = _hizli_ekle(Ariza, _ARIZA_ALANLARI, ariza_satirlari, parti)
+        Cihaz.objects.filter(id__in=acik_cihazlar).update(aktif_mi=False)
+        duyuru_sayisi = len(duyurulari_olustur(duyuru))
+        ozet_sayisi = ozet_yeniden_olustur()
+
+        # Sinyal çalışmadığından önbellekteki sürümler ve sayaçlar elle düşürülür.
+        kapsamlari_artir(lab_idleri={c.lab_id for c in cihazlar})
+        istatistik_onbellegini_temizle()
+        badge_yeniden_say(*BADGE_ALANLARI)
+    return {
+        "Laboratuvar": lab,
+        "Cihaz": len(cihazlar),
+        "User": len(kullanicilar),
+        "Profil": len(kullanicilar),
+        "Randevu": randevu_sayisi,
+        "Ariza": ariza_sayisi,
+        "Duyuru": duyuru_sayisi,
+        "RandevuGunlukOzet": ozet_sayisi,
+    }
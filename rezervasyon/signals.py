@@ -0,0 +1,255 @@
+# TURKCE ARAMA: sinyaller, signals, onbellek temizleme, post_save, post_delete,
+# veri surumu artirma, badge sayaci farki
+#
+# RezervasyonConfig.ready() içinde yüklenir. Kullanıcı profili oluşturma
+# sinyali models.py içinde durur.
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Ariza, Cihaz, Laboratuvar, Profil, Randevu, RandevuGunlukOzet, SilinenRandevu
+from .badge import badge_degisikligi, badge_yeniden_say
+from .onbellek import istatistik_onbellegini_temizle, kapsamlari_artir, versiyonlari_artir
+from .ozet import ozet_anahtari, ozet_degisikligi_uygula, ozet_gunlerini_yeniden_hesapla
+
+# İstatistik sayfasındaki sayaçları etkileyen modeller.
+ISTATISTIK_MODELLERI = (Randevu, Cihaz, Ariza, Profil, Laboratuvar, User)
+
+
+def _yalniz_giris_kaydi(update_fields):
+    # Girişte Django yalnızca `last_login` yazar; hiçbir önbelleği etkilemez.
+    return update_fields is not None and set(update_fields) <= {"last_login"}
+
+
+def istatistik_onbellegini_gecersiz_kil(sender, update_fields=None, **kwargs):
+    """İstatistiklere giren bir kayıt yazıldığında/silindiğinde önbelleği geçersiz kılar."""
+    if not _yalniz_giris_kaydi(update_fields):
+        istatistik_onbellegini_temizle()
+
+
+for _model in ISTATISTIK_MODELLERI:
+    post_save.connect(
+        istatistik_onbellegini_gecersiz_kil, sender=_model,
+        dispatch_uid=f"istatistik_kayit_{_model._meta.label_lower}",
+    )
+    post_delete.connect(
+        istatistik_onbellegini_gecersiz_kil, sender=_model,
+        dispatch_uid=f"istatistik_silme_{_model._meta.label_lower}",
+    )
+
+
+# --- Yüklenen randevu değerleri ---
+
+@receiver(post_init, sender=Randevu, dispatch_uid="randevu_eski_degerler")
+def randevu_eski_degerleri_sakla(sender, instance, **kwargs):
+    """Özet, sürüm sayacı ve badge farkları için yüklenen değerleri tek
+    geçişte saklar (her randevu yüklemesinde çalışır, sorgu atmaz)."""
+    degerler = instance.__dict__
+    instance._eski_cihaz_id = degerler.get("cihaz_id")
+    instance._eski_kullanici_id = degerler.get("kullanici_id")
+    if instance.pk:
+        instance._eski_durum = degerler.get("durum")
+        instance._ozet_anahtari = ozet_anahtari(instance)
+    else:
+        instance._eski_durum = instance._ozet_anahtari = None
+
+
+# --- RandevuGunlukOzet artımlı bakımı ---
+
+@receiver(post_save, sender=Randevu, dispatch_uid="ozet_kayit")
+def ozet_kayit(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        # Fixture yüklemesi: özet `ozet_yeniden_olustur` ile kurulur.
+        return
+    yeni = ozet_anahtari(instance)
+    eski = None if created else instance._ozet_anahtari
+    if yeni is None or (eski is None and not created):
+        # Ertelenmiş alanlarla yüklenip kaydedilmiş; farkı bilemeyiz, günü yeniden kur.
+        ozet_gunlerini_yeniden_hesapla({instance.tarih} | ({eski[0]} if eski else set()))
+    else:
+        lab_id = instance.cihaz.lab_id if Randevu.cihaz.is_cached(instance) else None
+        ozet_degisikligi_uygula(eski, yeni, lab_id)
+    instance._ozet_anahtari = ozet_anahtari(instance)
+
+
+@receiver(post_delete, sender=Randevu, dispatch_uid="ozet_silme")
+def ozet_silme(sender, instance, **kwargs):
+    eski = instance._ozet_anahtari or ozet_anahtari(instance)
+    if eski is None:
+        ozet_gunlerini_yeniden_hesapla([instance.tarih])
+    else:
+        ozet_degisikligi_uygula(eski, None)
+
+
+# --- Artımlı takvim için silinen randevu izleri ---
+
+@receiver(post_delete, sender=Randevu, dispatch_uid="silinen_randevu_izi")
+def silinen_randevu_izi(sender, instance, **kwargs):
+    """Silinen randevuyu `SilinenRandevu`'ya yazar; saklama süresini aşan izleri siler."""
+    cihaz = instance.cihaz if Randevu.cihaz.is_cached(instance) else None
+    if cihaz is not None and "lab_id" in cihaz.__dict__:
+        lab_id = cihaz.lab_id
+    else:
+        lab_id = Cihaz.objects.filter(pk=instance.cihaz_id).values_list("lab_id", flat=True).first()
+    simdi = timezone.now()
+    SilinenRandevu.objects.filter(silinme_zamani__lt=simdi - timedelta(days=SilinenRandevu.SAKLAMA_GUN)).delete()
+    if lab_id is not None:
+        SilinenRandevu.objects.create(
+            randevu_id=instance.pk, lab_id=lab_id, tarih=instance.tarih, silinme_zamani=simdi,
+        )
+
+
+@receiver(post_save, sender=Cihaz, dispatch_uid="ozet_cihaz_lab")
+def ozet_cihaz_lab_esitle(sender, instance, raw=False, **kwargs):
+    """Cihaz başka laboratuvara taşınırsa özet satırlarının lab'ı da taşınır."""
+    if not raw:
+        RandevuGunlukOzet.objects.filter(cihaz=instance).exclude(lab_id=instance.lab_id).update(
+            lab_id=instance.lab_id
+        )
+
+
+# --- Veri sürüm sayaçları (takvim ETag'i, sayfa önbellekleri; bkz. onbellek.py) ---
+
+@receiver(post_save, sender=Randevu, dispatch_uid="versiyon_randevu_kayit")
+@receiver(post_delete, sender=Randevu, dispatch_uid="versiyon_randevu_silme")
+def randevu_versiyonu_artir(sender, instance, **kwargs):
+    """Randevunun cihaz, laboratuvar ve kullanıcı sayaçlarını (değiştiyse
+    eskilerini de) artırır."""
+    cihaz_idleri = {instance.cihaz_id, instance._eski_cihaz_id} - {None}
+    cihaz = instance.cihaz if Randevu.cihaz.is_cached(instance) else None
+    if cihaz is not None and cihaz_idleri == {cihaz.pk} and "lab_id" in cihaz.__dict__:
+        lab_idleri = {cihaz.lab_id}
+    else:
+        lab_idleri = Cihaz.objects.filter(pk__in=cihaz_idleri).values_list("lab_id", flat=True)
+    kapsamlari_artir(
+        lab_idleri=lab_idleri,
+        cihaz_idleri=cihaz_idleri,
+        kullanici_idleri={instance.kullanici_id, instance._eski_kullanici_id},
+    )
+    instance._eski_cihaz_id = instance.cihaz_id
+    instance._eski_kullanici_id = instance.kullanici_id
+
+
+@receiver(post_init, sender=Cihaz, dispatch_uid="versiyon_cihaz_eski_lab")
+def cihaz_eski_labi_sakla(sender, instance, **kwargs):
+    instance._eski_lab_id = instance.__dict__.get("lab_id")
+
+
+@receiver(post_save, sender=Cihaz, dispatch_uid="versiyon_cihaz_kayit")
+@receiver(post_delete, sender=Cihaz, dispatch_uid="versiyon_cihaz_silme")
+def cihaz_versiyonu_artir(sender, instance, **kwargs):
+    kapsamlari_artir(lab_idleri={instance.lab_id, instance._eski_lab_id}, cihaz_idleri={instance.pk})
+    versiyonlari_artir("katalog")
+    instance._eski_lab_id = instance.lab_id
+
+
+@receiver(post_save, sender=Ariza, dispatch_uid="versiyon_ariza_kayit")
+@receiver(post_delete, sender=Ariza, dispatch_uid="versiyon_ariza_silme")
+def ariza_versiyonu_artir(sender, instance, **kwargs):
+    cihaz = instance.cihaz if Ariza.cihaz.is_cached(instance) else None
+    if cihaz is not None and "lab_id" in cihaz.__dict__:
+        lab_idleri = {cihaz.lab_id}
+    else:
+        lab_idleri = Cihaz.objects.filter(pk=instance.cihaz_id).values_list("lab_id", flat=True)
+    kapsamlari_artir(lab_idleri=lab_idleri, cihaz_idleri={instance.cihaz_id})
+
+
+@receiver(post_save, sender=Laboratuvar, dispatch_uid="versiyon_lab_kayit")
+@receiver(post_delete, sender=Laboratuvar, dispatch_uid="versiyon_lab_silme")
+def lab_versiyonu_artir(sender, instance, **kwargs):
+    kapsamlari_artir(lab_idleri={instance.pk})
+    versiyonlari_artir("katalog")
+
+
+@receiver(post_save, sender=User, dispatch_uid="versiyon_kullanici_kayit")
+def kullanici_versiyonu_artir(sender, instance, created, update_fields=None, **kwargs):
+    if created or _yalniz_giris_kaydi(update_fields):
+        return
+    kapsamlari_artir(kullanici_idleri={instance.pk})
+    if update_fields is None or "username" in update_fields:
+        # Takvimler ve gün programı kullanıcı adını gösterir.
+        versiyonlari_artir("genel")
+
+
+@receiver(post_save, sender=Profil, dispatch_uid="versiyon_profil_kayit")
+def profil_versiyonu_artir(sender, instance, **kwargs):
+    kapsamlari_artir(kullanici_idleri={instance.user_id})
+
+
+# --- Yönetim badge sayaçları (artımlı; bkz. badge.py) ---
+
+def _badge_farki(eski, yeni, sayilir):
+    """Tek kaydın sayaca katkısındaki değişim (-1, 0, +1)."""
+    return int(sayilir(yeni)) - int(sayilir(eski))
+
+
+@receiver(post_save, sender=Randevu, dispatch_uid="badge_randevu_kayit")
+def badge_randevu_kayit(sender, instance, created, **kwargs):
+    yeni = instance.__dict__.get("durum")
+    if not created and (instance._eski_durum is None or yeni is None):
+        # Durum ertelenmiş alanla yüklenmiş; farkı bilemeyiz.
+        badge_yeniden_say("bekleyen_randevu")
+    else:
+        badge_degisikligi(bekleyen_randevu=_badge_farki(
+            None if created else instance._eski_durum, yeni, lambda d: d == Randevu.ONAY_BEKLENIYOR,
+        ))
+    instance._eski_durum = yeni
+
+
+@receiver(post_delete, sender=Randevu, dispatch_uid="badge_randevu_silme")
+def badge_randevu_silme(sender, instance, **kwargs):
+    durum = instance.__dict__.get("durum", instance._eski_durum)
+    if durum is None:
+        badge_yeniden_say("bekleyen_randevu")
+    elif durum == Randevu.ONAY_BEKLENIYOR:
+        badge_degisikligi(bekleyen_randevu=-1)
+
+
+@receiver(post_init, sender=Ariza, dispatch_uid="badge_ariza_eski_durum")
+def ariza_eski_durumu_sakla(sender, instance, **kwargs):
+    instance._eski_cozuldu_mu = instance.__dict__.get("cozuldu_mu") if instance.pk else None
+
+
+@receiver(post_save, sender=Ariza, dispatch_uid="badge_ariza_kayit")
+def badge_ariza_kayit(sender, instance, created, **kwargs):
+    if not created and instance._eski_cozuldu_mu is None:
+        badge_yeniden_say("acik_ariza")
+    else:
+        badge_degisikligi(acik_ariza=_badge_farki(
+            None if created else instance._eski_cozuldu_mu, instance.cozuldu_mu, lambda c: c is False,
+        ))
+    instance._eski_cozuldu_mu = instance.cozuldu_mu
+
+
+@receiver(post_delete, sender=Ariza, dispatch_uid="badge_ariza_silme")
+def badge_ariza_silme(sender, instance, **kwargs):
+    if instance.__dict__.get("cozuldu_mu") is False:
+        badge_degisikligi(acik_ariza=-1)
+
+
+@receiver(post_init, sender=User, dispatch_uid="badge_kullanici_eski_durum")
+def kullanici_eski_durumu_sakla(sender, instance, **kwargs):
+    instance._eski_is_active = instance.__dict__.get("is_active") if instance.pk else None
+
+
+@receiver(post_save, sender=User, dispatch_uid="badge_kullanici_kayit")
+def badge_kullanici_kayit(sender, instance, created, update_fields=None, **kwargs):
+    if _yalniz_giris_kaydi(update_fields):
+        return
+    if not created and instance._eski_is_active is None:
+        badge_yeniden_say("pasif_ogrenci")
+    else:
+        badge_degisikligi(pasif_ogrenci=_badge_farki(
+            None if created else instance._eski_is_active, instance.is_active, lambda a: a is False,
+        ))
+    instance._eski_is_active = instance.is_active
+
+
+@receiver(post_delete, sender=User, dispatch_uid="badge_kullanici_silme")
+def badge_kullanici_silme(sender, instance, **kwargs):
+    if instance.__dict__.get("is_active") is False:
+        badge_degisikligi(pasif_ogrenci=-1)
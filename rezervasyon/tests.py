@@ -1,13 +1,55 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from io import StringIO
 from datetime import date, datetime, time, timedelta
+from unittest import mock, skipUnless
 
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.admin import site as admin_site
 from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.base import BaseEmailBackend
 from django.core.exceptions import ValidationError
-from django.test import TestCase, override_settings
-from django.urls import reverse
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.signals import post_init
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, reverse
 from django.utils import timezone
+from reportlab.pdfbase import pdfmetrics
 
-from .models import Cihaz, Laboratuvar, Randevu
-from .view_helpers import otomatik_geldi_isaretle, saat_yuvarla
+from lab_sistemi import urls as proje_urls
+
+from .doluluk import GUN_SLOT_SAYISI, AralikIndeksi, GunDolulugu, doluluklari_yukle
+from . import eposta, pdf_rapor, utils, views, views_management
+from .admin_laboratuvar import CihazAdmin, LaboratuvarAdmin
+from .backends import EmailOrUsernameModelBackend
+from .badge import abadge_sayaclari, abadge_surumu, badge_sayaclari
+from .management.commands import bench
+from .models import (
+    Ariza, Cihaz, Duyuru, EpostaKuyrugu, Laboratuvar, Profil, Randevu, RandevuGunlukOzet, SilinenRandevu,
+    cihaz_kilidi,
+)
+from .onbellek import onbellek_kontrolu, onbellek_paylasimli_mi, versiyon, versiyonlar
+from .sentetik_veri import sentetik_veri_olustur
+from .view_helpers import (
+    SLOT_DAKIKA,
+    acik_arizalari_coz,
+    otomatik_geldi_isaretle,
+    randevu_olustur,
+    randevulari_toplu_guncelle,
+    saat_yuvarla,
+)
 
 
 class RandevuKurallariTestleri(TestCase):
@@ -165,6 +207,81 @@ class IsKuraliTestleri(TestCase):
         r.refresh_from_db()
         self.assertEqual(r.durum, Randevu.ONAYLANDI)
 
+    def test_otomatik_geldi_tek_update_sorgusu(self):
+        gecmis = (timezone.now() - timedelta(days=5)).date()
+        for saat in (9, 11, 13):
+            Randevu.objects.create(
+                kullanici=self.user, cihaz=self.cihaz, tarih=gecmis,
+                baslangic_saati=time(saat, 0), bitis_saati=time(saat, 30),
+            )
+        # Randevular tek UPDATE ile güncellenir; özet tablosu etkilenen gün
+        # için tek INSERT ... SELECT ile yeniden kurulur (satır başına sorgu yok).
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(otomatik_geldi_isaretle(), 3)
+        sorgular = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+        self.assertEqual(sum(q.startswith('UPDATE "rezervasyon_randevu"') for q in sorgular), 1)
+        self.assertEqual(sum(q.startswith('INSERT INTO "rezervasyon_randevugunlukozet"') for q in sorgular), 1)
+        self.assertEqual(len(sorgular), 4)
+        self.assertEqual(
+            list(RandevuGunlukOzet.objects.values_list("durum", "adet")), [(Randevu.GELDI, 3)]
+        )
+
+    def test_filigran_onceden_islenmis_gunleri_taramaz(self):
+        eski = (timezone.now() - timedelta(days=10)).date()
+        r = Randevu.objects.create(
+            kullanici=self.user, cihaz=self.cihaz, tarih=eski,
+            baslangic_saati=time(9, 0), bitis_saati=time(10, 0),
+        )
+        # Az önce çalışılmışsa 10 gün önceki gün zaten işlenmiş sayılır
+        self.assertEqual(otomatik_geldi_isaretle(son_calisma=timezone.now()), 0)
+        self.assertEqual(otomatik_geldi_isaretle(), 1)
+        r.refresh_from_db()
+        self.assertEqual(r.durum, Randevu.GELDI)
+
+    def test_dongude_gec_onaylanan_eski_randevu_isaretlenir(self):
+        eski = (timezone.now() - timedelta(days=10)).date()
+        r = Randevu.objects.create(
+            kullanici=self.user, cihaz=self.cihaz, tarih=eski,
+            baslangic_saati=time(9, 0), bitis_saati=time(10, 0), durum=Randevu.ONAY_BEKLENIYOR,
+        )
+        toplu = Randevu.objects.create(
+            kullanici=self.user, cihaz=self.cihaz, tarih=eski,
+            baslangic_saati=time(11, 0), bitis_saati=time(12, 0), durum=Randevu.IPTAL,
+        )
+        turlar = []
+
+        def bekle(_):
+            turlar.append(Randevu.objects.get(pk=r.pk).durum)
+            if len(turlar) == 1:
+                # İki tur arasında: yönetici eski randevuyu onaylar, diğeri
+                # toplu işlemle "onaylandi"ya geri alınır.
+                r.durum = Randevu.ONAYLANDI
+                r.save()
+                randevulari_toplu_guncelle(Randevu.objects.filter(pk=toplu.pk), durum=Randevu.ONAYLANDI)
+            else:
+                raise KeyboardInterrupt
+
+        komut = "rezervasyon.management.commands.otomatik_geldi"
+        # close_old_connections test işleminin bağlantısını kapatmasın.
+        with mock.patch(f"{komut}.time.sleep", side_effect=bekle), \
+                mock.patch(f"{komut}.close_old_connections"):
+            call_command("otomatik_geldi", dongu=True, aralik=1, stdout=StringIO())
+        self.assertEqual(turlar, [Randevu.ONAY_BEKLENIYOR, Randevu.GELDI])
+        toplu.refresh_from_db()
+        self.assertEqual(toplu.durum, Randevu.GELDI)
+
+    def test_liste_sayfasi_durum_guncellemez(self):
+        gecmis = (timezone.now() - timedelta(hours=72)).date()
+        r = Randevu.objects.create(
+            kullanici=self.user, cihaz=self.cihaz, tarih=gecmis,
+            baslangic_saati=time(9, 0), bitis_saati=time(10, 0),
+        )
+        self.client.force_login(self.user)
+        self.client.get(reverse("randevularim"))
+        r.refresh_from_db()
+        # Otomatik geldi işi artık istek yolunda değil, zamanlanmış komutta
+        self.assertEqual(r.durum, Randevu.ONAYLANDI)
+
     def test_saat_yuvarla_en_yakin_10a_yuvarlar(self):
         self.assertEqual(saat_yuvarla(datetime(2026, 1, 1, 9, 7)).time(), time(9, 10))
         self.assertEqual(saat_yuvarla(datetime(2026, 1, 1, 9, 4)).time(), time(9, 0))
@@ -225,3 +342,1410 @@ class TopluRandevuTestleri(TestCase):
         })
         # Toplam 2 randevu: 1 önceden + 1 yeni (10:00-10:20); çakışan aralık atlandı
         self.assertEqual(Randevu.objects.filter(cihaz=self.cihaz, tarih=self.ileri).count(), 2)
+
+    def test_secim_icinde_cakisan_araliklar_atlanir(self):
+        self.client.force_login(self.admin)
+        self.client.post("/yonetim/toplu-randevu/", {
+            "cihaz": self.cihaz.id,
+            "tarih": self.ileri,
+            "kullanici": self.hedef.id,
+            "aralik": ["09:00-09:30", "09:20-09:40"],  # ikincisi birinciyle çakışır
+        })
+        self.assertEqual(Randevu.objects.filter(cihaz=self.cihaz, tarih=self.ileri).count(), 1)
+
+    def test_secim_tek_okumayla_dakika_hassasiyetinde_dogrulanir(self):
+        Randevu.objects.create(
+            kullanici=self.hedef, cihaz=self.cihaz, tarih=self.ileri,
+            baslangic_saati=time(9, 5), bitis_saati=time(9, 25), durum=Randevu.ONAYLANDI,
+        )
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post("/yonetim/toplu-randevu/", {
+                "cihaz": self.cihaz.id,
+                "tarih": self.ileri,
+                "kullanici": self.hedef.id,
+                "aralik": ["09:00-09:10", "09:20-09:30", "09:30-09:40", "09:30-09:50", "11:00-11:20"],
+            })
+        randevu_okumalari = [
+            q for q in ctx.captured_queries
+            if q["sql"].startswith("SELECT") and 'FROM "rezervasyon_randevu" ' in q["sql"]
+        ]
+        self.assertEqual(len(randevu_okumalari), 1)
+        self.assertEqual(
+            list(Randevu.objects.filter(cihaz=self.cihaz, tarih=self.ileri)
+                 .order_by("baslangic_saati").values_list("baslangic_saati", "bitis_saati")),
+            [(time(9, 5), time(9, 25)), (time(9, 30), time(9, 40)), (time(11, 0), time(11, 20))],
+        )
+
+
+class AralikIndeksiTestleri(TestCase):
+    def test_cakisma_sorgulari(self):
+        indeks = AralikIndeksi([(time(9, 0), time(10, 0)), (time(9, 30), time(10, 30)), (time(12, 0), time(13, 0))])
+        # Örtüşen ilk iki kayıt 09:00-10:30 olarak birleşir
+        self.assertEqual(len(indeks), 2)
+        self.assertTrue(indeks.cakisiyor_mu(time(10, 20), time(10, 40)))
+        self.assertTrue(indeks.cakisiyor_mu(time(8, 0), time(14, 0)))
+        self.assertFalse(indeks.cakisiyor_mu(time(10, 30), time(12, 0)))  # uç uca temas çakışma değil
+        self.assertFalse(indeks.cakisiyor_mu(time(8, 0), time(9, 0)))
+
+    def test_toplu_dogrula_tek_sorgu(self):
+        user = User.objects.create_user(username="u", password="x")
+        cihaz = Cihaz.objects.create(lab=Laboratuvar.objects.create(isim="L"), isim="C")
+        Randevu.objects.create(
+            kullanici=user, cihaz=cihaz, tarih=date(2026, 6, 1),
+            baslangic_saati=time(10, 0), bitis_saati=time(11, 0),
+        )
+        with self.assertNumQueries(1):
+            indeks = AralikIndeksi.yukle(cihaz, date(2026, 6, 1))
+            sonuc = indeks.toplu_dogrula([
+                (time(9, 0), time(10, 0)),
+                (time(10, 50), time(11, 10)),
+                (time(11, 0), time(11, 30)),
+                (time(11, 20), time(11, 40)),
+            ])
+        self.assertEqual(sonuc, [True, False, True, False])
+
+
+class GunDoluluguTestleri(TestCase):
+    def test_hizasiz_randevu_dokundugu_slotlari_doldurur(self):
+        doluluk = GunDolulugu([(time(9, 5), time(9, 25)), (time(23, 40), time(0, 0))])
+        # 09:05-09:25 => 09:00, 09:10, 09:20 slotları dolu
+        self.assertEqual([s for s in range(GUN_SLOT_SAYISI) if doluluk.dolu_mu(s)], [54, 55, 56, 142, 143])
+        self.assertTrue(doluluk.cakisiyor_mu(time(9, 20), time(9, 30)))
+        self.assertFalse(doluluk.cakisiyor_mu(time(9, 30), time(10, 0)))
+        self.assertEqual(doluluk.dolu_slot_sayisi(), 5)
+
+    def test_bos_baslangiclar(self):
+        doluluk = GunDolulugu([(time(9, 0), time(9, 30)), (time(10, 0), time(10, 10))])
+        # 08:30-11:00 penceresinde 30 dk'lık (3 slot) boş başlangıçlar
+        baslangiclar = doluluk.bos_baslangiclar(3, ilk_slot=51, son_slot=66)
+        self.assertEqual(
+            [GunDolulugu.slot_saati(s) for s in baslangiclar],
+            [time(8, 30), time(9, 30), time(10, 10), time(10, 20), time(10, 30)],
+        )
+        self.assertEqual(doluluk.bos_baslangiclar(4, ilk_slot=57, son_slot=60), [])
+
+    def test_coklu_cihaz_ve_gun_tek_sorgu(self):
+        user = User.objects.create_user(username="u", password="x")
+        lab = Laboratuvar.objects.create(isim="L")
+        c1 = Cihaz.objects.create(lab=lab, isim="C1")
+        c2 = Cihaz.objects.create(lab=lab, isim="C2")
+        for cihaz, gun in ((c1, 1), (c2, 2)):
+            Randevu.objects.create(
+                kullanici=user, cihaz=cihaz, tarih=date(2026, 6, gun),
+                baslangic_saati=time(10, 0), bitis_saati=time(11, 0),
+            )
+        with self.assertNumQueries(1):
+            doluluklar = doluluklari_yukle([c1, c2], date(2026, 6, 1), date(2026, 6, 3))
+        self.assertEqual(doluluklar[(c1.id, date(2026, 6, 1))].dolu_slot_sayisi(), 6)
+        self.assertEqual(doluluklar[(c2.id, date(2026, 6, 2))].dolu_slot_sayisi(), 6)
+        self.assertEqual(doluluklar[(c1.id, date(2026, 6, 3))].dolu_slot_sayisi(), 0)
+
+class TakvimApiTestleri(TestCase):
+    """Event API'lerinin tarih penceresi ve artımlı (updated_since) davranışı."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="ogrenci", password="x")
+        self.lab = Laboratuvar.objects.create(isim="Lab")
+        self.cihaz = Cihaz.objects.create(lab=self.lab, isim="Cihaz")
+        self.haziran = Randevu.objects.create(
+            kullanici=self.user, cihaz=self.cihaz, tarih=date(2026, 6, 10),
+            baslangic_saati=time(10, 0), bitis_saati=time(11, 0),
+        )
+        self.temmuz = Randevu.objects.create(
+            kullanici=self.user, cihaz=self.cihaz, tarih=date(2026, 7, 10),
+            baslangic_saati=time(10, 0), bitis_saati=time(11, 0),
+        )
+        self.client.force_login(self.user)
+
+    def test_yalnizca_penceredeki_randevular_doner(self):
+        pencere = {"start": "2026-06-01T00:00:00+03:00", "end": "2026-07-01T00:00:00+03:00"}
+        for url in ("/api/tum-randevular/", f"/api/lab/{self.lab.id}/events/"):
+            data = self.client.get(url, pencere).json()
+            self.assertEqual([e["id"] for e in data], [self.haziran.id])
+
+    def _kayitlari_eskit(self, **sure):
+        # Kurulumdaki kayıtları imleç payının dışına (geçmişe) taşır.
+        Randevu.objects.update(guncellenme_zamani=timezone.now() - timedelta(**sure))
+
+    def test_updated_since_yalnizca_degisenleri_dondurur(self):
+        pencere = {"start": "2026-06-01", "end": "2026-08-01"}
+        self._kayitlari_eskit(hours=1)
+        ilk = self.client.get("/api/tum-randevular/", pencere)
+        imlec = ilk["X-Updated-Until"]
+
+        self.temmuz.durum = Randevu.IPTAL
+        self.temmuz.save()
+
+        data = self.client.get("/api/tum-randevular/", {**pencere, "updated_since": imlec}).json()
+        self.assertEqual([e["id"] for e in data], [self.temmuz.id])
+        # İptal edilen kayıt da döner ki istemci takvimden kaldırabilsin
+        self.assertFalse(data[0]["extendedProps"]["aktif"])
+
+    def test_imlecten_once_damgalanip_gec_gorunen_kayit_kacmaz(self):
+        # Uzun bir işlem kaydı imleçten 30 sn önce damgalayıp imleç verildikten
+        # sonra onaylamış gibi: pay sayesinde sonraki artımlı istekte gelir.
+        pencere = {"start": "2026-06-01", "end": "2026-08-01"}
+        self._kayitlari_eskit(hours=1)
+        imlec = self.client.get("/api/tum-randevular/", pencere)["X-Updated-Until"]
+        Randevu.objects.filter(pk=self.temmuz.pk).update(
+            guncellenme_zamani=datetime.fromisoformat(imlec) - timedelta(seconds=30)
+        )
+        data = self.client.get("/api/tum-randevular/", {**pencere, "updated_since": imlec}).json()
+        self.assertEqual([e["id"] for e in data], [self.temmuz.id])
+
+    def test_silinen_randevu_iz_olarak_doner(self):
+        pencere = {"start": "2026-06-01", "end": "2026-08-01"}
+        diger_lab = Laboratuvar.objects.create(isim="Diğer")
+        self._kayitlari_eskit(hours=1)
+        imlec = self.client.get("/api/tum-randevular/", pencere)["X-Updated-Until"]
+        silinen_id = self.temmuz.id
+        self.temmuz.delete()
+
+        for url in ("/api/tum-randevular/", f"/api/lab/{self.lab.id}/events/"):
+            data = self.client.get(url, {**pencere, "updated_since": imlec}).json()
+            self.assertEqual(data, [{"id": silinen_id, "extendedProps": {"aktif": False, "silindi": True}}])
+        data = self.client.get(f"/api/lab/{diger_lab.id}/events/", {**pencere, "updated_since": imlec}).json()
+        self.assertEqual(data, [])
+
+    def test_saklama_suresinden_eski_imlec_410_dondurur(self):
+        imlec = (timezone.now() - timedelta(days=SilinenRandevu.SAKLAMA_GUN + 1)).isoformat()
+        response = self.client.get("/api/tum-randevular/", {"updated_since": imlec})
+        self.assertEqual(response.status_code, 410)
+
+    def test_gecersiz_pencere_400_dondurur(self):
+        response = self.client.get("/api/tum-randevular/", {"start": "dun", "end": "yarin"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_etag_304_ve_onbellekten_sunum(self):
+        pencere = {"start": "2026-06-01", "end": "2026-08-01"}
+        for url in ("/api/tum-randevular/", f"/api/lab/{self.lab.id}/events/"):
+            ilk = self.client.get(url, pencere)
+            etag = ilk["ETag"]
+            self.assertIn("no-cache", ilk["Cache-Control"])
+
+            cevap = self.client.get(url, pencere, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(cevap.status_code, 304)
+
+            # Tekrar görüntüleme Randevu tablosuna gitmez (yalnız oturum sorguları).
+            with CaptureQueriesContext(connection) as ctx:
+                tekrar = self.client.get(url, pencere)
+            self.assertEqual(tekrar.content, ilk.content)
+            self.assertFalse([q for q in ctx.captured_queries if "rezervasyon_randevu" in q["sql"]])
+
+    def test_randevu_degisince_yalnizca_ilgili_lab_etagi_degisir(self):
+        pencere = {"start": "2026-06-01", "end": "2026-08-01"}
+        diger_lab = Laboratuvar.objects.create(isim="Diğer")
+        url = f"/api/lab/{self.lab.id}/events/"
+        diger_url = f"/api/lab/{diger_lab.id}/events/"
+        etag = self.client.get(url, pencere)["ETag"]
+        diger_etag = self.client.get(diger_url, pencere)["ETag"]
+        genel_etag = self.client.get("/api/tum-randevular/", pencere)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.temmuz.durum = Randevu.IPTAL
+            self.temmuz.save()
+
+        cevap = self.client.get(url, pencere, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cevap.status_code, 200)
+        self.assertEqual([e["id"] for e in cevap.json()], [self.haziran.id])
+        self.assertEqual(self.client.get(diger_url, pencere, HTTP_IF_NONE_MATCH=diger_etag).status_code, 304)
+        self.assertEqual(
+            self.client.get("/api/tum-randevular/", pencere, HTTP_IF_NONE_MATCH=genel_etag).status_code, 200
+        )
+
+    def test_toplu_guncelleme_etagi_degistirir(self):
+        pencere = {"start": "2026-06-01", "end": "2026-08-01"}
+        url = f"/api/lab/{self.lab.id}/events/"
+        etag = self.client.get(url, pencere)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            randevulari_toplu_guncelle(Randevu.objects.filter(pk=self.haziran.pk), durum=Randevu.ONAYLANDI)
+        self.assertEqual(self.client.get(url, pencere, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_updated_since_yanitinda_etag_yok(self):
+        response = self.client.get(
+            "/api/tum-randevular/",
+            {"start": "2026-06-01", "end": "2026-08-01", "updated_since": (timezone.now() - timedelta(hours=1)).isoformat()},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
+
+    def test_baska_isci_surumu_artirinca_etag_200_dondurur(self):
+        pencere = {"start": "2026-06-01", "end": "2026-08-01"}
+        url = f"/api/lab/{self.lab.id}/events/"
+        with tempfile.TemporaryDirectory() as dizin, override_settings(ISCI_SAYISI=2, CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": dizin},
+        }):
+            etag = self.client.get(url, pencere)["ETag"]
+            self.assertEqual(self.client.get(url, pencere, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+            # Yazmayı başka bir işçi yapar: bu süreçte commit kancası çalışmaz,
+            # sayaçlar ayrı bir süreçte ortak önbellekte artırılır.
+            self.temmuz.durum = Randevu.IPTAL
+            self.temmuz.save()
+            baska_surecte_artir(dizin, f"versiyon:lab:{self.lab.id}")
+
+            cevap = self.client.get(url, pencere, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(cevap.status_code, 200)
+            self.assertNotEqual(cevap["ETag"], etag)
+            self.assertEqual([e["id"] for e in cevap.json()], [self.haziran.id])
+
+    @override_settings(ISCI_SAYISI=2)
+    def test_paylasimsiz_onbellekte_etag_ve_304_yok(self):
+        pencere = {"start": "2026-06-01", "end": "2026-08-01"}
+        for url in ("/api/tum-randevular/", f"/api/lab/{self.lab.id}/events/"):
+            ilk = self.client.get(url, pencere)
+            self.assertFalse(ilk.has_header("ETag"))
+            # Başka işçinin yazması: bu süreçteki sürüm artmaz, yanıt yine günceldir.
+            Randevu.objects.filter(pk=self.temmuz.pk).update(durum=Randevu.IPTAL)
+            cevap = self.client.get(url, pencere, HTTP_IF_NONE_MATCH='"eski"')
+            self.assertEqual(cevap.status_code, 200)
+            self.assertEqual([e["id"] for e in cevap.json()], [self.haziran.id])
+            Randevu.objects.filter(pk=self.temmuz.pk).update(durum=Randevu.ONAY_BEKLENIYOR)
+
+
+def baska_surecte_artir(dizin, *anahtarlar):
+    """Ortak FileBasedCache'teki sayaçları ayrı bir Python sürecinde artırır (başka işçi).
+
+    Yoksa sıfırdan kurar (ör. henüz hiç değişiklik görmemiş "badge:surum").
+    """
+    betik = (
+        "import sys\n"
+        "from django.conf import settings\n"
+        "settings.configure()\n"
+        "from django.core.cache.backends.filebased import FileBasedCache\n"
+        "onbellek = FileBasedCache(sys.argv[1], {})\n"
+        "for anahtar in sys.argv[2:]:\n"
+        "    onbellek.add(anahtar, 0, None)\n"
+        "    onbellek.incr(anahtar)\n"
+    )
+    subprocess.run([sys.executable, "-c", betik, dizin, *anahtarlar], check=True)
+
+
+# AsyncApiTestleri için URL'ler: proje urls.py view'ları ASYNC_API ayarına göre
+# import anında seçtiğinden async sürümler önce bağlanır, gerisi projeden gelir.
+urlpatterns = [
+    path("api/tum-randevular/", views.atum_events_api),
+    path("api/lab/<int:lab_id>/events/", views.alab_events_api),
+    path("api/onay-bekleyen-sayisi/", views.aonay_bekleyen_sayisi),
+] + proje_urls.urlpatterns
+
+
+@override_settings(ROOT_URLCONF="rezervasyon.tests")
+class AsyncApiTestleri(TestCase):
+    """Event API'leri ve badge sayacının async (ASGI) sürümleri."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="ogrenci", password="x", is_staff=True)
+        self.lab = Laboratuvar.objects.create(isim="Lab")
+        self.cihaz = Cihaz.objects.create(lab=self.lab, isim="Cihaz")
+        self.randevu = Randevu.objects.create(
+            kullanici=self.user, cihaz=self.cihaz, tarih=date(2026, 6, 10),
+            baslangic_saati=time(10, 0), bitis_saati=time(11, 0), durum=Randevu.ONAY_BEKLENIYOR,
+        )
+
+    async def test_takvim_penceresi_ve_etag(self):
+        await self.async_client.aforce_login(self.user)
+        pencere = {"start": "2026-06-01", "end": "2026-07-01"}
+        for url in ("/api/tum-randevular/", f"/api/lab/{self.lab.id}/events/"):
+            yanit = await self.async_client.get(url, pencere)
+            self.assertEqual(yanit.status_code, 200)
+            self.assertEqual([e["id"] for e in yanit.json()], [self.randevu.id])
+            self.assertIn("X-Updated-Until", yanit)
+            tekrar = await self.async_client.get(url, pencere, headers={"if-none-match": yanit["ETag"]})
+            self.assertEqual(tekrar.status_code, 304)
+            self.assertEqual(tekrar["ETag"], yanit["ETag"])
+            self.assertIn("no-cache", tekrar["Cache-Control"])
+
+    async def test_updated_since_ve_hatali_parametre(self):
+        await self.async_client.aforce_login(self.user)
+        yanit = await self.async_client.get(
+            "/api/tum-randevular/", {"start": "2026-06-01", "end": "2026-07-01", "updated_since": (timezone.now() - timedelta(hours=1)).isoformat()},
+        )
+        self.assertEqual([e["id"] for e in yanit.json()], [self.randevu.id])
+        self.assertNotIn("ETag", yanit)
+        yanit = await self.async_client.get("/api/tum-randevular/", {"start": "gecersiz"})
+        self.assertEqual(yanit.status_code, 400)
+
+    async def test_giris_yapmayan_yonlendirilir(self):
+        yanit = await self.async_client.get("/api/tum-randevular/")
+        self.assertEqual(yanit.status_code, 302)
+
+    async def test_badge_sayaclari(self):
+        await self.async_client.aforce_login(self.user)
+        veri = (await self.async_client.get("/api/onay-bekleyen-sayisi/")).json()
+        self.assertEqual(veri, {"pasif_ogrenci": 0, "bekleyen_randevu": 1, "acik_ariza": 0})
+
+    async def test_async_yanitlar_sync_surumlerle_ayni(self):
+        await Ariza.objects.acreate(kullanici=self.user, cihaz=self.cihaz, aciklama="x")
+        silinen = await Randevu.objects.acreate(
+            kullanici=self.user, cihaz=self.cihaz, tarih=date(2026, 6, 11),
+            baslangic_saati=time(10, 0), bitis_saati=time(11, 0), durum=Randevu.ONAYLANDI,
+        )
+        await silinen.adelete()
+        istemci = AsyncClient()
+        await istemci.aforce_login(self.user)
+        pencere = {"start": "2026-06-01", "end": "2026-07-01"}
+        artimli = {**pencere, "updated_since": (timezone.now() - timedelta(hours=1)).isoformat()}
+        durumlar = [
+            ("/api/tum-randevular/", views.tum_events_api, {}, pencere),
+            ("/api/tum-randevular/", views.tum_events_api, {}, artimli),
+            (f"/api/lab/{self.lab.id}/events/", views.lab_events_api, {"lab_id": self.lab.id}, pencere),
+            (f"/api/lab/{self.lab.id}/events/", views.lab_events_api, {"lab_id": self.lab.id}, artimli),
+            ("/api/onay-bekleyen-sayisi/", views.onay_bekleyen_sayisi, {}, {}),
+        ]
+        for url, sync_view, kwargs, parametreler in durumlar:
+            with self.subTest(url=url, parametreler=parametreler):
+                istek = RequestFactory().get(url, parametreler)
+                istek.user = self.user
+                # Her iki sürüm de kendi sorgusunu çalıştırsın, önbellekten okumasın.
+                await cache.aclear()
+                beklenen = await sync_to_async(sync_view)(istek, **kwargs)
+                await cache.aclear()
+                yanit = await istemci.get(url, parametreler)
+                self.assertEqual(yanit.status_code, beklenen.status_code)
+                self.assertEqual(json.loads(yanit.content), json.loads(beklenen.content))
+                # Temizlik sürümleri sıfırladığından ETag aynı sürümde karşılaştırılır.
+                beklenen = await sync_to_async(sync_view)(istek, **kwargs)
+                self.assertEqual(yanit.get("ETag"), beklenen.get("ETag"))
+
+
+@skipUnless(connection.vendor == "sqlite", "Sorgu planı testi SQLite'a özgüdür.")
+class RandevuIndeksTestleri(TestCase):
+    """Sıcak Randevu sorgularının tam tablo taraması yerine indeks kullandığını doğrular."""
+
+    def assertIndeksKullanir(self, qs, indeks_adi):
+        plan = qs.explain()
+        self.assertIn(indeks_adi, plan)
+        self.assertNotIn("SCAN rezervasyon_randevu", plan)
+
+    def test_cakisma_sorgusu_covering_indeks_kullanir(self):
+        qs = Randevu.objects.filter(
+            cihaz_id=1, tarih=date(2026, 6, 1), durum__in=Randevu.AKTIF_DURUMLAR,
+            baslangic_saati__lt=time(11, 0), bitis_saati__gt=time(10, 0),
+        )
+        self.assertIndeksKullanir(qs.values("id"), "COVERING INDEX randevu_cihaz_aralik_idx")
+        self.assertIndeksKullanir(
+            qs.values_list("baslangic_saati", "bitis_saati"), "COVERING INDEX randevu_cihaz_aralik_idx"
+        )
+
+    def test_kullanici_randevulari_indeks_kullanir(self):
+        qs = Randevu.objects.filter(kullanici_id=1, tarih__year=2026, tarih__month=6)
+        self.assertIndeksKullanir(qs, "randevu_kullanici_tarih_idx")
+
+    def test_fk_filtreleri_bilesik_indeksin_onekini_kullanir(self):
+        # Tek kolonlu FK indeksleri kaldırıldı; cascade/protect sorguları bileşik
+        # indekslerin ilk kolonunu kullanır.
+        self.assertIndeksKullanir(Randevu.objects.filter(cihaz_id__in=[1, 2]), "randevu_cihaz_aralik_idx")
+        self.assertIndeksKullanir(Randevu.objects.filter(kullanici_id__in=[1, 2]), "randevu_kullanici_tarih_idx")
+        with connection.cursor() as cursor:
+            kisitlar = connection.introspection.get_constraints(cursor, Randevu._meta.db_table)
+        tek_kolonlu = [k["columns"] for k in kisitlar.values() if k["index"] and len(k["columns"]) == 1]
+        self.assertNotIn(["cihaz_id"], tek_kolonlu)
+        self.assertNotIn(["kullanici_id"], tek_kolonlu)
+
+    def test_otomatik_geldi_adaylari_indeks_kullanir(self):
+        qs = Randevu.objects.filter(durum=Randevu.ONAYLANDI, tarih__lte=date(2026, 6, 1))
+        self.assertIndeksKullanir(qs, "randevu_durum_tarih_idx")
+
+
+class EszamanliRandevuTestleri(TransactionTestCase):
+    """Aynı slota paralel rezervasyonlarda yalnızca birinin kazandığını doğrular."""
+
+    PARALEL_ISTEK = 200
+
+    def test_ayni_slota_paralel_isteklerden_yalnizca_biri_kazanir(self):
+        kullanicilar = [
+            User.objects.create_user(username=f"ogrenci{i}", password="x") for i in range(10)
+        ]
+        cihaz = Cihaz.objects.create(lab=Laboratuvar.objects.create(isim="Lab"), isim="Cihaz")
+        tarih = date(2099, 1, 1)
+        bariyer = threading.Barrier(self.PARALEL_ISTEK)
+        kazananlar, hatalar = [], []
+
+        def rezervasyon_yap(i):
+            try:
+                bariyer.wait()
+                # Aynı cihaz, kısmen örtüşen aralıklar: hepsi 10:00-10:30'u kapsar
+                randevu = randevu_olustur(
+                    kullanicilar[i % len(kullanicilar)], cihaz, tarih,
+                    time(10, 0) if i % 2 else time(9, 50), time(10, 30),
+                )
+                if randevu is not None:
+                    kazananlar.append(randevu.pk)
+            except Exception as e:  # noqa: BLE001 - tüm hatalar teste raporlanır
+                hatalar.append(repr(e))
+            finally:
+                connection.close()
+
+        threadler = [threading.Thread(target=rezervasyon_yap, args=(i,)) for i in range(self.PARALEL_ISTEK)]
+        for t in threadler:
+            t.start()
+        for t in threadler:
+            t.join()
+
+        self.assertEqual(hatalar, [])
+        self.assertEqual(len(kazananlar), 1)
+        self.assertEqual(Randevu.objects.filter(cihaz=cihaz, tarih=tarih).count(), 1)
+
+    @skipUnless(connection.vendor == "sqlite", "BEGIN IMMEDIATE yalnızca SQLite'ta")
+    def test_yalnizca_randevu_kilidi_immediate_baslar(self):
+        cihaz = Cihaz.objects.create(lab=Laboratuvar.objects.create(isim="Lab"), isim="Cihaz")
+
+        def baslangiclar(blok):
+            with CaptureQueriesContext(connection) as ctx:
+                with blok:
+                    Cihaz.objects.count()
+            return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("BEGIN")]
+
+        self.assertEqual(baslangiclar(cihaz_kilidi(cihaz.pk)), ["BEGIN IMMEDIATE"])
+        # Sıradan atomic bloklar (salt okuma dahil) yazma kilidi almaz.
+        self.assertEqual(baslangiclar(transaction.atomic()), ["BEGIN"])
+
+
+class MusaitlikApiTestleri(TestCase):
+    """Çok cihazlı / çok günlü boş pencere araması."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="ogrenci", password="x")
+        self.lab = Laboratuvar.objects.create(isim="Lab")
+        self.c1 = Cihaz.objects.create(lab=self.lab, isim="A Cihazı")
+        self.c2 = Cihaz.objects.create(lab=self.lab, isim="B Cihazı")
+        Cihaz.objects.create(lab=self.lab, isim="Pasif", aktif_mi=False)
+        self.gun = timezone.localdate() + timedelta(days=10)
+        # A cihazı 00:00-09:00 dolu, B cihazı 00:00-09:30 dolu
+        Randevu.objects.create(
+            kullanici=self.user, cihaz=self.c1, tarih=self.gun,
+            baslangic_saati=time(0, 0), bitis_saati=time(9, 0),
+        )
+        Randevu.objects.create(
+            kullanici=self.user, cihaz=self.c2, tarih=self.gun,
+            baslangic_saati=time(0, 0), bitis_saati=time(9, 30),
+        )
+        self.client.force_login(self.user)
+
+    def _ara(self, **params):
+        return self.client.get(reverse("lab_musaitlik_api", args=[self.lab.id]), params)
+
+    def test_ilk_bos_pencereler_kronolojik_doner(self):
+        response = self._ara(start=self.gun.isoformat(), sure=60, adet=3)
+        self.assertEqual(response.status_code, 200)
+        pencereler = [(p["cihaz"], p["baslangic"], p["bitis"]) for p in response.json()["pencereler"]]
+        self.assertEqual(pencereler, [
+            ("A Cihazı", "09:00", "10:00"),
+            ("B Cihazı", "09:30", "10:30"),
+            ("A Cihazı", "10:00", "11:00"),
+        ])
+
+    def test_sorgu_sayisi_cihaz_ve_gun_sayisindan_bagimsiz(self):
+        def sorgu_sayisi(**params):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self._ara(**params).status_code, 200)
+            return len(ctx.captured_queries)
+
+        bir_gun = sorgu_sayisi(start=self.gun.isoformat(), end=(self.gun + timedelta(days=1)).isoformat(), adet=50)
+        for i in range(5):
+            Cihaz.objects.create(lab=self.lab, isim=f"Ek {i}")
+        cok_gun = sorgu_sayisi(start=self.gun.isoformat(), end=(self.gun + timedelta(days=14)).isoformat(), adet=50)
+        self.assertEqual(bir_gun, cok_gun)
+
+    def test_hatali_parametre_400(self):
+        self.assertEqual(self._ara(sure="abc").status_code, 400)
+        self.assertEqual(self._ara(sure=5).status_code, 400)
+        self.assertEqual(self._ara(start="2026-06-10", end="2026-06-01").status_code, 400)
+
+
+class IstatistikOnbellekTestleri(TestCase):
+    """İstatistik sayfası önbellekten sunulur, yazmalarda geçersiz kılınır."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="ogrenci", password="x")
+        self.cihaz = Cihaz.objects.create(lab=Laboratuvar.objects.create(isim="Lab"), isim="Cihaz")
+        self.client.force_login(self.user)
+
+    def _randevu_sayisi(self):
+        return self.client.get(reverse("istatistikler")).context["veriler"]["randevu"]["toplam"]
+
+    def test_ikinci_istek_onbellekten_sunulur(self):
+        with CaptureQueriesContext(connection) as ilk:
+            self.assertEqual(self._randevu_sayisi(), 0)
+        with CaptureQueriesContext(connection) as ikinci:
+            self._randevu_sayisi()
+        self.assertLess(len(ikinci.captured_queries), len(ilk.captured_queries))
+        self.assertFalse(any("rezervasyon_randevu" in q["sql"] for q in ikinci.captured_queries))
+
+    def test_kayit_ve_toplu_guncelleme_onbellegi_temizler(self):
+        self.assertEqual(self._randevu_sayisi(), 0)
+        # Geçersiz kılma işlem onaylandığında çalışır.
+        with self.captureOnCommitCallbacks(execute=True):
+            randevu = Randevu.objects.create(
+                kullanici=self.user, cihaz=self.cihaz, tarih=date(2026, 6, 1),
+                baslangic_saati=time(10, 0), bitis_saati=time(11, 0),
+            )
+        self.assertEqual(self._randevu_sayisi(), 1)
+
+        admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        self.client.force_login(admin)
+        self.client.get(reverse("istatistikler"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("toplu_islem"), {"islem": "onaylandi", "secilen_randevular": [randevu.id]})
+        veriler = self.client.get(reverse("istatistikler")).context["veriler"]
+        self.assertEqual(veriler["randevu"]["onaylanan"], 1)
+
+
+class PaylasimsizOnbellekTestleri(TestCase):
+    """Çok işçide süreç içi LocMem kullanılıyorsa önbellek devre dışı kalır."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="ogrenci", password="x")
+        self.cihaz = Cihaz.objects.create(lab=Laboratuvar.objects.create(isim="Lab"), isim="Cihaz")
+        self.client.force_login(self.user)
+
+    def test_tek_isci_locmem_paylasimli_sayilir(self):
+        self.assertTrue(onbellek_paylasimli_mi())
+        self.assertEqual(onbellek_kontrolu(None), [])
+
+    @override_settings(ISCI_SAYISI=2)
+    def test_cok_isci_locmem_check_hatasi_verir(self):
+        self.assertFalse(onbellek_paylasimli_mi())
+        self.assertEqual([h.id for h in onbellek_kontrolu(None)], ["rezervasyon.E001"])
+
+    @override_settings(ISCI_SAYISI=2, CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+    def test_ortak_backend_ile_cok_isci_gecerlidir(self):
+        self.assertTrue(onbellek_paylasimli_mi())
+        self.assertEqual(onbellek_kontrolu(None), [])
+
+    @override_settings(ISCI_SAYISI=2)
+    def test_cok_isci_locmem_her_istekte_veritabanindan_hesaplar(self):
+        def randevu_sayisi():
+            with CaptureQueriesContext(connection) as ctx:
+                toplam = self.client.get(reverse("istatistikler")).context["veriler"]["randevu"]["toplam"]
+            return toplam, any("rezervasyon_randevu" in q["sql"] for q in ctx.captured_queries)
+
+        self.assertEqual(randevu_sayisi(), (0, True))
+        # Başka bir işçinin yaptığı yazma: bu süreçte sürüm artmaz.
+        with mock.patch("rezervasyon.signals.kapsamlari_artir"):
+            Randevu.objects.create(
+                kullanici=self.user, cihaz=self.cihaz, tarih=date(2026, 6, 1),
+                baslangic_saati=time(10, 0), bitis_saati=time(11, 0),
+            )
+        self.assertEqual(randevu_sayisi(), (1, True))
+
+
+class VeriSurumuTestleri(TestCase):
+    """Sayfa önbellekleri lab/cihaz/kullanıcı sürüm sayaçlarına bağlıdır."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="ogrenci", password="x")
+        self.lab = Laboratuvar.objects.create(isim="Lab")
+        self.cihaz = Cihaz.objects.create(lab=self.lab, isim="Cihaz")
+        self.diger_cihaz = Cihaz.objects.create(lab=self.lab, isim="Diğer")
+        self.client.force_login(self.user)
+
+    def _tablo_sorgulari(self, url, tablo):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        return response, [q for q in ctx.captured_queries if f'"{tablo}"' in q["sql"]]
+
+    def _randevu(self, cihaz, **alanlar):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Randevu.objects.create(
+                kullanici=self.user, cihaz=cihaz, tarih=date(2026, 6, 1),
+                baslangic_saati=alanlar.pop("baslangic", time(10, 0)), bitis_saati=time(11, 0),
+                durum=Randevu.ONAYLANDI, **alanlar,
+            )
+
+    def test_gun_programi_yalnizca_kendi_cihazinin_yazmasiyla_yenilenir(self):
+        url = reverse("randevu_al", args=[self.cihaz.id]) + "?tarih=2026-06-01"
+        self.client.get(url)
+        _, sorgular = self._tablo_sorgulari(url, "rezervasyon_randevu")
+        self.assertEqual(sorgular, [])
+
+        self._randevu(self.diger_cihaz)
+        _, sorgular = self._tablo_sorgulari(url, "rezervasyon_randevu")
+        self.assertEqual(sorgular, [])
+
+        self._randevu(self.cihaz)
+        response, sorgular = self._tablo_sorgulari(url, "rezervasyon_randevu")
+        self.assertEqual(len(sorgular), 1)
+        self.assertEqual(response.context["mevcut_randevular"][0]["kullanici"]["username"], "ogrenci")
+
+    def test_lab_detay_cihaz_ve_ariza_yazmasiyla_yenilenir(self):
+        url = reverse("lab_detay", args=[self.lab.id])
+        self.client.get(url)
+        _, sorgular = self._tablo_sorgulari(url, "rezervasyon_cihaz")
+        self.assertEqual(sorgular, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Cihaz.objects.create(lab=self.lab, isim="Yeni")
+        response, _ = self._tablo_sorgulari(url, "rezervasyon_cihaz")
+        self.assertEqual(len(response.context["cihazlar"]), 3)
+
+        surum = versiyon(f"cihaz:{self.cihaz.id}")
+        with self.captureOnCommitCallbacks(execute=True):
+            Ariza.objects.create(kullanici=self.user, cihaz=self.cihaz, aciklama="Bozuk")
+        self.assertGreater(versiyon(f"cihaz:{self.cihaz.id}"), surum)
+        self.assertEqual(len(self._tablo_sorgulari(url, "rezervasyon_cihaz")[1]), 1)
+
+    def test_randevularim_kullanici_surumune_baglidir(self):
+        url = reverse("randevularim") + "?ay_ara="
+        self.client.get(url)
+        self.assertEqual(self._tablo_sorgulari(url, "rezervasyon_randevu")[1], [])
+        randevu = self._randevu(self.cihaz, baslangic=time(9, 0))
+        self.assertEqual(len(self._tablo_sorgulari(url, "rezervasyon_randevu")[1]), 1)
+        # Başka kullanıcının randevusu bu kullanıcının listesini geçersiz kılmaz.
+        baska = User.objects.create_user(username="baska", password="x")
+        with self.captureOnCommitCallbacks(execute=True):
+            Randevu.objects.create(
+                kullanici=baska, cihaz=self.diger_cihaz, tarih=randevu.tarih,
+                baslangic_saati=time(12, 0), bitis_saati=time(13, 0),
+            )
+        self.assertEqual(self._tablo_sorgulari(url, "rezervasyon_randevu")[1], [])
+
+    def test_randevularim_cihaz_ve_lab_adini_guncel_gosterir(self):
+        url = reverse("randevularim") + "?ay_ara="
+        self._randevu(self.cihaz, baslangic=time(9, 0))
+        self.assertContains(self.client.get(url), "Cihaz")
+        surum = versiyon(f"kullanici:{self.user.pk}")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cihaz.isim = "Yeni Cihaz"
+            self.cihaz.save()
+        self.assertContains(self.client.get(url), "Yeni Cihaz")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lab.isim = "Yeni Lab"
+            self.lab.save()
+        self.assertContains(self.client.get(url), "Yeni Lab")
+        self.assertEqual(versiyon(f"kullanici:{self.user.pk}"), surum)
+        # Adlar satırlarla birlikte önbellekte durur: tekrar görüntüleme
+        # cihaz/lab tablosuna da gitmez.
+        self.assertEqual(self._tablo_sorgulari(url, "rezervasyon_cihaz")[1], [])
+
+    def test_giris_takvim_surumlerini_artirmaz(self):
+        kapsamlar = ("genel", "tum", f"kullanici:{self.user.pk}")
+        onceki = versiyonlar(*kapsamlar)
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(self.client.login(username="ogrenci", password="x"))
+        self.assertEqual(versiyonlar(*kapsamlar), onceki)
+        # Girişteki last_login kaydı profile dokunmaz.
+        self.assertEqual([q for q in ctx.captured_queries if "rezervasyon_profil" in q["sql"]], [])
+
+    def test_admin_duzenlemesi_profile_yazmaz(self):
+        admin = User.objects.create_superuser(username="admin", password="x", email="a@a.com")
+        self.client.force_login(admin)
+        Profil.objects.filter(user=self.user).update(status="aktif_kullanici")
+        url = reverse("admin:auth_user_change", args=[self.user.pk])
+        veri = {
+            "username": "ogrenci", "first_name": "Yeni", "last_name": "", "email": "",
+            "is_active": "on", "date_joined_0": "2026-01-01", "date_joined_1": "10:00:00",
+        }
+
+        def kaydet():
+            with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self.client.post(url, veri).status_code, 302)
+            return [
+                q["sql"] for q in ctx.captured_queries
+                if "rezervasyon_profil" in q["sql"] and not q["sql"].startswith("SELECT")
+            ]
+
+        self.assertEqual(kaydet(), [])
+        self.assertEqual(User.objects.get(pk=self.user.pk).first_name, "Yeni")
+
+        # Aktiflik değişince statü açıkça, tek UPDATE ile eşitlenir.
+        del veri["is_active"]
+        self.assertEqual(len(kaydet()), 1)
+        self.assertEqual(Profil.objects.get(user=self.user).status, "pasif_kullanici")
+
+        # İptal edilmiş profil, kullanıcı yeniden aktifleşse de iptal kalır.
+        Profil.objects.filter(user=self.user).update(status="iptal")
+        veri["is_active"] = "on"
+        self.assertEqual(kaydet(), [])
+        self.assertTrue(User.objects.get(pk=self.user.pk).is_active)
+        self.assertEqual(Profil.objects.get(user=self.user).status, "iptal")
+
+    def test_badge_sayaclari_surumle_yenilenir(self):
+        admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        self.client.force_login(admin)
+        url = reverse("onay_bekleyen_sayisi")
+        self.assertEqual(self.client.get(url).json()["bekleyen_randevu"], 0)
+        self.assertEqual(self._tablo_sorgulari(url, "rezervasyon_randevu")[1], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Randevu.objects.create(
+                kullanici=self.user, cihaz=self.cihaz, tarih=date(2026, 6, 1),
+                baslangic_saati=time(10, 0), bitis_saati=time(11, 0), durum=Randevu.ONAY_BEKLENIYOR,
+            )
+        self.assertEqual(self.client.get(url).json()["bekleyen_randevu"], 1)
+
+
+class BadgeSayacTestleri(TestCase):
+    """Yönetim badge sayaçlarının artımlı bakımı ve SSE akışı."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="ogrenci", password="x")
+        self.admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        self.lab = Laboratuvar.objects.create(isim="Lab")
+        self.cihaz = Cihaz.objects.create(lab=self.lab, isim="Cihaz")
+
+    def _randevu(self, saat, durum=Randevu.ONAY_BEKLENIYOR):
+        return Randevu.objects.create(
+            kullanici=self.user, cihaz=self.cihaz, tarih=date(2026, 6, 1),
+            baslangic_saati=time(saat, 0), bitis_saati=time(saat, 30), durum=durum,
+        )
+
+    def _sayaclar(self):
+        # Sayaçlar kurulduktan sonra okuma veritabanına gitmemeli.
+        with self.assertNumQueries(0):
+            return badge_sayaclari()
+
+    def test_sayaclar_yeniden_sayilmadan_guncellenir(self):
+        self.assertEqual(badge_sayaclari(), {"pasif_ogrenci": 0, "bekleyen_randevu": 0, "acik_ariza": 0})
+        with self.captureOnCommitCallbacks(execute=True):
+            randevular = [self._randevu(9), self._randevu(10), self._randevu(11, Randevu.ONAYLANDI)]
+            ariza = Ariza.objects.create(kullanici=self.user, cihaz=self.cihaz, aciklama="x")
+            User.objects.create_user(username="pasif", password="x", is_active=False)
+        self.assertEqual(self._sayaclar(), {"pasif_ogrenci": 1, "bekleyen_randevu": 2, "acik_ariza": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            randevular[0].durum = Randevu.ONAYLANDI
+            randevular[0].save()
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self._sayaclar(), {"pasif_ogrenci": 2, "bekleyen_randevu": 1, "acik_ariza": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            randevulari_toplu_guncelle(Randevu.objects.all(), durum=Randevu.ONAY_BEKLENIYOR)
+        self.assertEqual(self._sayaclar()["bekleyen_randevu"], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            randevulari_toplu_guncelle(Randevu.objects.filter(pk=randevular[1].pk), durum=Randevu.REDDEDILDI)
+            randevular[2].refresh_from_db()
+            randevular[2].delete()
+            self.assertEqual(acik_arizalari_coz(Ariza.objects.filter(pk=ariza.pk)), 1)
+        self.assertEqual(self._sayaclar(), {"pasif_ogrenci": 2, "bekleyen_randevu": 1, "acik_ariza": 0})
+
+    def test_yoklama_ucnoktasi_sayaclari_doner(self):
+        self._randevu(9)
+        self.client.force_login(self.admin)
+        veri = self.client.get(reverse("onay_bekleyen_sayisi")).json()
+        self.assertEqual(veri["bekleyen_randevu"], 1)
+
+    def test_akis_wsgi_altinda_acilmaz(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(reverse("badge_akisi")).status_code, 204)
+
+    def test_akis_yetkisiz_kullaniciya_kapali(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("badge_akisi")).status_code, 302)
+
+    async def test_akis_ilk_olayda_tum_sayaclari_gonderir(self):
+        await self.async_client.aforce_login(self.admin)
+        await Ariza.objects.acreate(kullanici=self.user, cihaz=self.cihaz, aciklama="x")
+        with mock.patch.object(views_management, "BADGE_AKIS_ARALIK_SANIYE", 0):
+            yanit = await self.async_client.get(reverse("badge_akisi"))
+            self.assertEqual(yanit["Content-Type"], "text/event-stream")
+            parcalar = aiter(yanit.streaming_content)
+            self.assertTrue((await anext(parcalar)).startswith(b"retry:"))
+            olay = (await anext(parcalar)).decode()
+            await parcalar.aclose()
+        satirlar = olay.strip().split("\n")
+        self.assertEqual(satirlar[0], "event: badge")
+        self.assertEqual(
+            json.loads(satirlar[1].removeprefix("data: ")),
+            {"pasif_ogrenci": 0, "bekleyen_randevu": 0, "acik_ariza": 1},
+        )
+
+
+class BadgeCokIsciTestleri(TestCase):
+    """Badge sayaçları başka bir işçinin değişikliklerini kaçırmaz."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="ogrenci", password="x")
+        self.admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        self.cihaz = Cihaz.objects.create(lab=Laboratuvar.objects.create(isim="Lab"), isim="Cihaz")
+
+    def test_ortak_onbellekte_baska_surecin_farki_gorunur(self):
+        with tempfile.TemporaryDirectory() as dizin, override_settings(ISCI_SAYISI=2, CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": dizin},
+        }):
+            self.assertEqual(badge_sayaclari()["acik_ariza"], 0)
+            surum = async_to_sync(abadge_surumu)()
+
+            # Arıza başka bir işçide açılır; farkı ve sürümü o süreç uygular.
+            Ariza.objects.create(kullanici=self.user, cihaz=self.cihaz, aciklama="x")
+            baska_surecte_artir(dizin, "badge:acik_ariza", "badge:surum")
+
+            with self.assertNumQueries(0):
+                self.assertEqual(badge_sayaclari()["acik_ariza"], 1)
+            self.assertNotEqual(async_to_sync(abadge_surumu)(), surum)
+
+    @override_settings(ISCI_SAYISI=2)
+    def test_paylasimsiz_onbellekte_her_okumada_yeniden_sayar(self):
+        self.assertEqual(badge_sayaclari()["acik_ariza"], 0)
+        # Başka işçinin yazması: bu süreçte fark uygulanmaz.
+        Ariza.objects.create(kullanici=self.user, cihaz=self.cihaz, aciklama="x")
+        self.assertEqual(badge_sayaclari()["acik_ariza"], 1)
+        self.assertEqual(async_to_sync(abadge_sayaclari)()["acik_ariza"], 1)
+
+    @override_settings(ISCI_SAYISI=2)
+    async def test_paylasimsiz_onbellekte_akis_acilmaz(self):
+        await self.async_client.aforce_login(self.admin)
+        self.assertEqual((await self.async_client.get(reverse("badge_akisi"))).status_code, 204)
+
+
+class GunlukOzetTestleri(TestCase):
+    """RandevuGunlukOzet artımlı bakımı ve yeniden oluşturma."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="ogrenci", password="x")
+        self.lab = Laboratuvar.objects.create(isim="Lab")
+        self.cihaz = Cihaz.objects.create(lab=self.lab, isim="Cihaz")
+
+    def _randevu(self, saat, **alanlar):
+        return Randevu.objects.create(
+            kullanici=self.user, cihaz=self.cihaz, tarih=date(2026, 6, 1),
+            baslangic_saati=time(saat, 0), bitis_saati=time(saat, 30), **alanlar,
+        )
+
+    def _ozet(self):
+        return dict(RandevuGunlukOzet.objects.values_list("durum", "adet"))
+
+    def test_kayit_durum_degisikligi_ve_silme_artimli_islenir(self):
+        r1 = self._randevu(9)
+        self._randevu(10)
+        self.assertEqual(self._ozet(), {Randevu.ONAYLANDI: 2})
+
+        r1 = Randevu.objects.get(pk=r1.pk)
+        r1.durum = Randevu.IPTAL
+        r1.save()
+        self.assertEqual(self._ozet(), {Randevu.ONAYLANDI: 1, Randevu.IPTAL: 1})
+
+        r1.delete()
+        self.assertEqual(self._ozet(), {Randevu.ONAYLANDI: 1})
+
+    def test_randevu_yuklemesi_tek_post_init_alicisi_calistirir(self):
+        alicilar = [a for a in post_init.receivers if a[0][1] == id(Randevu)]
+        self.assertEqual(len(alicilar), 1)
+        r = Randevu.objects.get(pk=self._randevu(9).pk)
+        self.assertEqual(r._ozet_anahtari, (r.tarih, self.cihaz.pk, self.user.pk, Randevu.ONAYLANDI))
+        self.assertEqual((r._eski_durum, r._eski_cihaz_id, r._eski_kullanici_id),
+                         (Randevu.ONAYLANDI, self.cihaz.pk, self.user.pk))
+        ertelenmis = Randevu.objects.only("id").get(pk=r.pk)
+        self.assertIsNone(ertelenmis._ozet_anahtari)
+        self.assertIsNone(ertelenmis._eski_durum)
+
+    def test_yeniden_olusturma_komutu_artimli_sonucla_ayni(self):
+        self._randevu(9)
+        self._randevu(10, durum=Randevu.GELDI)
+        beklenen = self._ozet()
+        RandevuGunlukOzet.objects.all().delete()
+        call_command("ozet_yeniden_olustur", stdout=StringIO())
+        self.assertEqual(self._ozet(), beklenen)
+
+    def test_panel_ozetten_okur(self):
+        self._randevu(9)
+        admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        self.client.force_login(admin)
+        response = self.client.get(reverse("egitmen_paneli"), {"ay_ara": "2026-06"})
+        self.assertEqual(response.context["toplam_randevu"], 1)
+        self.assertEqual(response.context["top_lab_name"], "Lab")
+        self.assertEqual(response.context["top_users_of_top_lab"][0]["booking_count"], 1)
+
+
+class EgitmenPaneliTestleri(TestCase):
+    """Yönetim paneli lab/kullanıcı/randevu sayısından bağımsız sabit sorguyla çizilir."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        self.client.force_login(self.admin)
+        self.bugun = timezone.localdate()
+        self.ay = self.bugun.strftime("%Y-%m")
+
+    def _veri_ekle(self, adet):
+        for i in range(adet):
+            lab = Laboratuvar.objects.create(isim=f"Lab {Laboratuvar.objects.count()}")
+            cihaz = Cihaz.objects.create(lab=lab, isim="Cihaz", aktif_mi=i % 2 == 0)
+            kullanici = User.objects.create_user(username=f"k{User.objects.count()}", first_name="Ad")
+            for saat in range(2):
+                Randevu.objects.create(
+                    kullanici=kullanici, cihaz=cihaz, tarih=self.bugun,
+                    baslangic_saati=time(20 + saat, 0), bitis_saati=time(20 + saat, 30),
+                )
+
+    def _panel(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("egitmen_paneli"), {"ay_ara": self.ay})
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_sorgu_sayisi_veri_buyuklugunden_bagimsiz(self):
+        self._veri_ekle(2)
+        _, az = self._panel()
+        self._veri_ekle(10)
+        response, cok = self._panel()
+        self.assertEqual(az, cok)
+        # oturum + kullanıcı + lab grafiği + top kullanıcılar + yaklaşanlar
+        # + 2 sayaç + base.html'deki profil
+        self.assertEqual(cok, 8)
+
+        context = response.context
+        self.assertEqual(context["toplam_randevu"], 24)
+        self.assertEqual(context["randevu_sayilari"], [2] * 12)
+        self.assertEqual(context["yaklasan_sayisi"], 24)
+        self.assertEqual(len(context["yaklasan_randevular"]), 8)
+        self.assertEqual(context["arizali_cihazlar"], 6)
+        self.assertEqual(context["toplam_kullanici"], 13)
+        self.assertEqual(context["top_users_of_top_lab"][0]["name"], "Ad")
+
+    def test_ay_filtresi_lab_sayilarina_uygulanir(self):
+        self._veri_ekle(1)
+        response = self.client.get(reverse("egitmen_paneli"), {"ay_ara": "2000-01"})
+        self.assertEqual(response.context["randevu_sayilari"], [0])
+        self.assertIsNone(response.context["top_lab_name"])
+        self.assertEqual(response.context["yaklasan_sayisi"], 2)
+
+
+class BenchTestleri(TestCase):
+    """Sentetik veri üretimi ve bench komutunun URL kapsamı/taban karşılaştırması."""
+
+    def setUp(self):
+        self.sayilar = sentetik_veri_olustur(lab=1, cihaz=2, kullanici=5, yil=0, gunluk=6)
+
+    def test_sentetik_randevular_cakismasiz_ve_slota_hizali(self):
+        self.assertEqual(Profil.objects.count(), User.objects.count())
+        self.assertEqual(Randevu.objects.count(), self.sayilar["Randevu"])
+        self.assertEqual(
+            RandevuGunlukOzet.objects.aggregate(t=Sum("adet"))["t"], self.sayilar["Randevu"]
+        )
+        onceki = {}
+        for r in Randevu.objects.order_by("cihaz_id", "tarih", "baslangic_saati"):
+            for saat in (r.baslangic_saati, r.bitis_saati):
+                self.assertEqual(saat.minute % SLOT_DAKIKA, 0)
+            self.assertLess(r.baslangic_saati, r.bitis_saati)
+            son = onceki.get((r.cihaz_id, r.tarih))
+            if son is not None:
+                self.assertGreaterEqual(r.baslangic_saati, son)
+            onceki[(r.cihaz_id, r.tarih)] = r.bitis_saati
+
+    def test_tum_adli_urller_olculur(self):
+        kullanicilar = bench.rol_kullanicilari()
+        uclar = {ad: yol for ad, yol, _ in bench.uc_noktalari(bench.url_parametreleri(kullanicilar["ogrenci"]))}
+        for desen in proje_urls.urlpatterns:
+            if getattr(desen, "name", None):
+                self.assertIsNotNone(uclar.get(desen.name), desen.name)
+        self.assertIn("admin:rezervasyon_randevu_changelist", uclar)
+
+        olcum = bench.olc(kullanicilar["yonetici"], uclar["egitmen_paneli"], tekrar=1)
+        self.assertEqual(olcum["durum"], 200)
+        self.assertGreater(olcum["sorgu"], 0)
+        self.assertGreater(olcum["boyut"], 0)
+
+    def test_taban_karsilastirmasi(self):
+        taban = {"yonetici x": {"durum": 200, "sorgu": 5, "sql_ms": 10.0, "sure_ms": 20.0, "boyut": 1000}}
+        ayni = {"yonetici x": dict(taban["yonetici x"], sure_ms=30.0)}
+        self.assertEqual(bench.karsilastir(ayni, taban), [])
+
+        kotu = {"yonetici x": dict(taban["yonetici x"], sorgu=6, sure_ms=100.0, durum=500)}
+        self.assertEqual(len(bench.karsilastir(kotu, taban)), 3)
+        self.assertEqual(len(bench.karsilastir(kotu, taban, yalniz_sorgu=True)), 2)
+        # Tabanda olmayan yeni URL regresyon sayılmaz.
+        self.assertEqual(bench.karsilastir({"anonim y": taban["yonetici x"]}, taban), [])
+
+
+class SeedKomutuTestleri(TestCase):
+    """seed_booklab: sinyalsiz toplu yükleme tutarlı veri bırakır."""
+
+    def _seed(self):
+        call_command(
+            "seed_booklab", lab=2, cihaz=5, kullanici=4, yil=1, gunluk=3, ariza=2, duyuru=2,
+            stdout=StringIO(),
+        )
+
+    def test_yukleme_sayilari_ve_tutarlilik(self):
+        self._seed()
+        self.assertEqual(Cihaz.objects.count(), 10)
+        self.assertEqual(Profil.objects.count(), 4)
+        self.assertEqual(Ariza.objects.count(), 20)
+        self.assertEqual(Duyuru.objects.filter(aktif_mi=True).count(), 2)
+        # Son arızası açık kalan cihazlar pasiftir.
+        acik = set(Ariza.objects.filter(cozuldu_mu=False).values_list("cihaz_id", flat=True))
+        self.assertEqual(acik, set(Cihaz.objects.filter(aktif_mi=False).values_list("id", flat=True)))
+        # Randevu geçmişe dönük, tarihinden önce alınmış olarak yazılır.
+        r = Randevu.objects.order_by("tarih").first()
+        self.assertLess(timezone.localtime(r.olusturulma_zamani).date(), r.tarih)
+        self.assertLess(r.tarih, timezone.localdate() - timedelta(days=300))
+        self.assertEqual(
+            RandevuGunlukOzet.objects.aggregate(t=Sum("adet"))["t"], Randevu.objects.count()
+        )
+        self.assertEqual(badge_sayaclari()["acik_ariza"], len(acik))
+
+    def test_ikinci_yukleme_reddedilir(self):
+        self._seed()
+        with self.assertRaises(CommandError):
+            self._seed()
+
+
+class CsvDisaAktarimTestleri(TestCase):
+    """excel_indir admin aksiyonu akış halinde ve sabit sayıda sorguyla çalışır."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", password="x", email="a@a.com")
+        self.client.force_login(self.admin)
+        self.cihaz = Cihaz.objects.create(lab=Laboratuvar.objects.create(isim="Lab"), isim="Cihaz")
+
+    def _randevular(self, adet):
+        for i in range(adet):
+            user = User.objects.create_user(username=f"u{i}_{Randevu.objects.count()}", password="x")
+            Randevu.objects.create(
+                kullanici=user, cihaz=self.cihaz, tarih=date(2026, 6, 1) + timedelta(days=Randevu.objects.count()),
+                baslangic_saati=time(10, 0), bitis_saati=time(11, 0),
+            )
+
+    def _indir(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse("admin:rezervasyon_randevu_changelist"),
+                {"action": "excel_indir", "_selected_action": list(Randevu.objects.values_list("pk", flat=True))},
+            )
+            icerik = b"".join(response.streaming_content).decode("utf-8")
+        return icerik, len(ctx.captured_queries)
+
+    def test_csv_akis_ve_sabit_sorgu(self):
+        self._randevular(2)
+        icerik, az = self._indir()
+        satirlar = icerik.lstrip("\ufeff").splitlines()
+        self.assertEqual(satirlar[0], "Kullanıcı;Cihaz;Tarih;Saat Aralığı;Durum")
+        self.assertEqual(len(satirlar), 3)
+        self.assertIn("Cihaz (Lab)", satirlar[1])
+
+        self._randevular(8)
+        icerik, cok = self._indir()
+        self.assertEqual(len(icerik.splitlines()), 11)
+        self.assertEqual(az, cok)
+
+
+class AdminListeSorguTestleri(TestCase):
+    """Admin liste ve form sayfaları satır sayısından bağımsız sabit sorguyla çizilir."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", password="x", email="a@a.com")
+        self.client.force_login(self.admin)
+
+    def _veri_ekle(self, adet):
+        for _ in range(adet):
+            n = User.objects.count()
+            lab = Laboratuvar.objects.create(isim=f"Lab {n}")
+            kullanici = User.objects.create_user(username=f"k{n}", email=f"k{n}@a.com", is_active=n % 2 == 0)
+            for i in range(2):
+                cihaz = Cihaz.objects.create(lab=lab, isim=f"Cihaz {i}", aktif_mi=i == 0)
+                Ariza.objects.create(cihaz=cihaz, kullanici=kullanici, aciklama="Bozuk", cozuldu_mu=i == 0)
+                Randevu.objects.create(
+                    kullanici=kullanici, cihaz=cihaz, tarih=date(2026, 6, 1) + timedelta(days=n),
+                    baslangic_saati=time(10, 0), bitis_saati=time(11, 0),
+                )
+            Duyuru.objects.create(baslik=f"Duyuru {n}")
+            EpostaKuyrugu.objects.create(alici=f"k{n}@a.com", konu="Konu", metin="Metin")
+
+    def _sayfalar(self):
+        yollar = [
+            reverse(f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist")
+            for model in admin_site._registry
+        ]
+        yollar += [reverse("admin:rezervasyon_randevu_add"), reverse("admin:rezervasyon_ariza_add")]
+        sayilar = {}
+        for yol in yollar:
+            ContentType.objects.clear_cache()
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(yol)
+            self.assertEqual(response.status_code, 200, yol)
+            sayilar[yol] = len(ctx.captured_queries)
+        return sayilar
+
+    def test_sorgu_sayisi_satir_sayisindan_bagimsiz(self):
+        self._veri_ekle(2)
+        az = self._sayfalar()
+        self._veri_ekle(6)
+        self.assertEqual(self._sayfalar(), az)
+
+    def test_annotasyonlu_sutunlar(self):
+        self._veri_ekle(1)
+        lab = LaboratuvarAdmin(Laboratuvar, admin_site).get_queryset(None).get()
+        self.assertEqual((lab.cihaz_toplam, lab.aktif_cihaz), (2, 1))
+        cihazlar = CihazAdmin(Cihaz, admin_site).get_queryset(None).order_by("isim")
+        self.assertEqual([c.son_ariza_aciklama for c in cihazlar], [None, "Bozuk"])
+
+
+class CihazSonArizaTestleri(TestCase):
+    """Cihaz.objects.with_son_ariza() son açık arıza notunu cihaz başına sorgusuz verir."""
+
+    def setUp(self):
+        kullanici = User.objects.create_user(username="u", password="x")
+        lab = Laboratuvar.objects.create(isim="Lab")
+        self.arizali = Cihaz.objects.create(lab=lab, isim="A", aktif_mi=False)
+        self.saglam = Cihaz.objects.create(lab=lab, isim="B")
+        for aciklama, cozuldu in (("Eski", False), ("Yeni", False), ("Cozuldu", True)):
+            Ariza.objects.create(cihaz=self.arizali, kullanici=kullanici, aciklama=aciklama, cozuldu_mu=cozuldu)
+        Ariza.objects.create(cihaz=self.saglam, kullanici=kullanici, aciklama="Eski", cozuldu_mu=True)
+
+    def test_annotasyon_ve_yedek_sorgu_ayni_sonucu_verir(self):
+        with self.assertNumQueries(1):
+            notlar = [c.son_ariza_notu for c in Cihaz.objects.with_son_ariza().order_by("isim")]
+        self.assertEqual(notlar[0], "Yeni")
+        self.assertEqual(notlar, [c.son_ariza_notu for c in Cihaz.objects.order_by("isim")])
+
+    def test_arizali_cihaz_listesi(self):
+        self.client.force_login(User.objects.create_user(username="admin", password="x", is_staff=True))
+        response = self.client.get(reverse("arizali_cihaz_listesi"))
+        self.assertEqual(
+            [c.son_ariza_notu for c in response.context["cihazlar"]],
+            ["Yeni", "Manuel pasife alındı veya not yok."],
+        )
+
+
+class TopluKullaniciAksiyonTestleri(TestCase):
+    """Kullanıcı admin aksiyonları set tabanlı UPDATE ile, sabit sorguyla çalışır."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username="admin", password="x", email="a@a.com")
+        self.client.force_login(self.admin)
+
+    def _ogrenciler(self, adet):
+        n = User.objects.count()
+        return [User.objects.create_user(username=f"o{n + i}", is_active=False) for i in range(adet)]
+
+    def _aksiyon(self, aksiyon, kullanicilar, model="auth_user"):
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse(f"admin:{model}_changelist"),
+                {"action": aksiyon, "_selected_action": [k.pk for k in kullanicilar]},
+            )
+        self.assertEqual(response.status_code, 302)
+        return len(ctx.captured_queries)
+
+    def test_aktif_yap_sorgu_sayisi_sabit(self):
+        ilk = self._ogrenciler(2)
+        ogrenciler = self._ogrenciler(20)
+        self.assertEqual(badge_sayaclari()["pasif_ogrenci"], 22)
+        az = self._aksiyon("aktif_yap", ilk, "rezervasyon_onaybekleyenler")
+        surum = versiyon(f"kullanici:{ogrenciler[0].pk}")
+        cok = self._aksiyon("aktif_yap", ogrenciler, "rezervasyon_onaybekleyenler")
+        self.assertEqual(az, cok)
+        self.assertFalse(User.objects.filter(is_active=False).exists())
+        self.assertFalse(Profil.objects.exclude(user=self.admin).exclude(status="aktif_kullanici").exists())
+        self.assertEqual(badge_sayaclari()["pasif_ogrenci"], 0)
+        self.assertGreater(versiyon(f"kullanici:{ogrenciler[0].pk}"), surum)
+
+    def test_pasif_yap_yonetici_kurallari(self):
+        ikinci = User.objects.create_superuser(username="admin2", password="x", email="b@a.com")
+        ogrenci = User.objects.create_user(username="ogrenci")
+        badge_sayaclari()
+        self._aksiyon("pasif_yap", [self.admin, ikinci, ogrenci])
+        self.assertTrue(User.objects.get(pk=self.admin.pk).is_active)
+        self.assertFalse(User.objects.get(pk=ikinci.pk).is_active)
+        self.assertEqual(Profil.objects.get(user=ogrenci).status, "pasif_kullanici")
+        self.assertEqual(badge_sayaclari()["pasif_ogrenci"], 2)
+
+        # Son aktif superuser (admin) ve kendisi korunur; ikinci pasif olduğundan yetkisi alınamaz.
+        self._aksiyon("yetkiyi_al", [self.admin, ikinci])
+        self.assertEqual(User.objects.filter(is_superuser=True).count(), 2)
+
+        yeni = User.objects.create_user(username="yeni")
+        self._aksiyon("super_kullanici_yap", [yeni])
+        self.assertTrue(User.objects.get(pk=yeni.pk).is_superuser)
+        self._aksiyon("yetkiyi_al", [yeni, ikinci])
+        self.assertFalse(User.objects.get(pk=yeni.pk).is_staff)
+        self.assertEqual(list(User.objects.filter(is_superuser=True)), [self.admin])
+
+    def test_profil_aksiyonlari(self):
+        ogrenciler = self._ogrenciler(3)
+        profiller = Profil.objects.filter(user__in=ogrenciler + [self.admin])
+        self._aksiyon("studentleri_aktif_et", profiller, "rezervasyon_profil")
+        self.assertEqual(User.objects.filter(is_active=True).count(), 4)
+        self._aksiyon("studentleri_iptal_et", profiller, "rezervasyon_profil")
+        self.assertTrue(User.objects.get(pk=self.admin.pk).is_active)
+        self.assertEqual(Profil.objects.filter(status="iptal").count(), 3)
+        self.assertEqual(User.objects.filter(is_active=False).count(), 3)
+
+
+class GirisBackendTestleri(TestCase):
+    """EmailOrUsernameModelBackend kullanıcı adı/e-postayı tek, indeksli sorguda arar."""
+
+    def setUp(self):
+        self.backend = EmailOrUsernameModelBackend()
+        self.ali = User.objects.create_user(username="Ali", email="ali@ornek.com", password="x")
+
+    def _giris(self, kimlik, sifre="x"):
+        with CaptureQueriesContext(connection) as ctx:
+            user = self.backend.authenticate(None, username=kimlik, password=sifre)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        return user, ctx.captured_queries[0]["sql"]
+
+    def test_kullanici_adi_veya_eposta_tek_sorguda(self):
+        self.assertEqual(self._giris(" aLi ")[0], self.ali)
+        self.assertEqual(self._giris("ALI@ornek.com")[0], self.ali)
+        self.assertIsNone(self._giris("ali", "yanlis")[0])
+        self.assertIsNone(self._giris("yok@ornek.com")[0])
+
+    def test_kullanici_adi_eslesmesi_oncelikli(self):
+        diger = User.objects.create_user(username="ali@ornek.com", password="y")
+        self.assertEqual(self._giris("ALI@ornek.com", "y")[0], diger)
+        # Kullanıcı adı eşleşmeyen ve birden fazla hesapta olan e-posta belirsizdir.
+        User.objects.create_user(username="veli", email="ortak@ornek.com", password="x")
+        User.objects.create_user(username="ayse", email="Ortak@ornek.com", password="x")
+        self.assertIsNone(self._giris("ortak@ornek.com")[0])
+
+    @skipUnless(connection.vendor == "sqlite", "Sorgu planı testi SQLite'a özgüdür.")
+    def test_lower_indeksleri_kullanilir(self):
+        _, sql = self._giris("ali")
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plan = " ".join(str(satir[-1]) for satir in cursor.fetchall())
+        self.assertIn("auth_user_lower_username_idx", plan)
+        self.assertIn("auth_user_lower_email_idx", plan)
+
+
+class HataliEpostaBackend(BaseEmailBackend):
+    """Her gönderimde hata veren test backend'i."""
+
+    def send_messages(self, email_messages):
+        raise OSError("SMTP kapalı")
+
+
+class EpostaKuyruguTestleri(TestCase):
+    """E-postalar istek içinde gönderilmez; işçi partiler halinde gönderir."""
+
+    def test_sifre_sifirlama_kuyruga_yazar_istekte_gondermez(self):
+        User.objects.create_user(username="ogrenci", password="x", email="ogrenci@example.com")
+        response = self.client.post(reverse("password_reset"), {"email": "ogrenci@example.com"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EpostaKuyrugu.objects.get().alici, "ogrenci@example.com")
+
+    def test_parti_tek_baglantiyla_gonderilir(self):
+        eposta.eposta_kuyruga_ekle([f"u{i}@example.com" for i in range(5)], "Konu", "Metin", "<p>Metin</p>")
+        with mock.patch.object(eposta, "get_connection", wraps=eposta.get_connection) as baglanti:
+            self.assertEqual(eposta.kuyrugu_isle(), (5, 0))
+        self.assertEqual(baglanti.call_count, 1)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+        self.assertEqual(EpostaKuyrugu.objects.filter(durum=EpostaKuyrugu.GONDERILDI).count(), 5)
+        self.assertEqual(eposta.kuyrugu_isle(), (0, 0))
+
+    @override_settings(EMAIL_BACKEND="rezervasyon.tests.HataliEpostaBackend")
+    def test_hata_artan_beklemeyle_tekrar_denenir(self):
+        eposta.eposta_kuyruga_ekle("u@example.com", "Konu", "Metin")
+        self.assertEqual(eposta.kuyrugu_isle(), (0, 1))
+        kayit = EpostaKuyrugu.objects.get()
+        self.assertEqual((kayit.durum, kayit.deneme_sayisi), (EpostaKuyrugu.BEKLIYOR, 1))
+        self.assertGreater(kayit.sonraki_deneme, timezone.now())
+        # Bekleme süresi dolmadan tekrar alınmaz
+        self.assertEqual(eposta.kuyrugu_isle(), (0, 0))
+
+        EpostaKuyrugu.objects.update(deneme_sayisi=eposta.EPOSTA_MAX_DENEME - 1, sonraki_deneme=timezone.now())
+        eposta.kuyrugu_isle()
+        kayit.refresh_from_db()
+        self.assertEqual(kayit.durum, EpostaKuyrugu.BASARISIZ)
+        self.assertIn("SMTP kapalı", kayit.son_hata)
+
+
+class PdfFontOnbellekTestleri(TestCase):
+    """Fontlar surec basina bir kez hazirlanir; PDF uretimi font dosyasi okumaz."""
+
+    def test_ikinci_pdf_font_dosyasi_okumaz_ve_fontu_gomer(self):
+        if not utils.pdf_varliklarini_hazirla():
+            self.skipTest("DejaVuSans.ttf bulunamadi.")
+        context = {"user": User(username="pdf"), "randevular": []}
+        with mock.patch.object(utils, "register_fonts") as kayit, \
+                mock.patch.object(utils, "_find_font_path") as arama:
+            response = utils.render_to_pdf("randevu_pdf.html", context)
+        kayit.assert_not_called()
+        arama.assert_not_called()
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        # Aile adi xhtml2pdf varsayilan tablosundan cozulur: kayitli TTF gercekten
+        # gomulur (Helvetica'ya dusmez). Gomulu ad dosyanin ic adidir.
+        gomulu_ad = pdfmetrics.getFont("DejaVuSans").face.name
+        self.assertIn(b"+" + gomulu_ad, response.content)
+
+
+@override_settings(PDF_RAPOR_ISCI_SAYISI=0)
+class PdfRaporTestleri(TestCase):
+    """PDF raporu (kullanıcı, içerik özeti) anahtarıyla bir kez üretilip dosyadan sunulur."""
+
+    def setUp(self):
+        medya = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, medya, True)
+        ayar = override_settings(MEDIA_ROOT=medya)
+        ayar.enable()
+        self.addCleanup(ayar.disable)
+        self.user = User.objects.create_user(username="rapor", password="x")
+        self.cihaz = Cihaz.objects.create(lab=Laboratuvar.objects.create(isim="Lab"), isim="Cihaz")
+        self._randevu(date(2026, 6, 1))
+        self.client.force_login(self.user)
+
+    def _randevu(self, tarih):
+        return Randevu.objects.create(
+            kullanici=self.user, cihaz=self.cihaz, tarih=tarih,
+            baslangic_saati=time(10, 0), bitis_saati=time(11, 0),
+        )
+
+    def _pdf_mi(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+
+    def _dosyalar(self):
+        return sorted(os.listdir(pdf_rapor.rapor_dizini(self.user.id)))
+
+    def test_ikinci_indirme_onbellekten_sunulur(self):
+        with mock.patch.object(pdf_rapor, "pdf_dosyasi_uret", wraps=pdf_rapor.pdf_dosyasi_uret) as uret:
+            self._pdf_mi(self.client.get(reverse("randevu_pdf_indir")))
+            self._pdf_mi(self.client.get(reverse("randevu_pdf_indir")))
+        self.assertEqual(uret.call_count, 1)
+        self.assertEqual(len(self._dosyalar()), 1)
+
+    def test_veri_degisince_yeni_rapor_uretilir_eskisi_silinir(self):
+        self.client.get(reverse("randevu_pdf_indir"))
+        eski = self._dosyalar()
+        self._randevu(date(2026, 6, 2))
+        self._pdf_mi(self.client.get(reverse("randevu_pdf_indir")))
+        yeni = self._dosyalar()
+        self.assertEqual(len(yeni), 1)
+        self.assertNotEqual(eski, yeni)
+
+    @override_settings(PDF_RAPOR_ISCI_SAYISI=2)
+    def test_havuzda_uretim_ve_yoklama(self):
+        gelecek = mock.Mock()
+        with mock.patch.object(pdf_rapor, "_havuza_gonder", return_value=gelecek) as gonder:
+            response = self.client.get(reverse("randevu_pdf_indir"))
+            # Is bitmeden gelen ikinci istek isi tekrar kuyruga almaz.
+            self.client.get(reverse("randevu_pdf_indir"))
+        self.assertTemplateUsed(response, "rapor_bekleniyor.html")
+        self.assertEqual(gonder.call_count, 1)
+        anahtar = response.context["anahtar"]
+        durum_url = reverse("randevu_pdf_durum", args=[anahtar])
+        self.assertEqual(self.client.get(durum_url).json(), {"durum": "hazirlaniyor"})
+
+        # Isci sureci: isi calistir ve tamamlanma geri cagrisini tetikle.
+        fonksiyon, context, hedef = gonder.call_args.args
+        fonksiyon(context, hedef)
+        gelecek.exception.return_value = None
+        gelecek.add_done_callback.call_args.args[0](gelecek)
+
+        veri = self.client.get(durum_url).json()
+        self.assertEqual(veri["durum"], "hazir")
+        self._pdf_mi(self.client.get(veri["url"]))
+
+    def test_baska_kullanicinin_raporu_indirilemez(self):
+        self.client.get(reverse("randevu_pdf_indir"))
+        anahtar = self._dosyalar()[0].split(".")[0]
+        baska = User.objects.create_user(username="baska", password="x")
+        self.client.force_login(baska)
+        self.assertEqual(self.client.get(reverse("randevu_pdf_dosya", args=[anahtar])).status_code, 404)
+        self.assertEqual(self.client.get(reverse("randevu_pdf_durum", args=[anahtar])).json(), {"durum": "yok"})
+        self.assertEqual(self.client.get(reverse("randevu_pdf_durum", args=["gecersiz"])).status_code, 404)
@@ -1,14 +1,23 @@
 import os
 import logging
+import threading
 from django.conf import settings
 from django.http import HttpResponse
 from django.template.loader import get_template
+from xhtml2pdf import default as pisa_default
 from xhtml2pdf import pisa
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
 logger = logging.getLogger(__name__)
 
+# TURKCE ARAMA: pdf font onbellegi, font kaydi bir kez, pdf varliklari
+# Süreç (process) düzeyinde PDF varlık önbelleği: fontlar süreç başına BİR
+# kez diskten okunup kaydedilir (RezervasyonConfig.ready). Sonraki her PDF
+# üretimi dosya okuma, font ayrıştırma ve base64 kodlama yapmaz.
+_pdf_varliklari = {"hazir": False, "font_var": False}
+_pdf_kilidi = threading.Lock()
+
 
 def _find_font_path(filename):
     """Font dosyasını birden fazla konumda ara, bulunan ilk mutlak yolu döndür."""
@@ -78,40 +87,38 @@ def link_callback(uri, rel):
     return uri
 
 
+def pdf_varliklarini_hazirla():
+    """PDF fontlarını süreç başına bir kez kaydeder (idempotent, thread-safe).
+
+    DejaVuSans reportlab'e kaydedilir ve xhtml2pdf'nin varsayılan font
+    tablosuna eklenir; böylece her belge `font-family: DejaVuSans` adını
+    doğrudan çözer, HTML'e @font-face/base64 gömmek gerekmez.
+    Dönüş: font kullanılabilir mi (bool).
+    """
+    if _pdf_varliklari["hazir"]:
+        return _pdf_varliklari["font_var"]
+    with _pdf_kilidi:
+        if not _pdf_varliklari["hazir"]:
+            font_var = register_fonts()
+            if font_var:
+                pisa_default.DEFAULT_FONT["dejavusans"] = "DejaVuSans"
+            else:
+                logger.warning("PDF Font: DejaVuSans.ttf bulunamadı, Türkçe karakterler bozuk görünebilir.")
+            _pdf_varliklari["font_var"] = font_var
+            _pdf_varliklari["hazir"] = True
+    return _pdf_varliklari["font_var"]
+
+
 def render_to_pdf(template_src="randevu_pdf.html", context_dict=None, filename="BookLab_rapor.pdf"):
     if context_dict is None:
         context_dict = {}
 
-    import base64
-    register_fonts()
+    # Normalde ready() içinde hazırlanmıştır; burada yalnızca bayrak kontrolü.
+    pdf_varliklarini_hazirla()
 
     template = get_template(template_src)
     html = template.render(context_dict)
 
-    # Fontu base64 olarak gömüyoruz — xhtml2pdf'de Windows yol sorunu yaşamamak için
-    # link_callback üzerinden dosya yolu yerine data URI kullanıyoruz.
-    font_path = _find_font_path("DejaVuSans.ttf")
-    if font_path:
-        with open(font_path, "rb") as f:
-            font_b64 = base64.b64encode(f.read()).decode("ascii")
-        font_css = (
-            "<style>\n"
-            "@font-face {\n"
-            "    font-family: 'DejaVuSans';\n"
-            f"    src: url(\"data:font/truetype;base64,{font_b64}\");\n"
-            "    font-weight: normal;\n"
-            "}\n"
-            "@font-face {\n"
-            "    font-family: 'DejaVuSans';\n"
-            f"    src: url(\"data:font/truetype;base64,{font_b64}\");\n"
-            "    font-weight: bold;\n"
-            "}\n"
-            "</style>"
-        )
-        html = html.replace("</head>", font_css + "\n</head>", 1)
-    else:
-        logger.warning("PDF Font: DejaVuSans.ttf bulunamadı, Türkçe karakterler bozuk görünebilir.")
-
     response = HttpResponse(content_type="application/pdf")
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
 
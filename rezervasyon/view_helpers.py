@@ -1,16 +1,22 @@
 # TURKCE ARAMA: ortak view yardimcilari, dogrulama kodu, cakisma kontrolu
 
 import secrets
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Q
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from django.utils.html import strip_tags
 
-from .models import Randevu
+from .badge import badge_degisikligi
+from .eposta import eposta_kuyruga_ekle
+from .models import Profil, Randevu, cihaz_kilidi
+from .onbellek import istatistik_onbellegini_temizle, kapsamlari_artir
+from .ozet import ozet_gunlerini_yeniden_hesapla
 
 MAX_RANDEVU_SAATI = getattr(settings, "MAX_RANDEVU_SAATI", 24)
 IPTAL_MIN_SURE_SAAT = getattr(settings, "IPTAL_MIN_SURE_SAAT", 0)
@@ -38,7 +44,7 @@ def kod_suresi_doldu_mu(olusturma_str):
 
 
 def dogrulama_maili_gonder(email, kod, isim=""):
-    """TURKCE ARAMA: kayit ve email degisikligi dogrulama maili - HTML destekli."""
+    """TURKCE ARAMA: kayit ve email degisikligi dogrulama maili - HTML destekli, kuyruga yazilir."""
     ad = isim or "BookLab kullanıcısı"
     
     # HTML şablonu render et
@@ -54,17 +60,8 @@ def dogrulama_maili_gonder(email, kod, isim=""):
     # Düz metin versiyonu oluştur
     text_content = strip_tags(html_content)
     
-    # Email nesnesini oluştur
-    email_obj = EmailMultiAlternatives(
-        subject="BookLab - E-posta Doğrulama Kodu",
-        body=text_content,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[email],
-    )
-    
-    # HTML versiyonunu ekle
-    email_obj.attach_alternative(html_content, "text/html")
-    email_obj.send(fail_silently=False)
+    # Kuyruğa yaz; gönderimi `eposta_gonder` işçisi yapar (istek SMTP'yi beklemez).
+    eposta_kuyruga_ekle(email, "BookLab - E-posta Doğrulama Kodu", text_content, html_content)
 
 
 def check_overlap(cihaz, tarih, baslangic, bitis, exclude_id=None):
@@ -72,11 +69,16 @@ def check_overlap(cihaz, tarih, baslangic, bitis, exclude_id=None):
 
     NOT: Cakisma SADECE cihaz bazlidir. Ayni kullanici ayni anda farkli
     cihazlara randevu alabilir; yalniz ayni cihaz icin tek randevu kuralidir.
+
+    Tek aday icin tek sorgu calistirir. Birden cok aday (toplu_randevu slot
+    secimi) icin `doluluk.AralikIndeksi` kullanin: gunun araliklarini tek
+    sorguda yukler, her adayi ikili aramayla ayni (dakika hassasiyetinde)
+    kurala gore kontrol eder.
     """
     qs = Randevu.objects.filter(
         cihaz=cihaz,
         tarih=tarih,
-        durum__in=[Randevu.ONAY_BEKLENIYOR, Randevu.ONAYLANDI, Randevu.GELDI],
+        durum__in=Randevu.AKTIF_DURUMLAR,
         baslangic_saati__lt=bitis,
         bitis_saati__gt=baslangic,
     )
@@ -85,6 +87,31 @@ def check_overlap(cihaz, tarih, baslangic, bitis, exclude_id=None):
     return qs.exists()
 
 
+def randevu_olustur(kullanici, cihaz, tarih, baslangic, bitis, **alanlar):
+    """TURKCE ARAMA: eszamanli guvenli randevu olusturma.
+
+    Cihaz satirini kilitleyip cakismayi kontrol eder ve randevuyu ayni
+    transaction icinde kaydeder; ayni slota ayni anda gelen istekler sirayla
+    islenir ve yalnizca biri kazanir. Cakisma varsa None, yoksa olusan
+    Randevu doner. Ek model alanlari (durum, onaylayan_admin...) `alanlar`
+    ile verilir.
+    """
+    with cihaz_kilidi(cihaz.pk):
+        if check_overlap(cihaz, tarih, baslangic, bitis):
+            return None
+        randevu = Randevu(
+            kullanici=kullanici,
+            cihaz=cihaz,
+            tarih=tarih,
+            baslangic_saati=baslangic,
+            bitis_saati=bitis,
+            **alanlar,
+        )
+        # Cakisma kilit altinda kontrol edildi; save() ayni sorguyu tekrarlamaz.
+        randevu.save(cakisma_kontrolu=False)
+        return randevu
+
+
 def saat_yuvarla(dt, slot_dakika=SLOT_DAKIKA):
     """TURKCE ARAMA: saat yuvarlama, 10 dakikalik dilim.
 
@@ -98,7 +125,7 @@ def saat_yuvarla(dt, slot_dakika=SLOT_DAKIKA):
     return dt.replace(minute=yuvarlanmis, second=0, microsecond=0)
 
 
-def otomatik_geldi_isaretle():
+def otomatik_geldi_isaretle(son_calisma=None):
     """TURKCE ARAMA: otomatik geldi, 48 saat kurali.
 
     Bitiminden `OTOMATIK_GELDI_SURESI_SAAT` saatten fazla gecmis ve hala
@@ -108,26 +135,152 @@ def otomatik_geldi_isaretle():
     Yonetici daha sonra istedigi zaman "gelmedi"ye cevirebilir; bu fonksiyon
     yalnizca "onaylandi" durumundakilere dokunur, idempotenttir.
 
+    Tek bir set-based UPDATE calistirir: tarih + bitis saati birlesimi SQL
+    tarafinda sinirla karsilastirilir (satirlar Python'a cekilmez).
+    `son_calisma` (onceki calismanin zamani) verilirse, o calismada zaten
+    islenmis gunler taranmaz; `otomatik_geldi` komutu bu filigrani tutar.
+    O calismadan sonra degisen randevular (`guncellenme_zamani`) ise tarihine
+    bakilmadan yine taranir: gec onaylanan ya da toplu islemle "onaylandi"ya
+    geri alinan eski bir randevu boylece kacmaz.
+
     Donus: guncellenen randevu sayisi (int).
     """
     simdi = timezone.now()
-    sinir = simdi - timedelta(hours=OTOMATIK_GELDI_SURESI_SAAT)
-
-    # Kaba on filtre: en gec sinir tarihinde ya da oncesinde olan randevular.
-    # (Gun ici saat kontrolu Python tarafinda kesinlestirilir.)
-    adaylar = Randevu.objects.filter(
-        durum=Randevu.ONAYLANDI,
-        tarih__lte=sinir.date(),
-    ).only("id", "tarih", "bitis_saati")
-
-    guncellenecek_ids = []
-    for r in adaylar:
-        bitis_dt = datetime.combine(r.tarih, r.bitis_saati)
-        if timezone.is_naive(bitis_dt):
-            bitis_dt = timezone.make_aware(bitis_dt)
-        if bitis_dt + timedelta(hours=OTOMATIK_GELDI_SURESI_SAAT) <= simdi:
-            guncellenecek_ids.append(r.id)
-
-    if not guncellenecek_ids:
-        return 0
-    return Randevu.objects.filter(id__in=guncellenecek_ids).update(durum=Randevu.GELDI)
+    # Randevu tarih/saatleri yerel saatle (TIME_ZONE) tutulur; sinir da yerel.
+    sinir = timezone.localtime(simdi - timedelta(hours=OTOMATIK_GELDI_SURESI_SAAT))
+
+    # (tarih, bitis_saati) <= (sinir_tarihi, sinir_saati)
+    qs = Randevu.objects.filter(durum=Randevu.ONAYLANDI).filter(
+        Q(tarih__lt=sinir.date()) | Q(tarih=sinir.date(), bitis_saati__lte=sinir.time())
+    )
+    if son_calisma is not None:
+        onceki_sinir = timezone.localtime(son_calisma - timedelta(hours=OTOMATIK_GELDI_SURESI_SAAT))
+        qs = qs.filter(
+            Q(tarih__gte=onceki_sinir.date()) | Q(guncellenme_zamani__gte=son_calisma)
+        )
+
+    return randevulari_toplu_guncelle(qs, durum=Randevu.GELDI)
+
+
+def randevulari_toplu_guncelle(qs, **alanlar):
+    """TURKCE ARAMA: toplu durum guncelleme, set-based update.
+
+    Randevu sorgusunu tek UPDATE ile günceller ve update()'in atladığı
+    yan etkileri set tabanlı tamamlar: `guncellenme_zamani` (takvim imleci),
+    etkilenen günlerin RandevuGunlukOzet satırları, istatistik önbelleği ve
+    etkilenen laboratuvar/cihaz/kullanıcıların veri sürümleri ve yönetim
+    badge sayaçları (durum değişiyorsa).
+    Sorgu sayısı güncellenen satır sayısından bağımsızdır.
+
+    Donus: guncellenen randevu sayisi (int).
+    """
+    with transaction.atomic():
+        # Gruplar eski duruma göre sayılır; badge farkı aynı sorgudan çıkar.
+        gruplar = list(
+            qs.order_by()
+            .values_list("tarih", "cihaz__lab_id", "cihaz_id", "kullanici_id", "durum")
+            .annotate(adet=Count("id"))
+        )
+        if not gruplar:
+            return 0
+        guncellenen = qs.update(guncellenme_zamani=timezone.now(), **alanlar)
+        ozet_gunlerini_yeniden_hesapla({g[0] for g in gruplar})
+        istatistik_onbellegini_temizle()
+        kapsamlari_artir(
+            lab_idleri={g[1] for g in gruplar},
+            cihaz_idleri={g[2] for g in gruplar},
+            kullanici_idleri={g[3] for g in gruplar},
+        )
+        if "durum" in alanlar:
+            bekleyen = Randevu.ONAY_BEKLENIYOR
+            yeni_bekleyen = guncellenen if alanlar["durum"] == bekleyen else 0
+            eski_bekleyen = sum(g[5] for g in gruplar if g[4] == bekleyen)
+            badge_degisikligi(bekleyen_randevu=yeni_bekleyen - eski_bekleyen)
+    return guncellenen
+
+
+def kullanicilari_toplu_guncelle(kullanicilar, profil_durumu=None, **alanlar):
+    """TURKCE ARAMA: toplu kullanici aktif/pasif, yetki verme, set-based update.
+
+    User sorgusunu (ör. `is_active=True`) ve istenirse Profil.status'u tek
+    işlemde, kayıt başına save() yerine birer UPDATE ile günceller. Yalnızca
+    değeri gerçekten değişen satırlar yazılır. update() sinyal
+    tetiklemediğinden pasif öğrenci badge sayacı, istatistik önbelleği ve
+    etkilenen kullanıcıların veri sürümleri burada güncellenir.
+    Sorgu sayısı kullanıcı sayısından bağımsızdır.
+
+    Donus: kullanıcı ya da profili değişen kişi sayısı (int).
+    """
+    with transaction.atomic():
+        # Sorgu `is_active` gibi güncellenen bir alana göre süzülmüş olabilir;
+        # id'ler UPDATE'ten önce alınır.
+        kullanici_idleri = set(
+            kullanicilar.filter(~Q(**alanlar)).values_list("pk", flat=True)
+        ) if alanlar else set()
+        profil_idleri = set()
+        if profil_durumu is not None:
+            profil_idleri = set(
+                Profil.objects.filter(user__in=kullanicilar.order_by().values("pk"))
+                .exclude(status=profil_durumu)
+                .values_list("user_id", flat=True)
+            )
+        if not kullanici_idleri and not profil_idleri:
+            return 0
+        if profil_idleri:
+            Profil.objects.filter(user_id__in=profil_idleri).update(status=profil_durumu)
+        if kullanici_idleri:
+            guncellenen = User.objects.filter(pk__in=kullanici_idleri).update(**alanlar)
+            if "is_active" in alanlar:
+                badge_degisikligi(pasif_ogrenci=-guncellenen if alanlar["is_active"] else guncellenen)
+        istatistik_onbellegini_temizle()
+        kapsamlari_artir(kullanici_idleri=kullanici_idleri | profil_idleri)
+    return len(kullanici_idleri | profil_idleri)
+
+
+def profil_durumlarini_esitle(kullanicilar):
+    """Profil.status'u User.is_active ile eşitler.
+
+    Aktif kullanıcının profili `aktif_kullanici`, pasifleşen aktif profiller
+    `pasif_kullanici` olur; `iptal` profil kullanıcı aktifleşse de `iptal`
+    kalır (yalnızca açık `aktif_yap` aksiyonu değiştirir). Yalnızca uyuşmayan profiller
+    yazılır, eşitse tek SELECT'le döner. Donus: güncellenen profil sayısı.
+    """
+    with transaction.atomic():
+        uyusmayan = list(
+            Profil.objects.filter(user__in=kullanicilar.order_by().values("pk"))
+            .filter(
+                Q(user__is_active=True) & ~Q(status__in=("aktif_kullanici", "iptal"))
+                | Q(user__is_active=False, status="aktif_kullanici")
+            )
+            .values_list("user_id", "user__is_active")
+        )
+        if not uyusmayan:
+            return 0
+        for aktif, durum in ((True, "aktif_kullanici"), (False, "pasif_kullanici")):
+            idler = [user_id for user_id, a in uyusmayan if a is aktif]
+            if idler:
+                Profil.objects.filter(user_id__in=idler).update(status=durum)
+        istatistik_onbellegini_temizle()
+        kapsamlari_artir(kullanici_idleri={user_id for user_id, _ in uyusmayan})
+    return len(uyusmayan)
+
+
+def acik_arizalari_coz(qs):
+    """Arıza sorgusundaki açık kayıtları tek UPDATE ile çözüldü işaretler.
+
+    update() sinyal tetiklemediğinden badge sayacı, istatistik önbelleği ve
+    ilgili cihaz/lab sürümleri burada güncellenir. Donus: çözülen arıza sayısı.
+    """
+    with transaction.atomic():
+        acik = qs.filter(cozuldu_mu=False)
+        kapsamlar = list(acik.order_by().values_list("cihaz__lab_id", "cihaz_id").distinct())
+        if not kapsamlar:
+            return 0
+        cozulen = acik.update(cozuldu_mu=True)
+        badge_degisikligi(acik_ariza=-cozulen)
+        istatistik_onbellegini_temizle()
+        kapsamlari_artir(
+            lab_idleri={k[0] for k in kapsamlar},
+            cihaz_idleri={k[1] for k in kapsamlar},
+        )
+    return cozulen
@@ -8,11 +8,21 @@ aktarir.
 
 from .views_auth import CustomLoginView, kayit, email_dogrulama, sifre_sifirla_talep, kod_tekrar_gonder
 from .views_public import anasayfa, lab_detay, istatistikler
-from .views_calendar import genel_takvim, tum_events_api, lab_takvim, lab_events_api
-from .views_randevu import randevu_al, randevularim, randevu_pdf_indir, randevu_iptal
+from .views_calendar import (
+    genel_takvim,
+    tum_events_api,
+    atum_events_api,
+    lab_takvim,
+    lab_events_api,
+    alab_events_api,
+    lab_musaitlik_api,
+)
+from .views_randevu import randevu_al, randevularim, randevu_pdf_indir, randevu_pdf_durum, randevu_pdf_dosya, randevu_iptal
 from .views_profile import profil_duzenle, email_degisim_dogrulama
 from .views_management import (
     onay_bekleyen_sayisi,
+    aonay_bekleyen_sayisi,
+    badge_akisi,
     egitmen_paneli,
     gunluk_yoklama,
     durum_guncelle,
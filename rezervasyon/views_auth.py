@@ -26,6 +26,7 @@ from django.utils.html import strip_tags
 from django.utils.http import urlsafe_base64_encode, url_has_allowed_host_and_scheme
 from django.views.decorators.http import require_POST
 
+from .eposta import eposta_kuyruga_ekle
 from .forms import (
     KullaniciGuncellemeFormu,
     ProfilGuncellemeFormu,
@@ -166,17 +167,13 @@ def sifre_sifirla_talep(request):
             # 2. Düz Metin Halini Oluştur
             text_content = strip_tags(html_content)
 
-            # 3. E-posta Nesnesini Oluştur
-            email_obj = EmailMultiAlternatives(
-                subject="Booklab Laboratuvar Rezervasyon Sistemi | Şifre Sıfırlama",
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[user.email],
+            # 3. Kuyruğa Yaz (gönderimi `eposta_gonder` işçisi yapar)
+            eposta_kuyruga_ekle(
+                user.email,
+                "Booklab Laboratuvar Rezervasyon Sistemi | Şifre Sıfırlama",
+                text_content,
+                html_content,
             )
-
-            # 4. HTML Versiyonunu Ekle ve Gönder
-            email_obj.attach_alternative(html_content, "text/html")
-            email_obj.send()
             
 
             messages.success(request, "✅ Şifre sıfırlama bağlantısı e-posta adresinize gönderildi.")
@@ -3,7 +3,7 @@
 
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 
 from django.conf import settings
 from django.contrib import messages
@@ -12,18 +12,22 @@ from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
 from django.core.mail import EmailMultiAlternatives
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction
 from django.db.models import Count, Q
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils.encoding import force_bytes
 from django.utils.html import strip_tags
+from django.utils.cache import get_conditional_response
 from django.utils.http import urlsafe_base64_encode, url_has_allowed_host_and_scheme
-from django.views.decorators.http import require_POST
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
 
 from .forms import (
     KullaniciGuncellemeFormu,
@@ -32,7 +36,11 @@ from .forms import (
     KayitFormu,
     EmailOrUsernameAuthenticationForm,
 )
-from .models import Laboratuvar, Cihaz, Randevu, Profil, Duyuru, Ariza
+from .doluluk import GUN_SLOT_SAYISI, GunDolulugu, doluluklari_yukle
+from .models import Laboratuvar, Cihaz, Randevu, Profil, Duyuru, Ariza, SilinenRandevu
+from .onbellek import (
+    TAKVIM_ONBELLEK_SANIYE, atakvim_surumu, onbellek_paylasimli_mi, takvim_etag, takvim_surumu,
+)
 from .utils import render_to_pdf
 from .view_helpers import (
     EMAIL_DOGRULAMA_KOD_SURESI_DAKIKA,
@@ -41,10 +49,27 @@ from .view_helpers import (
     kod_suresi_doldu_mu,
     dogrulama_maili_gonder,
     check_overlap,
+    MAX_RANDEVU_SAATI,
+    SLOT_DAKIKA,
 )
 
 logger = logging.getLogger(__name__)
 
+# Event API'leri start/end gelmezse bugünün etrafındaki bu pencereyi döndürür;
+# tek istekte dönebilecek pencere de TAKVIM_MAX_PENCERE_GUN ile sınırlıdır.
+TAKVIM_VARSAYILAN_GERI_GUN = getattr(settings, "TAKVIM_VARSAYILAN_GERI_GUN", 31)
+TAKVIM_VARSAYILAN_ILERI_GUN = getattr(settings, "TAKVIM_VARSAYILAN_ILERI_GUN", 62)
+TAKVIM_MAX_PENCERE_GUN = getattr(settings, "TAKVIM_MAX_PENCERE_GUN", 366)
+# Artımlı sorgu imleci bu kadar geriden karşılaştırılır. `guncellenme_zamani`
+# kayıt anında (commit'ten önce) yazıldığından, uzun süren bir işlemin satırı
+# istemcinin aldığı imleçten daha eski damgayla görünür hale gelebilir; pay en
+# uzun yazma işleminden (SQLite kilit beklemesi dahil) büyük olmalıdır.
+TAKVIM_IMLEC_PAYI_SANIYE = getattr(settings, "TAKVIM_IMLEC_PAYI_SANIYE", 60)
+
+# Müsaitlik aramasının tek istekte tarayabileceği gün ve dönebileceği pencere sayısı.
+MUSAITLIK_MAX_GUN = getattr(settings, "MUSAITLIK_MAX_GUN", 31)
+MUSAITLIK_MAX_ADET = getattr(settings, "MUSAITLIK_MAX_ADET", 50)
+
 # TURKCE ARAMA: takvim, fullcalendar, event api, cihaz takvimi
 @login_required
 def genel_takvim(request):
@@ -55,40 +80,269 @@ def genel_takvim(request):
     return render(request, "genel_takvim.html", {"cihazlar_json": cihazlar_json})
 
 
+def _takvim_penceresi(request):
+    """FullCalendar'ın gönderdiği `start`/`end` parametrelerini tarih aralığına çevirir.
+
+    Dönüş: (baslangic, bitis) — `bitis` hariçtir (FullCalendar ile aynı anlam).
+    Parametre yoksa bugünü içeren varsayılan pencere kullanılır; pencere en fazla
+    TAKVIM_MAX_PENCERE_GUN gün olabilir. Hatalı değerde ValueError fırlatır.
+    """
+    def _tarih(deger):
+        dt = parse_datetime(deger)
+        if dt is not None:
+            # Gün ortasında biten pencere o günü de kapsamalı.
+            return dt.date(), dt.time() != time.min
+        d = parse_date(deger[:10])
+        if d is None:
+            raise ValueError(deger)
+        return d, False
+
+    bugun = timezone.localdate()
+    start = request.GET.get("start")
+    end = request.GET.get("end")
+
+    baslangic = _tarih(start)[0] if start else bugun - timedelta(days=TAKVIM_VARSAYILAN_GERI_GUN)
+    if end:
+        bitis, gun_ici = _tarih(end)
+        if gun_ici:
+            bitis += timedelta(days=1)
+    else:
+        bitis = bugun + timedelta(days=TAKVIM_VARSAYILAN_ILERI_GUN)
+
+    if bitis <= baslangic:
+        raise ValueError("end <= start")
+    if (bitis - baslangic).days > TAKVIM_MAX_PENCERE_GUN:
+        bitis = baslangic + timedelta(days=TAKVIM_MAX_PENCERE_GUN)
+    return baslangic, bitis
+
+
+def _guncelleme_imleci(request):
+    """`updated_since` imlecini aware datetime olarak döndürür (yoksa None)."""
+    deger = request.GET.get("updated_since")
+    if not deger:
+        return None
+    # Sorgu dizesinde kaçırılmamış "+" boşluğa döner (…T10:00:00 03:00).
+    dt = parse_datetime(deger) or parse_datetime(deger.replace(" ", "+"))
+    if dt is None:
+        raise ValueError(deger)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def _takvim_randevulari(baslangic, bitis, imlec, **filtre):
+    """Pencere + imleç filtrelerini uygulanmış Randevu sorgusu ve yeni imleç.
+
+    İmleç verilmişse (artımlı sorgu) iptal/red dahil TÜM durumlar döner ki
+    istemci takvimden kalkması gereken kayıtları da öğrenebilsin. İmleç
+    TAKVIM_IMLEC_PAYI_SANIYE kadar geriden karşılaştırılır; pay içindeki
+    kayıtlar tekrar gelebilir, istemci `id` ile üzerine yazar.
+    """
+    # Yeni imleç sorgudan ÖNCE alınır: sorgu sırasında yazılan kayıt bir
+    # sonraki artımlı istekte tekrar gelir, kaybolmaz.
+    yeni_imlec = timezone.now()
+
+    qs = Randevu.objects.filter(tarih__gte=baslangic, tarih__lt=bitis, **filtre)
+    if imlec is None:
+        qs = qs.filter(durum__in=Randevu.AKTIF_DURUMLAR)
+    else:
+        qs = qs.filter(guncellenme_zamani__gt=imlec - timedelta(seconds=TAKVIM_IMLEC_PAYI_SANIYE))
+    # Sabit sıra: aynı veri her zaman aynı baytları üretir (güçlü ETag).
+    return qs.order_by("tarih", "baslangic_saati", "id"), yeni_imlec
+
+
+def _silinen_randevular(baslangic, bitis, imlec, lab_id):
+    """Artımlı sorgu için imleçten (payıyla) sonra silinen randevu id'leri."""
+    qs = SilinenRandevu.objects.filter(
+        tarih__gte=baslangic, tarih__lt=bitis,
+        silinme_zamani__gt=imlec - timedelta(seconds=TAKVIM_IMLEC_PAYI_SANIYE),
+    )
+    if lab_id is not None:
+        qs = qs.filter(lab_id=lab_id)
+    return qs.order_by("silinme_zamani", "id").values_list("randevu_id", flat=True)
+
+
+def _silinen_event(randevu_id):
+    # Silinen kayıt için iz (tombstone): istemci bu id'yi takvimden kaldırır.
+    return {'id': randevu_id, 'extendedProps': {'aktif': False, 'silindi': True}}
+
+
+def _imlec_eski_mi(imlec):
+    return imlec < timezone.now() - timedelta(days=SilinenRandevu.SAKLAMA_GUN)
+
+
+def _eski_imlec_yaniti():
+    return JsonResponse(
+        {"error": "updated_since çok eski; tam pencereyi yeniden yükleyin."}, status=410,
+    )
+
+
+def _event_json(events, yeni_imlec):
+    response = JsonResponse(events, safe=False)
+    response["X-Updated-Until"] = yeni_imlec.isoformat()
+    return response
+
+
+def _takvim_etag(request, lab_id=None):
+    """`condition` için ETag; yalnızca imleçsiz (tam pencere) isteklerde üretilir.
+
+    Önbellek işçiler arasında paylaşılmıyorsa üretilmez: sürüm başka bir
+    işçideki yazmayla artmayacağından eski ETag yanlışlıkla 304 alırdı.
+    """
+    if request.GET.get("updated_since") or not onbellek_paylasimli_mi():
+        return None
+    try:
+        baslangic, bitis = _takvim_penceresi(request)
+    except ValueError:
+        return None
+    return takvim_etag(takvim_surumu(lab_id, baslangic, bitis))
+
+
+def _onbellek_yaniti(kayit, surum):
+    icerik, yeni_imlec = kayit
+    response = HttpResponse(icerik, content_type="application/json")
+    response["X-Updated-Until"] = yeni_imlec
+    response["ETag"] = takvim_etag(surum)
+    return response
+
+
+def _gecersiz_parametre_yaniti():
+    return JsonResponse({"error": "Geçersiz start/end/updated_since parametresi."}, status=400)
+
+
+def _event_yaniti(request, lab_id, sorgu_hazirla, event_uret, **filtre):
+    """TURKCE ARAMA: takvim onbellegi, event json onbellegi.
+
+    Tam pencere isteklerinde serileştirilmiş JSON (lab, pencere, veri sürümü)
+    anahtarıyla önbellekten sunulur; tekrar eden takvim görüntülemeleri
+    veritabanına gitmez. `updated_since` isteklerinde yanıt imlece bağlı
+    olduğundan, önbellek işçiler arasında paylaşılmıyorsa da sürüm
+    güvenilmez olduğundan önbellek kullanılmaz.
+    """
+    try:
+        baslangic, bitis = _takvim_penceresi(request)
+        imlec = _guncelleme_imleci(request)
+    except ValueError:
+        return _gecersiz_parametre_yaniti()
+
+    if imlec is not None:
+        if _imlec_eski_mi(imlec):
+            return _eski_imlec_yaniti()
+        qs, yeni_imlec = _takvim_randevulari(baslangic, bitis, imlec, **filtre)
+        # Önce izler, sonra kayıtlar: silinen id yeniden kullanılmışsa güncel
+        # kayıt izin üzerine yazar.
+        events = [_silinen_event(i) for i in _silinen_randevular(baslangic, bitis, imlec, lab_id)]
+        events += [event_uret(r) for r in sorgu_hazirla(qs)]
+        return _event_json(events, yeni_imlec)
+
+    if not onbellek_paylasimli_mi():
+        qs, yeni_imlec = _takvim_randevulari(baslangic, bitis, None, **filtre)
+        return _event_json([event_uret(r) for r in sorgu_hazirla(qs)], yeni_imlec)
+
+    # Sürüm sorgudan ÖNCE okunur: sorgu sırasında gelen bir yazma sayacı
+    # artırır ve bu kayıt bir sonraki istekte kullanılmaz.
+    surum = takvim_surumu(lab_id, baslangic, bitis)
+    anahtar = f"takvim:{surum}"
+    kayit = cache.get(anahtar)
+    if kayit is None:
+        qs, yeni_imlec = _takvim_randevulari(baslangic, bitis, None, **filtre)
+        events = [event_uret(r) for r in sorgu_hazirla(qs)]
+        kayit = (json.dumps(events, cls=DjangoJSONEncoder), yeni_imlec.isoformat())
+        cache.set(anahtar, kayit, TAKVIM_ONBELLEK_SANIYE)
+    return _onbellek_yaniti(kayit, surum)
+
+
+async def _aevent_yaniti(request, lab_id, sorgu_hazirla, event_uret, **filtre):
+    """`_event_yaniti` async sürümü (ASGI).
+
+    Önbellek ve sürüm okumaları async cache API'siyle, sorgu async ORM ile
+    yapılır; `condition` dekoratörü yerine ETag burada tek sürüm okumasıyla
+    karşılaştırılır.
+    """
+    try:
+        baslangic, bitis = _takvim_penceresi(request)
+        imlec = _guncelleme_imleci(request)
+    except ValueError:
+        return _gecersiz_parametre_yaniti()
+
+    if imlec is not None:
+        if _imlec_eski_mi(imlec):
+            return _eski_imlec_yaniti()
+        qs, yeni_imlec = _takvim_randevulari(baslangic, bitis, imlec, **filtre)
+        events = [_silinen_event(i) async for i in _silinen_randevular(baslangic, bitis, imlec, lab_id)]
+        events += [event_uret(r) async for r in sorgu_hazirla(qs)]
+        return _event_json(events, yeni_imlec)
+
+    if not onbellek_paylasimli_mi():
+        qs, yeni_imlec = _takvim_randevulari(baslangic, bitis, None, **filtre)
+        return _event_json([event_uret(r) async for r in sorgu_hazirla(qs)], yeni_imlec)
+
+    surum = await atakvim_surumu(lab_id, baslangic, bitis)
+    kosullu = get_conditional_response(request, etag=takvim_etag(surum))
+    if kosullu is not None:
+        kosullu["ETag"] = takvim_etag(surum)
+        return kosullu
+    anahtar = f"takvim:{surum}"
+    kayit = await cache.aget(anahtar)
+    if kayit is None:
+        qs, yeni_imlec = _takvim_randevulari(baslangic, bitis, None, **filtre)
+        events = [event_uret(r) async for r in sorgu_hazirla(qs)]
+        kayit = (json.dumps(events, cls=DjangoJSONEncoder), yeni_imlec.isoformat())
+        await cache.aset(anahtar, kayit, TAKVIM_ONBELLEK_SANIYE)
+    return _onbellek_yaniti(kayit, surum)
+
+
+_TUM_EVENT_RENKLERI = {
+    Randevu.ONAYLANDI: "#28a745", Randevu.ONAY_BEKLENIYOR: "#ffc107",
+    Randevu.GELDI: "#0d6efd", Randevu.GELMEDI: "#6c757d", Randevu.REDDEDILDI: "#dc3545",
+}
+
+
+def _tum_event_sorgusu(qs):
+    # Cihaz/lab/kullanici JOIN ile tek sorguda (N+1 önlenir); yalnız gerekli kolonlar.
+    return qs.select_related("cihaz__lab", "kullanici").only(
+        "id", "tarih", "baslangic_saati", "bitis_saati", "durum",
+        "cihaz__isim", "cihaz__lab__isim", "kullanici__username",
+    )
+
+
+def _tum_event(r):
+    return {
+        'id': r.id,
+        'title': f"{r.cihaz.isim} • {r.baslangic_saati.strftime('%H:%M')}-{r.bitis_saati.strftime('%H:%M')}",
+        'start': f"{r.tarih.isoformat()}T{r.baslangic_saati.strftime('%H:%M:%S')}",
+        'end': f"{r.tarih.isoformat()}T{r.bitis_saati.strftime('%H:%M:%S')}",
+        'color': _TUM_EVENT_RENKLERI.get(r.durum, "#3788d8"),
+        'extendedProps': {
+            'lab_adi': r.cihaz.lab.isim,
+            'kullanici': r.kullanici.username,
+            'durum': r.get_durum_display(),
+            'aktif': r.durum in Randevu.AKTIF_DURUMLAR,
+        },
+    }
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_takvim_etag)
 def tum_events_api(request):
     """
     Genel Takvim API: Geçmiş sonuçlananlar ve Gelecek planlılar.
     Çift ikon ve taşma sorununu önlemek için sadeleştirilmiştir.
+
+    Yalnızca FullCalendar'ın istediği `start`/`end` penceresindeki randevular
+    döner. `updated_since` verilirse yalnızca o andan sonra değişenler gelir;
+    bir sonraki imleç `X-Updated-Until` başlığındadır. Tam pencere yanıtları
+    ETag taşır; veri değişmediyse `If-None-Match` isteğine 304 döner.
     """
-    color_map = {
-        Randevu.ONAYLANDI: "#28a745", Randevu.ONAY_BEKLENIYOR: "#ffc107",
-        Randevu.GELDI: "#0d6efd", Randevu.GELMEDI: "#6c757d", Randevu.REDDEDILDI: "#dc3545",
-    }
+    return _event_yaniti(request, None, _tum_event_sorgusu, _tum_event)
 
-    # Durum filtresi DB tarafında; cihaz/lab/kullanici JOIN ile tek sorguda (N+1 önlenir).
-    randevular = (
-        Randevu.objects
-        .filter(durum__in=[Randevu.ONAY_BEKLENIYOR, Randevu.ONAYLANDI, Randevu.GELDI])
-        .select_related("cihaz__lab", "kullanici")
-    )
 
-    events = [
-        {
-            'id': r.id,
-            'title': f"{r.cihaz.isim} • {r.baslangic_saati.strftime('%H:%M')}-{r.bitis_saati.strftime('%H:%M')}",
-            'start': f"{r.tarih.isoformat()}T{r.baslangic_saati.strftime('%H:%M:%S')}",
-            'end': f"{r.tarih.isoformat()}T{r.bitis_saati.strftime('%H:%M:%S')}",
-            'color': color_map.get(r.durum, "#3788d8"),
-            'extendedProps': {
-                'lab_adi': r.cihaz.lab.isim,
-                'kullanici': r.kullanici.username,
-                'durum': r.get_durum_display(),
-            },
-        }
-        for r in randevular
-    ]
-    return JsonResponse(events, safe=False)
+@login_required
+@cache_control(private=True, no_cache=True)
+async def atum_events_api(request):
+    """`tum_events_api` async sürümü; ASYNC_API açıksa bu sunulur (bkz. urls.py)."""
+    return await _aevent_yaniti(request, None, _tum_event_sorgusu, _tum_event)
 
 
 @login_required
@@ -98,25 +352,123 @@ def lab_takvim(request, lab_id):
     return render(request, "lab_takvim.html", {"lab": lab, "cihazlar_json": json.dumps(cihazlar, cls=DjangoJSONEncoder)})
 
 
+def _lab_event_sorgusu(qs):
+    # Cihaz/kullanici JOIN ile tek sorguda (N+1 önlenir); yalnız gerekli kolonlar.
+    return qs.select_related("cihaz", "kullanici").only(
+        "id", "tarih", "baslangic_saati", "bitis_saati", "durum",
+        "cihaz__isim", "kullanici__username",
+    )
+
+
+def _lab_event(r):
+    return {
+        'id': r.id,
+        'title': f"{r.cihaz.isim} • {r.baslangic_saati.strftime('%H:%M')}-{r.bitis_saati.strftime('%H:%M')}",
+        'start': f"{r.tarih.isoformat()}T{r.baslangic_saati.strftime('%H:%M:%S')}",
+        'end': f"{r.tarih.isoformat()}T{r.bitis_saati.strftime('%H:%M:%S')}",
+        'color': "#28a745" if r.durum == Randevu.ONAYLANDI else "#ffc107",
+        'extendedProps': {
+            'kullanici': r.kullanici.username,
+            'durum': r.get_durum_display(),
+            'aktif': r.durum in Randevu.AKTIF_DURUMLAR,
+        },
+    }
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_takvim_etag)
 def lab_events_api(request, lab_id):
-    # Durum filtresi DB tarafında; cihaz/kullanici JOIN ile tek sorguda (N+1 önlenir).
-    randevular = (
-        Randevu.objects
-        .filter(
-            cihaz__lab_id=lab_id,
-            durum__in=[Randevu.ONAY_BEKLENIYOR, Randevu.ONAYLANDI, Randevu.GELDI],
-        )
-        .select_related("cihaz", "kullanici")
-    )
-    events = [
-        {
-            'title': f"{r.cihaz.isim} • {r.baslangic_saati.strftime('%H:%M')}-{r.bitis_saati.strftime('%H:%M')}",
-            'start': f"{r.tarih.isoformat()}T{r.baslangic_saati.strftime('%H:%M:%S')}",
-            'end': f"{r.tarih.isoformat()}T{r.bitis_saati.strftime('%H:%M:%S')}",
-            'color': "#28a745" if r.durum == Randevu.ONAYLANDI else "#ffc107",
-            'extendedProps': {'kullanici': r.kullanici.username, 'durum': r.get_durum_display()},
-        }
-        for r in randevular
-    ]
-    return JsonResponse(events, safe=False)
+    return _event_yaniti(request, lab_id, _lab_event_sorgusu, _lab_event, cihaz__lab_id=lab_id)
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+async def alab_events_api(request, lab_id):
+    """`lab_events_api` async sürümü; ASYNC_API açıksa bu sunulur (bkz. urls.py)."""
+    return await _aevent_yaniti(request, lab_id, _lab_event_sorgusu, _lab_event, cihaz__lab_id=lab_id)
+
+
+def _musaitlik_parametreleri(request):
+    """`start`, `end`, `sure`, `adet` parametrelerini doğrular (hatada ValueError).
+
+    `end` hariçtir; verilmezse `start`tan itibaren 7 gün aranır. Tarama en fazla
+    MUSAITLIK_MAX_GUN gün sürer, `adet` MUSAITLIK_MAX_ADET ile sınırlıdır.
+    """
+    bugun = timezone.localdate()
+    start = request.GET.get("start")
+    end = request.GET.get("end")
+    baslangic = parse_date(start[:10]) if start else bugun
+    if baslangic is None:
+        raise ValueError(start)
+    baslangic = max(baslangic, bugun)  # geçmişe randevu alınamaz
+    bitis = parse_date(end[:10]) if end else baslangic + timedelta(days=7)
+    if bitis is None or bitis <= baslangic:
+        raise ValueError(end)
+    bitis = min(bitis, baslangic + timedelta(days=MUSAITLIK_MAX_GUN))
+
+    sure = int(request.GET.get("sure", 60))
+    adet = int(request.GET.get("adet", 10))
+    if not SLOT_DAKIKA <= sure <= MAX_RANDEVU_SAATI * 60 or adet < 1:
+        raise ValueError("sure/adet")
+    return baslangic, bitis, sure, min(adet, MUSAITLIK_MAX_ADET)
+
+
+@login_required
+def lab_musaitlik_api(request, lab_id):
+    """TURKCE ARAMA: müsaitlik arama, boş slot, uygun saat bul.
+
+    Laboratuvarın aktif cihazlarında [start, end) arasında `sure` dakikalık
+    ilk `adet` boş pencereyi kronolojik sırayla döner. Cihaz ve gün sayısından
+    bağımsız olarak sabit sayıda sorgu çalışır: lab + cihaz listesi + tüm
+    pencerenin randevuları (tek sorguda doluluk bitmap'lerine dönüşür).
+    Aynı cihazda dönen pencereler birbiriyle örtüşmez.
+    """
+    lab = get_object_or_404(Laboratuvar, id=lab_id)
+    try:
+        baslangic, bitis, sure, adet = _musaitlik_parametreleri(request)
+    except ValueError:
+        return JsonResponse({"error": "Geçersiz start/end/sure/adet parametresi."}, status=400)
+
+    cihazlar = list(Cihaz.objects.filter(lab=lab, aktif_mi=True).order_by("isim").only("id", "isim"))
+    son_gun = bitis - timedelta(days=1)
+    doluluklar = doluluklari_yukle(cihazlar, baslangic, son_gun)
+
+    # Slota yuvarlanmış süre; 23:50-24:00 bloğu bitiş saati olamayacağından aranmaz.
+    slot_sayisi = -(-sure // SLOT_DAKIKA)
+    son_slot = GUN_SLOT_SAYISI - 1
+    simdi = timezone.localtime()
+
+    pencereler = []
+    gun = baslangic
+    while gun < bitis and len(pencereler) < adet:
+        ilk_slot = 0
+        if gun == simdi.date():
+            ilk_slot = -(-(simdi.hour * 60 + simdi.minute + 1) // SLOT_DAKIKA)
+        gunun_adaylari = []
+        for cihaz in cihazlar:
+            sonraki = ilk_slot
+            for slot in doluluklar[(cihaz.id, gun)].bos_baslangiclar(slot_sayisi, ilk_slot, son_slot):
+                if slot >= sonraki:
+                    gunun_adaylari.append((slot, cihaz))
+                    sonraki = slot + slot_sayisi
+        gunun_adaylari.sort(key=lambda aday: (aday[0], aday[1].isim))
+        for slot, cihaz in gunun_adaylari[:adet - len(pencereler)]:
+            b = GunDolulugu.slot_saati(slot)
+            bit = GunDolulugu.slot_saati(slot + slot_sayisi)
+            pencereler.append({
+                'cihaz_id': cihaz.id,
+                'cihaz': cihaz.isim,
+                'tarih': gun.isoformat(),
+                'baslangic': b.strftime('%H:%M'),
+                'bitis': bit.strftime('%H:%M'),
+                'start': f"{gun.isoformat()}T{b.strftime('%H:%M:%S')}",
+                'end': f"{gun.isoformat()}T{bit.strftime('%H:%M:%S')}",
+            })
+        gun += timedelta(days=1)
+
+    return JsonResponse({
+        'lab_id': lab.id,
+        'sure_dk': slot_sayisi * SLOT_DAKIKA,
+        'pencereler': pencereler,
+    })
@@ -1,9 +1,10 @@
 # Bu dosya views.py dosyasindan ayrildi.
 # TURKCE ARAMA ANAHTARLARI: view, sayfa, islem, BookLab
 
+import asyncio
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from django.conf import settings
 from django.contrib import messages
@@ -12,13 +13,13 @@ from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib.auth.tokens import default_token_generator
+from django.core.handlers.asgi import ASGIRequest
 from django.core.mail import EmailMultiAlternatives
-from django.core.cache import cache
 from django.core.paginator import Paginator
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import transaction
-from django.db.models import Count, Q
-from django.http import JsonResponse
+from django.db.models import Count, FilteredRelation, Q, Sum, Window
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.template.loader import render_to_string
 from django.utils import timezone
@@ -26,7 +27,6 @@ from django.utils.encoding import force_bytes
 from django.utils.html import strip_tags
 from django.utils.http import urlsafe_base64_encode, url_has_allowed_host_and_scheme
 from django.views.decorators.http import require_POST
-from django.db.models import Count as _Count
 
 from .forms import (
     KullaniciGuncellemeFormu,
@@ -35,7 +35,10 @@ from .forms import (
     KayitFormu,
     EmailOrUsernameAuthenticationForm,
 )
-from .models import Laboratuvar, Cihaz, Randevu, Profil, Duyuru, Ariza
+from .badge import abadge_sayaclari, abadge_surumu, badge_sayaclari
+from .doluluk import GUN_SLOT_SAYISI, AralikIndeksi, GunDolulugu
+from .models import Laboratuvar, Cihaz, Randevu, RandevuGunlukOzet, Profil, Duyuru, Ariza, cihaz_kilidi
+from .onbellek import onbellek_paylasimli_mi
 from .utils import render_to_pdf
 from .view_helpers import (
     EMAIL_DOGRULAMA_KOD_SURESI_DAKIKA,
@@ -45,12 +48,19 @@ from .view_helpers import (
     kod_suresi_doldu_mu,
     dogrulama_maili_gonder,
     check_overlap,
-    otomatik_geldi_isaretle,
+    acik_arizalari_coz,
+    randevulari_toplu_guncelle,
 )
 from django.urls import reverse
 
 logger = logging.getLogger(__name__)
 
+# Badge SSE akışı: sürüm yoklama aralığı, boşta ping aralığı ve bağlantı ömrü
+# (saniye). Ömür dolunca tarayıcı `retry` süresi sonra yeniden bağlanır.
+BADGE_AKIS_ARALIK_SANIYE = getattr(settings, "BADGE_AKIS_ARALIK_SANIYE", 2)
+BADGE_AKIS_PING_SANIYE = getattr(settings, "BADGE_AKIS_PING_SANIYE", 15)
+BADGE_AKIS_OMUR_SANIYE = getattr(settings, "BADGE_AKIS_OMUR_SANIYE", 300)
+
 # TURKCE ARAMA: yonetim paneli, admin islemleri, ariza, toplu islem
 @staff_member_required
 def onay_bekleyen_sayisi(request):
@@ -58,119 +68,156 @@ def onay_bekleyen_sayisi(request):
     Sol menüdeki bildirimleri (badge) ait oldukları sekmelere dağıtır.
     Pasif öğrenciler ve Bekleyen randevular artık ayrı sayılır.
     """
-    # Bu uçnokta sol menüdeki badge'ler için sık (polling) çağrılır.
-    # Sayaçlar global olduğundan 30 sn'lik kısa cache RAM/CPU yükünü azaltır.
-    veri = cache.get("badge_sayaclari")
-    if veri is None:
-        veri = {
-            "pasif_ogrenci": User.objects.filter(is_active=False).count(),
-            "bekleyen_randevu": Randevu.objects.filter(durum='onay_bekleniyor').count(),
-            "acik_ariza": Ariza.objects.filter(cozuldu_mu=False).count(),
-        }
-        cache.set("badge_sayaclari", veri, 30)
-    return JsonResponse(veri)
+    # SSE akışı (`badge_akisi`) kullanılamadığında istemci bu uçnoktayı yoklar.
+    # Sayaçlar önbellekte artımlı tutulur (bkz. badge.py); COUNT yalnızca
+    # sayaç önbellekte yokken çalışır.
+    return JsonResponse(badge_sayaclari())
 
 
 @staff_member_required
-def egitmen_paneli(request):
-    # 48 saat geçmiş onaylı randevuları otomatik "geldi" yap (lazy senkron)
-    otomatik_geldi_isaretle()
+async def aonay_bekleyen_sayisi(request):
+    """`onay_bekleyen_sayisi` async sürümü; ASYNC_API açıksa bu sunulur (bkz. urls.py)."""
+    return JsonResponse(await abadge_sayaclari())
+
+
+def _sse_olayi(olay, veri):
+    return f"event: {olay}\ndata: {json.dumps(veri)}\n\n"
+
+
+async def _badge_olaylari():
+    """Badge sürümünü izler; değişen sayaçları SSE olayı olarak üretir."""
+    yield f"retry: {BADGE_AKIS_ARALIK_SANIYE * 1000}\n\n"
+    dongu = asyncio.get_running_loop()
+    bitis = dongu.time() + BADGE_AKIS_OMUR_SANIYE
+    son_ping = dongu.time()
+    surum, gonderilen = None, {}
+    while dongu.time() < bitis:
+        yeni_surum = await abadge_surumu()
+        if yeni_surum != surum:
+            surum = yeni_surum
+            sayaclar = await abadge_sayaclari()
+            degisen = {alan: deger for alan, deger in sayaclar.items() if gonderilen.get(alan) != deger}
+            if degisen:
+                gonderilen.update(degisen)
+                son_ping = dongu.time()
+                yield _sse_olayi("badge", degisen)
+        if dongu.time() - son_ping >= BADGE_AKIS_PING_SANIYE:
+            # Proxy'ler boşta kalan bağlantıyı kapatmasın.
+            son_ping = dongu.time()
+            yield ": ping\n\n"
+        await asyncio.sleep(BADGE_AKIS_ARALIK_SANIYE)
+
+
+@staff_member_required
+async def badge_akisi(request):
+    """TURKCE ARAMA: badge akisi, server-sent events.
+
+    Badge sayaçlarını yoklama yerine SSE ile iter: ilk olay tüm sayaçları,
+    sonrakiler yalnızca değişenleri taşır. Akış yalnızca ASGI altında açılır;
+    WSGI'de her bağlantı bir işçiyi kilitleyeceğinden, önbellek işçiler
+    arasında paylaşılmıyorsa da başka işçinin değişikliği sürümü
+    artırmayacağından 204 döner ve istemci `onay_bekleyen_sayisi`
+    yoklamasına geçer.
+    """
+    if not isinstance(request, ASGIRequest) or not onbellek_paylasimli_mi():
+        return HttpResponse(status=204)
+    yanit = StreamingHttpResponse(_badge_olaylari(), content_type="text/event-stream")
+    yanit["Cache-Control"] = "no-cache"
+    yanit["X-Accel-Buffering"] = "no"
+    return yanit
+
 
+@staff_member_required
+def egitmen_paneli(request):
     # AY BASLı FİLTRELEME - varsayılan olarak şu anki ayı gösterir
     ay_ara = request.GET.get('ay_ara')
     if ay_ara is None:
         ay_ara = timezone.now().strftime('%Y-%m')
     
-    # Ay filtresini önce çöz— lab grafiği de aynı filtreyi kullanabilsin
-    yil = ay = None
+    # Ay filtresini önce çöz— lab grafiği de aynı filtreyi kullanabilsin.
+    # Sayımlar ham Randevu yerine RandevuGunlukOzet üzerinden yapılır; maliyet
+    # geçmişin büyüklüğüyle değil, seçili aydaki özet satırlarıyla orantılıdır.
+    # Panel, lab/kullanıcı/randevu sayısından bağımsız olarak SABİT sayıda
+    # sorguyla çizilir (bkz. EgitmenPaneliTestleri).
+    ay_kosulu = ay_iliski_kosulu = Q()
     if ay_ara:
         try:
-            yil, ay = ay_ara.split('-')
+            yil, ay = (int(parca) for parca in ay_ara.split('-'))
+            ay_basi = date(yil, ay, 1)
         except ValueError:
             pass
-
-    # Lab grafiği: seçili aya göre filtreli randevu sayısı
-    if yil and ay:
-        labs = Laboratuvar.objects.annotate(
-            randevu_sayisi=_Count(
-                'cihaz__randevu',
-                filter=Q(cihaz__randevu__tarih__year=yil, cihaz__randevu__tarih__month=ay)
+        else:
+            sonraki_ay = date(yil + ay // 12, ay % 12 + 1, 1)
+            ay_kosulu = Q(tarih__gte=ay_basi, tarih__lt=sonraki_ay)
+            ay_iliski_kosulu = Q(
+                randevugunlukozet__tarih__gte=ay_basi, randevugunlukozet__tarih__lt=sonraki_ay,
             )
+
+    # 1) Lab grafiği: tüm lablar ve seçili aydaki randevu sayıları tek sorguda.
+    # Ay koşulu JOIN'e (FilteredRelation) konur; LEFT JOIN yalnızca o ayın
+    # özet satırlarını getirir, randevusuz lablar 0 ile gelir.
+    labs = list(
+        Laboratuvar.objects
+        .annotate(
+            ay_ozeti=FilteredRelation("randevugunlukozet", condition=ay_iliski_kosulu),
+            adet=Coalesce(Sum("ay_ozeti__adet"), 0),
         )
-    else:
-        labs = Laboratuvar.objects.annotate(randevu_sayisi=_Count('cihaz__randevu'))
+        .values_list("id", "isim", "adet")
+    )
 
-    # Tüm randevular (ay filtreli sayım için)
-    tum_randevular = Randevu.objects.all()
+    # 2) En aktif kullanıcılar (en çok kullanılan lab bazında — Top 10):
+    # kullanıcı bilgisi aynı sorguda JOIN ile gelir.
+    top_users_of_top_lab = []
+    top_lab_name = None
+    top_lab = max(labs, key=lambda lab: lab[2], default=None)
+    if top_lab and top_lab[2]:
+        top_lab_id, top_lab_name = top_lab[0], top_lab[1]
+        user_entries = (
+            RandevuGunlukOzet.objects
+            .filter(ay_kosulu, lab_id=top_lab_id)
+            .values(
+                'kullanici_id', 'kullanici__username', 'kullanici__first_name',
+                'kullanici__last_name', 'kullanici__email',
+            )
+            .annotate(booking_count=Sum('adet'))
+            .order_by('-booking_count', 'kullanici_id')[:10]
+        )
+        for entry in user_entries:
+            tam_ad = f"{entry['kullanici__first_name']} {entry['kullanici__last_name']}".strip()
+            top_users_of_top_lab.append({
+                'id': entry['kullanici_id'],
+                'name': tam_ad or entry['kullanici__username'],
+                'email': entry['kullanici__email'],
+                'booking_count': entry['booking_count'],
+            })
 
-    # Yaklaşan randevular: bugün ve sonrası, onaylı/işlem bekleyen randevular.
+    # 3) Yaklaşan randevular: bugün ve sonrası, onaylı/işlem bekleyen randevular.
     # Otomatik onay nedeniyle bunlar genelde "onaylandı" durumundadır; yönetici
     # buradan geldi/gelmedi/iptal işlemlerini yapabilir. (Ay filtresinden bağımsız.)
+    # İlk 8 kayıt kullanıcı/cihaz JOIN'iyle gelir; toplam sayı aynı sorguda
+    # pencere fonksiyonuyla (COUNT(*) OVER ()) hesaplanır, ayrı COUNT yapılmaz.
     bugun = timezone.now().date()
-    yaklasan_randevular_qs = Randevu.objects.filter(
-        durum__in=[Randevu.ONAY_BEKLENIYOR, Randevu.ONAYLANDI],
-        tarih__gte=bugun,
-    ).order_by("tarih", "baslangic_saati")
-
-    # Ay filtrelemesini yalnızca özet sayıma uygula
-    if yil and ay:
-        tum_randevular = tum_randevular.filter(tarih__year=yil, tarih__month=ay)
-
-    # --- EN AKTİF KULLANICILAR (En Çok Kullanılan Lab Bazında — Top 10) ---
-    top_users_of_top_lab = []
-    top_lab_name = None
-    try:
-        ay_randevular = Randevu.objects.all()
-        if yil and ay:
-            ay_randevular = ay_randevular.filter(tarih__year=yil, tarih__month=ay)
-
-        # 1. En çok kullanılan labı bul (cihaz üzerinden lab'a ulaş)
-        top_lab_entry = (
-            ay_randevular
-            .values('cihaz__lab_id')
-            .annotate(lab_count=_Count('id'))
-            .order_by('-lab_count')
-            .first()
+    yaklasan_randevular = list(
+        Randevu.objects
+        .filter(durum__in=[Randevu.ONAY_BEKLENIYOR, Randevu.ONAYLANDI], tarih__gte=bugun)
+        .select_related("kullanici", "cihaz")
+        .only(
+            "id", "tarih", "baslangic_saati", "durum", "cihaz__isim",
+            "kullanici__username", "kullanici__first_name", "kullanici__last_name",
         )
+        .annotate(toplam=Window(Count("id")))
+        .order_by("tarih", "baslangic_saati")[:8]
+    )
 
-        if top_lab_entry:
-            top_lab_id = top_lab_entry['cihaz__lab_id']
-            lab_obj = Laboratuvar.objects.get(pk=top_lab_id)
-            top_lab_name = lab_obj.isim
-
-            # 2. O labdaki tüm kullanıcıları randevu sayısına göre sırala (Top 10)
-            user_entries = (
-                ay_randevular
-                .filter(cihaz__lab_id=top_lab_id)
-                .values('kullanici_id')
-                .annotate(booking_count=_Count('id'))
-                .order_by('-booking_count')[:10]
-            )
-
-            # User nesnelerini tek sorguda çek
-            user_ids = [e['kullanici_id'] for e in user_entries]
-            users_map = {u.pk: u for u in User.objects.filter(pk__in=user_ids)}
-
-            for entry in user_entries:
-                u = users_map.get(entry['kullanici_id'])
-                if u:
-                    top_users_of_top_lab.append({
-                        'id': u.pk,
-                        'name': u.get_full_name() or u.username,
-                        'email': u.email,
-                        'booking_count': entry['booking_count'],
-                    })
-    except Exception:
-        pass
-
+    # 4) Kart sayaçları.
     context = {
-        "toplam_randevu": tum_randevular.count(),
-        "yaklasan_sayisi": yaklasan_randevular_qs.count(),
-        "yaklasan_randevular": yaklasan_randevular_qs[:8],
+        "toplam_randevu": sum(lab[2] for lab in labs),
+        "yaklasan_sayisi": yaklasan_randevular[0].toplam if yaklasan_randevular else 0,
+        "yaklasan_randevular": yaklasan_randevular,
         "arizali_cihazlar": Cihaz.objects.filter(aktif_mi=False).count(),
         "toplam_kullanici": User.objects.filter(is_active=True).count(),
-        "lab_isimleri": list(labs.values_list('isim', flat=True)),
-        "randevu_sayilari": [lab.randevu_sayisi for lab in labs],
+        "lab_isimleri": [lab[1] for lab in labs],
+        "randevu_sayilari": [lab[2] for lab in labs],
         "search_ay": ay_ara,
         "top_users_of_top_lab": top_users_of_top_lab,
         "top_lab_name": top_lab_name,
@@ -247,24 +294,33 @@ def toplu_randevu(request):
         simdi = timezone.now()
         olusturulan = atlanan = 0
 
-        with transaction.atomic():
-            for aralik in secilen_araliklar:
-                try:
-                    bas_str, bit_str = aralik.split('-', 1)
-                    b = datetime.strptime(bas_str.strip(), "%H:%M").time()
-                    bit = datetime.strptime(bit_str.strip(), "%H:%M").time()
-                except (ValueError, AttributeError):
-                    continue
-                # Bitiş başlangıçtan sonra olmalı ve 10 dk hizalı olmalı
-                if bit <= b or b.minute % SLOT_DAKIKA or bit.minute % SLOT_DAKIKA:
-                    atlanan += 1
-                    continue
-                baslangic_dt = timezone.make_aware(datetime.combine(secili_tarih, b))
-                # Geçmiş veya çakışan aralıkları atla
-                if baslangic_dt < simdi or check_overlap(secili_cihaz, secili_tarih, b, bit):
+        adaylar = []
+        for aralik in secilen_araliklar:
+            try:
+                bas_str, bit_str = aralik.split('-', 1)
+                b = datetime.strptime(bas_str.strip(), "%H:%M").time()
+                bit = datetime.strptime(bit_str.strip(), "%H:%M").time()
+            except (ValueError, AttributeError):
+                continue
+            # Bitiş başlangıçtan sonra olmalı ve 10 dk hizalı olmalı; geçmiş atlanır
+            if (bit <= b or b.minute % SLOT_DAKIKA or bit.minute % SLOT_DAKIKA
+                    or timezone.make_aware(datetime.combine(secili_tarih, b)) < simdi):
+                atlanan += 1
+                continue
+            adaylar.append((b, bit))
+
+        with cihaz_kilidi(secili_cihaz.pk):
+            # Cihaz kilidi: eşzamanlı randevu_al / toplu_randevu istekleri
+            # indeks kurulduktan sonra araya giremez. Günün aralık indeksi TEK
+            # sorguda yüklenir ve tüm seçim dakika hassasiyetinde doğrulanır;
+            # uygun bulunanlar indekse eklendiğinden seçim içindeki çakışmalar
+            # da yakalanır. Kontrol kesin olduğundan kayıtta tekrarlanmaz.
+            indeks = AralikIndeksi.yukle(secili_cihaz, secili_tarih)
+            for (b, bit), uygun in zip(adaylar, indeks.toplu_dogrula(adaylar)):
+                if not uygun:
                     atlanan += 1
                     continue
-                Randevu.objects.create(
+                Randevu(
                     kullanici=kullanici,
                     cihaz=secili_cihaz,
                     tarih=secili_tarih,
@@ -272,7 +328,7 @@ def toplu_randevu(request):
                     bitis_saati=bit,
                     durum=Randevu.ONAYLANDI,
                     onaylayan_admin=request.user,
-                )
+                ).save(cakisma_kontrolu=False)
                 olusturulan += 1
 
         if olusturulan:
@@ -289,28 +345,19 @@ def toplu_randevu(request):
     # --- GET: slot ızgarasını hazırla (cihaz + tarih seçiliyse) ---
     saat_gruplari = []
     if secili_cihaz:
-        # O gün için dolu aralıkları tek sorguda çek
-        dolu_araliklar = list(
-            Randevu.objects.filter(
-                cihaz=secili_cihaz,
-                tarih=secili_tarih,
-                durum__in=[Randevu.ONAY_BEKLENIYOR, Randevu.ONAYLANDI, Randevu.GELDI],
-            ).values_list('baslangic_saati', 'bitis_saati')
-        )
+        # O günün doluluk bitmap'i tek sorguda kurulur; her slot tek bit okumasıdır.
+        doluluk = GunDolulugu.yukle(secili_cihaz, secili_tarih)
         simdi = timezone.now()
         gun_basi = datetime.combine(secili_tarih, datetime.min.time())
-        gun_sonu = gun_basi + timedelta(days=1)
 
-        cur = gun_basi
         saat_map = {}  # "HH" -> [slot, ...]
-        # Son blok 23:50 (bitişi 24:00 olur); "< gun_sonu" ile bunu da dahil ederiz
-        # ancak 24:00 bitişi geçersiz olduğundan ızgaranın son bloğunu pasif bırakırız.
-        while cur < gun_sonu:
+        # Son blok 23:50'nin bitişi 24:00 olur; bu geçersiz bir bitiş olduğundan
+        # ızgaranın son bloğu pasif bırakılır.
+        for slot in range(GUN_SLOT_SAYISI):
+            cur = gun_basi + timedelta(minutes=slot * SLOT_DAKIKA)
             b = cur.time()
-            bitis_dt = cur + timedelta(minutes=SLOT_DAKIKA)
-            bit = bitis_dt.time()
-            son_blok = bitis_dt >= gun_sonu  # 23:50 → bitişi gün sınırını aşar
-            dolu = any(db < bit and de > b for (db, de) in dolu_araliklar) if not son_blok else False
+            son_blok = slot == GUN_SLOT_SAYISI - 1
+            dolu = doluluk.dolu_mu(slot) if not son_blok else False
             gecmis = timezone.make_aware(cur) < simdi
             grup = b.strftime('%H')
             saat_map.setdefault(grup, []).append({
@@ -318,7 +365,6 @@ def toplu_randevu(request):
                 'mins': b.hour * 60 + b.minute,  # gün başından dakika ofseti
                 'pasif': dolu or gecmis or son_blok,
             })
-            cur = bitis_dt
         saat_gruplari = [{'saat': k, 'slotlar': v} for k, v in saat_map.items()]
 
     context = {
@@ -398,7 +444,8 @@ def arizali_cihaz_listesi(request):
     """
     # aktif_mi False (0) olanlar, True (1) olanlardan önce gelir (order_by yükselen sıra)
     # select_related('lab') ile template'teki cihaz.lab.isim erişimi N+1 olmaktan çıkar.
-    cihazlar = Cihaz.objects.select_related('lab').order_by('aktif_mi', 'isim')
+    # with_son_ariza() son açık arıza notunu (son_ariza_notu) aynı sorguda getirir.
+    cihazlar = Cihaz.objects.select_related('lab').with_son_ariza().order_by('aktif_mi', 'isim')
 
     return render(request, "yonetim_arizali_cihazlar.html", {
         "cihazlar": cihazlar
@@ -421,7 +468,7 @@ def cihaz_durum_degistir(request, cihaz_id):
         messages.warning(request, f"⚠️ {cihaz.isim} pasife alındı ve arıza kaydı oluşturuldu.")
     else:
         cihaz.aktif_mi = True
-        cihaz.ariza_set.filter(cozuldu_mu=False).update(cozuldu_mu=True)
+        acik_arizalari_coz(cihaz.ariza_set.all())
         messages.success(request, f"✅ {cihaz.isim} aktif edildi, açık arızalar çözüldü olarak işaretlendi.")
 
     cihaz.save()
@@ -429,9 +476,6 @@ def cihaz_durum_degistir(request, cihaz_id):
 
 @staff_member_required
 def tum_randevular(request):
-    # 48 saat geçmiş onaylı randevuları otomatik "geldi" yap (lazy senkron)
-    otomatik_geldi_isaretle()
-
     # select_related ile template'teki kullanici / cihaz / cihaz.lab erişimi
     # N+1 olmaktan çıkar (tek JOIN'li sorgu).
     randevular = (
@@ -504,9 +548,10 @@ def toplu_islem(request):
         messages.error(request, "\u274c Geçersiz işlem veya seçim yapılmadı.")
         return redirect('tum_randevular')
 
-    guncellenen = Randevu.objects.filter(id__in=secilen_ids).update(
+    guncellenen = randevulari_toplu_guncelle(
+        Randevu.objects.filter(id__in=secilen_ids),
         durum=gecerli_islemler[islem],
-        onaylayan_admin=request.user
+        onaylayan_admin=request.user,
     )
     islem_adi = {'onaylandi': 'Onaylandı', 'reddedildi': 'Reddedildi',
                  'geldi': 'Geldi olarak işaretlendi', 'gelmedi': 'Gelmedi olarak işaretlendi'}
@@ -531,11 +576,11 @@ def toplu_onay_ajax(request):
     if islem not in gecerli or not ids:
         return JsonResponse({'error': 'Geçersiz islem veya boş seçim.'}, status=400)
 
-    with transaction.atomic():
-        guncellenen = Randevu.objects.filter(id__in=ids).update(
-            durum=islem,
-            onaylayan_admin=request.user
-        )
+    guncellenen = randevulari_toplu_guncelle(
+        Randevu.objects.filter(id__in=ids),
+        durum=islem,
+        onaylayan_admin=request.user,
+    )
 
     yeni_bekleyen = Randevu.objects.filter(durum=Randevu.ONAY_BEKLENIYOR).count()
     return JsonResponse({'updated': guncellenen, 'yeni_bekleyen': yeni_bekleyen})
@@ -16,7 +16,8 @@ from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import EmailMultiAlternatives
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction
-from django.db.models import Count, Q
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
 from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.template.loader import render_to_string
@@ -33,7 +34,8 @@ from .forms import (
     KayitFormu,
     EmailOrUsernameAuthenticationForm,
 )
-from .models import Laboratuvar, Cihaz, Randevu, Profil, Duyuru, Ariza
+from .models import Laboratuvar, Cihaz, Randevu, RandevuGunlukOzet, Profil, Duyuru, Ariza
+from .onbellek import istatistik_onbellegi, surumlu_onbellek
 from .utils import render_to_pdf
 from .view_helpers import (
     EMAIL_DOGRULAMA_KOD_SURESI_DAKIKA,
@@ -70,76 +72,97 @@ def anasayfa(request):
 
 @login_required
 def lab_detay(request, lab_id):
-    secilen_lab = get_object_or_404(Laboratuvar, id=lab_id)
-    cihaz_listesi = Cihaz.objects.filter(lab=secilen_lab)
+    def hesapla():
+        lab = get_object_or_404(Laboratuvar, id=lab_id)
+        return lab, list(Cihaz.objects.filter(lab=lab).with_son_ariza())
+
+    # Lab ya da cihazları değişene kadar (lab:<id> sürümü) önbellekten sunulur.
+    secilen_lab, cihaz_listesi = surumlu_onbellek(f"lab_detay:{lab_id}", (f"lab:{lab_id}",), hesapla)
     return render(request, "lab_detay.html", {"lab": secilen_lab, "cihazlar": cihaz_listesi})
 
 
 # ========================================================
 # İSTATİSTİKLER - MODÜLER VE KOLAYCA KALDIRILAB İLİR
 # ========================================================
-def _istatistikler_verisi_al():
+def _istatistikler_hesapla():
+    """Sayaçları koşullu aggregate'lerle model başına TEK sorguda hesaplar."""
+    bugun = timezone.localdate()
+
+    lab = Cihaz.objects.aggregate(
+        toplam_cihaz=Count('id'),
+        aktif_cihaz=Count('id', filter=Q(aktif_mi=True)),
+        ariza_cihaz=Count('id', filter=Q(aktif_mi=False)),
+    )
+    lab['toplam'] = Laboratuvar.objects.count()
+
+    kullanici = Profil.objects.aggregate(
+        aktif=Count('id', filter=Q(status='aktif_kullanici')),
+        onay_bekleyen=Count('id', filter=Q(status='pasif_kullanici')),
+    )
+    kullanici['toplam'] = User.objects.count()
+
+    # Randevu sayaçları günlük özet tablosundan (ham tablo taranmaz).
+    ay_basi = bugun.replace(day=1)
+
+    def _adet(**filtre):
+        return Coalesce(Sum('adet', filter=Q(**filtre) if filtre else None), 0)
+
+    randevu = RandevuGunlukOzet.objects.aggregate(
+        toplam=_adet(),
+        bu_ay=_adet(tarih__gte=ay_basi, tarih__lt=(ay_basi + timedelta(days=32)).replace(day=1)),
+        onaylanan=_adet(durum=Randevu.ONAYLANDI),
+        onay_bekleme=_adet(durum=Randevu.ONAY_BEKLENIYOR),
+        tamamlanan=_adet(durum=Randevu.GELDI),
+        iptal=_adet(durum=Randevu.IPTAL),
+    )
+
+    ariza = Ariza.objects.aggregate(
+        toplam=Count('id'),
+        acik=Count('id', filter=Q(cozuldu_mu=False)),
+        cozulen=Count('id', filter=Q(cozuldu_mu=True)),
+    )
+
+    return {'lab': lab, 'kullanici': kullanici, 'randevu': randevu, 'ariza': ariza}
+
+
+def _istatistikler_admin_hesapla():
+    """Yönetici tabloları için GROUP BY dağılımları (günlük özet tablosundan)."""
+    return {
+        'lab_randevular': list(
+            RandevuGunlukOzet.objects.values('lab__isim')
+            .annotate(count=Sum('adet'))
+            .order_by('-count')
+        ),
+        'cihaz_randevular': list(
+            RandevuGunlukOzet.objects.values('cihaz__isim')
+            .annotate(count=Sum('adet'))
+            .order_by('-count')[:10]
+        ),
+        'kullanicilar': list(Profil.objects.values('status').annotate(count=Count('id'))),
+        'en_aktif_kullanicilar': list(
+            RandevuGunlukOzet.objects.values(
+                username=F('kullanici__username'),
+                first_name=F('kullanici__first_name'),
+                last_name=F('kullanici__last_name'),
+            )
+            .annotate(randevu_count=Sum('adet'))
+            .order_by('-randevu_count')[:10]
+        ),
+    }
+
+
+def _istatistikler_verisi_al(admin=False):
     """
     İstatistikler verisini merkezi olarak hazırlar.
     Kolayca kaldırılabilir: bu fonksiyon + URL + template
+
+    Veri önbellekten sunulur; Randevu/Cihaz/Arıza/Profil/Lab/User yazıldığında
+    sinyaller "istatistik" sürümünü artırır (bkz. onbellek.py, signals.py).
     """
-    bugun = timezone.now().date()
-    ay_baslangici = timezone.now().replace(day=1).date()
-    
-    # Genel İstatistikler
-    toplam_lab = Laboratuvar.objects.count()
-    toplam_cihaz = Cihaz.objects.count()
-    aktif_cihaz = Cihaz.objects.filter(aktif_mi=True).count()
-    ariza_cihaz = Cihaz.objects.filter(aktif_mi=False).count()
-    
-    # Kullanıcı İstatistikleri
-    toplam_kullanici = User.objects.count()
-    aktif_kullanici = Profil.objects.filter(status='aktif_kullanici').count()
-    onay_bekleyen = Profil.objects.filter(status='pasif_kullanici').count()
-    
-    # Randevu İstatistikleri
-    toplam_randevu = Randevu.objects.count()
-    now = timezone.now()
-    ay_randevusu = Randevu.objects.filter(
-        tarih__year=now.year,
-        tarih__month=now.month,
-    ).count()
-    onaylanan_randevu = Randevu.objects.filter(durum=Randevu.ONAYLANDI).count()
-    onay_bekleme_randevu = Randevu.objects.filter(durum=Randevu.ONAY_BEKLENIYOR).count()
-    tamamlanan_randevu = Randevu.objects.filter(durum=Randevu.GELDI).count()
-    iptal_randevu = Randevu.objects.filter(durum=Randevu.IPTAL).count()
-    
-    # Arıza İstatistikleri
-    toplam_ariza = Ariza.objects.count()
-    acik_ariza = Ariza.objects.filter(cozuldu_mu=False).count()
-    cozulen_ariza = Ariza.objects.filter(cozuldu_mu=True).count()
-    
-    return {
-        'lab': {
-            'toplam': toplam_lab,
-            'toplam_cihaz': toplam_cihaz,
-            'aktif_cihaz': aktif_cihaz,
-            'ariza_cihaz': ariza_cihaz,
-        },
-        'kullanici': {
-            'toplam': toplam_kullanici,
-            'aktif': aktif_kullanici,
-            'onay_bekleyen': onay_bekleyen,
-        },
-        'randevu': {
-            'toplam': toplam_randevu,
-            'bu_ay': ay_randevusu,
-            'onaylanan': onaylanan_randevu,
-            'onay_bekleme': onay_bekleme_randevu,
-            'tamamlanan': tamamlanan_randevu,
-            'iptal': iptal_randevu,
-        },
-        'ariza': {
-            'toplam': toplam_ariza,
-            'acik': acik_ariza,
-            'cozulen': cozulen_ariza,
-        }
-    }
+    veriler = dict(istatistik_onbellegi("genel", _istatistikler_hesapla))
+    if admin:
+        veriler['admin'] = istatistik_onbellegi("admin", _istatistikler_admin_hesapla)
+    return veriler
 
 @login_required
 def istatistikler(request):
@@ -147,7 +170,7 @@ def istatistikler(request):
     Herkese açık istatistikler sayfası.
     Admin ise detaylı tabloları + grafikleri görür, diğerleri genel istatistikleri görür.
     """
-    veriler = _istatistikler_verisi_al()
+    veriler = _istatistikler_verisi_al(admin=request.user.is_staff)
     r = veriler['randevu']
 
     # Randevu durum chart'ı için JSON (herkese açık)
@@ -165,33 +188,12 @@ def istatistikler(request):
 
     # Admin için detaylı veriler ve ek grafikler
     if request.user.is_staff:
-        lab_randevular = list(
-            Randevu.objects.values('cihaz__lab__isim')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
-        cihaz_randevular = list(
-            Randevu.objects.values('cihaz__isim')
-            .annotate(count=Count('id'))
-            .order_by('-count')[:10]
-        )
-        kullanicilar = list(Profil.objects.values('status').annotate(count=Count('id')))
-        en_aktif_kullanicilar = (
-            User.objects.annotate(randevu_count=Count('randevu'))
-            .select_related('profil')
-            .order_by('-randevu_count')[:10]
-        )
-
-        veriler['admin'] = {
-            'lab_randevular': lab_randevular,
-            'cihaz_randevular': cihaz_randevular,
-            'kullanicilar': kullanicilar,
-            'en_aktif_kullanicilar': en_aktif_kullanicilar,
-        }
+        lab_randevular = veriler['admin']['lab_randevular']
+        cihaz_randevular = veriler['admin']['cihaz_randevular']
 
         # Lab dağılımı chart JSON
         context['lab_chart_json'] = json_lib.dumps({
-            'labels': [item['cihaz__lab__isim'] or 'Bilinmeyen' for item in lab_randevular],
+            'labels': [item['lab__isim'] or 'Bilinmeyen' for item in lab_randevular],
             'data': [item['count'] for item in lab_randevular],
         })
 
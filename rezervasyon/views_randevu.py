@@ -3,6 +3,7 @@
 
 import json
 import logging
+import os
 from datetime import datetime, timedelta
 
 from django.conf import settings
@@ -14,11 +15,12 @@ from django.contrib.auth.models import User
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import EmailMultiAlternatives
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import transaction
+from django.db import OperationalError, transaction
 from django.db.models import Count, Q
-from django.http import JsonResponse
+from django.http import FileResponse, Http404, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.template.loader import render_to_string
+from django.urls import reverse
 from django.utils import timezone
 from django.utils.encoding import force_bytes
 from django.utils.html import strip_tags
@@ -33,7 +35,8 @@ from .forms import (
     EmailOrUsernameAuthenticationForm,
 )
 from .models import Laboratuvar, Cihaz, Randevu, Profil, Duyuru, Ariza
-from .utils import render_to_pdf
+from .onbellek import surumlu_onbellek
+from . import pdf_rapor
 from .view_helpers import (
     EMAIL_DOGRULAMA_KOD_SURESI_DAKIKA,
     IPTAL_MIN_SURE_SAAT,
@@ -42,8 +45,8 @@ from .view_helpers import (
     kod_suresi_doldu_mu,
     dogrulama_maili_gonder,
     check_overlap,
+    randevu_olustur,
     saat_yuvarla,
-    otomatik_geldi_isaretle,
 )
 
 logger = logging.getLogger(__name__)
@@ -51,7 +54,7 @@ logger = logging.getLogger(__name__)
 # TURKCE ARAMA: randevu alma, randevularim, iptal, pdf rapor
 @login_required
 def randevu_al(request, cihaz_id):
-    secilen_cihaz = get_object_or_404(Cihaz, id=cihaz_id)
+    secilen_cihaz = get_object_or_404(Cihaz.objects.select_related("lab"), id=cihaz_id)
     simdi = timezone.now()
 
     secilen_tarih_str = request.GET.get("tarih")
@@ -130,30 +133,43 @@ def randevu_al(request, cihaz_id):
         # Çakışma Kontrolü ve Kayıt
         # NOT: Çakışma kontrolü yalnızca CİHAZ bazlıdır. Aynı kullanıcı aynı anda
         # farklı cihazlara randevu alabilir; yalnız aynı cihaz tek randevu kuralıdır.
-        with transaction.atomic():
-            cihaz_cakisiyor = check_overlap(secilen_cihaz, t_obj, b_obj, bit_obj)
-
-            if cihaz_cakisiyor:
-                messages.error(request, "⚠️ Bu saat aralığı DOLU veya yuvarlanan saatler çakışmaya neden oldu!")
-            else:
-                # İŞ KURALI: Randevu otomatik olarak ONAYLANDI durumunda oluşur
-                # (modeldeki default ONAYLANDI). Yönetici sonradan iptal edebilir.
-                Randevu.objects.create(
-                    kullanici=request.user,
-                    cihaz=secilen_cihaz,
-                    tarih=t_obj,
-                    baslangic_saati=b_obj,
-                    bitis_saati=bit_obj,
-                )
-                messages.success(request, f"✅ Randevunuz {b_obj.strftime('%H:%M')} - {bit_obj.strftime('%H:%M')} arasına oluşturuldu ve onaylandı.")
-                return redirect("randevularim")
-
-    # Mevcut randevuları listele (Sadece Onay Bekleyen ve Onaylanmış olanlar)
-    mevcut_randevular = Randevu.objects.filter(
-        cihaz=secilen_cihaz, 
-        tarih=secilen_tarih,
-        durum__in=['onay_bekleniyor', 'onaylandi'] 
-    ).order_by("baslangic_saati")
+        # Kontrol + kayıt cihaz kilidi altında yapılır (randevu_olustur);
+        # aynı slota eşzamanlı gelen isteklerden yalnızca biri kazanır.
+        try:
+            # İŞ KURALI: Randevu otomatik olarak ONAYLANDI durumunda oluşur
+            # (modeldeki default ONAYLANDI). Yönetici sonradan iptal edebilir.
+            randevu = randevu_olustur(request.user, secilen_cihaz, t_obj, b_obj, bit_obj)
+        except OperationalError:
+            # SQLite kilit bekleme süresi aşıldı (aşırı yoğunluk).
+            logger.warning("Randevu kilidi alınamadı: cihaz=%s", secilen_cihaz.pk)
+            messages.error(request, "⚠️ Sistem şu an yoğun, lütfen tekrar deneyin.")
+            return redirect("randevu_al", cihaz_id=cihaz_id)
+
+        if randevu is None:
+            messages.error(request, "⚠️ Bu saat aralığı DOLU veya yuvarlanan saatler çakışmaya neden oldu!")
+        else:
+            messages.success(request, f"✅ Randevunuz {b_obj.strftime('%H:%M')} - {bit_obj.strftime('%H:%M')} arasına oluşturuldu ve onaylandı.")
+            return redirect("randevularim")
+
+    # Mevcut randevuları listele (Sadece Onay Bekleyen ve Onaylanmış olanlar).
+    # Gün programı cihazın (cihaz:<id>) ve kullanıcı adlarının (genel) sürümü
+    # değişene kadar önbellekten sunulur.
+    def gun_programi():
+        satirlar = Randevu.objects.filter(
+            cihaz=secilen_cihaz,
+            tarih=secilen_tarih,
+            durum__in=['onay_bekleniyor', 'onaylandi']
+        ).order_by("baslangic_saati").values_list("baslangic_saati", "bitis_saati", "kullanici__username")
+        return [
+            {"baslangic_saati": b, "bitis_saati": e, "kullanici": {"username": u}}
+            for b, e, u in satirlar
+        ]
+
+    mevcut_randevular = surumlu_onbellek(
+        f"gun_programi:{secilen_cihaz.pk}:{secilen_tarih:%Y%m%d}",
+        (f"cihaz:{secilen_cihaz.pk}", "genel"),
+        gun_programi,
+    )
 
     return render(request, "randevu_form.html", {
         "cihaz": secilen_cihaz, 
@@ -164,9 +180,6 @@ def randevu_al(request, cihaz_id):
 
 @login_required
 def randevularim(request):
-    # 48 saat geçmiş onaylı randevuları otomatik "geldi" yap (lazy senkron)
-    otomatik_geldi_isaretle()
-
     simdi = datetime.now()
 
     # AY BASLı FİLTRELEME - varsayılan olarak şu anki ayı gösterir
@@ -175,22 +188,31 @@ def randevularim(request):
         ay_ara = timezone.now().strftime('%Y-%m')
 
     # Ay filtresini DB tarafında uygula (Python list comprehension yerine).
-    # select_related ile cihaz/lab tek sorguda gelir; template'teki N+1 önlenir.
     qs = (
         Randevu.objects
         .filter(kullanici=request.user)
         .select_related("cihaz__lab")
         .order_by("tarih", "baslangic_saati")
     )
+    donem = "hepsi"
     if ay_ara:
         try:
             yil, ay = ay_ara.split('-')
             qs = qs.filter(tarih__year=int(yil), tarih__month=int(ay))
+            donem = f"{int(yil):04d}-{int(ay):02d}"
         except (ValueError, AttributeError):
             pass
 
     # Tek sorguda materyalize et; aktif/geçmiş ayrımı bu liste üzerinde yapılır.
-    tum = list(qs)
+    # Liste cihaz/lab adlarıyla birlikte kullanıcının sürümü (kullanici:<id>)
+    # ve `katalog` (cihaz/lab kayıtları) değişene kadar önbellekten sunulur;
+    # başka kullanıcıların randevuları listeyi geçersiz kılmaz. Zamana bağlı
+    # ayrım her istekte yeniden yapılır.
+    tum = surumlu_onbellek(
+        f"randevularim:{request.user.pk}:{donem}",
+        (f"kullanici:{request.user.pk}", "katalog"),
+        lambda: list(qs),
+    )
 
     # AKTİF RANDEVULAR:
     # 1. Zamanı henüz geçmemiş olmalı
@@ -218,24 +240,46 @@ def randevularim(request):
 
 @login_required
 def randevu_pdf_indir(request):
-    randevular = (
-        Randevu.objects
-        .filter(kullanici=request.user)
-        .order_by("tarih", "baslangic_saati")
+    """PDF raporu: hazirsa dosyayi sunar, degilse arka planda uretip bekleme sayfasi doner.
+
+    Uretim `pdf_rapor` surec havuzunda yapilir; WSGI isci sureci xhtml2pdf
+    cizimi boyunca bloklanmaz.
+    """
+    anahtar, durum = pdf_rapor.rapor_iste(request.user)
+    if durum == pdf_rapor.HAZIR:
+        return _rapor_dosyasi_yaniti(request, anahtar)
+    return render(request, "rapor_bekleniyor.html", {"anahtar": anahtar, "durum": durum})
+
+
+def _rapor_dosyasi_yaniti(request, anahtar):
+    yol = pdf_rapor.rapor_yolu(request.user.id, anahtar)
+    if not pdf_rapor.ANAHTAR_DESENI.match(anahtar) or not os.path.exists(yol):
+        raise Http404("Rapor bulunamadı.")
+    return FileResponse(
+        open(yol, "rb"),
+        as_attachment=True,
+        filename=f"randevular_{request.user.username}.pdf",
+        content_type="application/pdf",
     )
 
-    context = {
-        "user": request.user,
-        "randevular": randevular,
-    }
 
-    filename = f"randevular_{request.user.username}.pdf"
+@login_required
+def randevu_pdf_durum(request, anahtar):
+    """Bekleme sayfasinin yokladigi JSON: {"durum": ..., "url": ...}."""
+    if not pdf_rapor.ANAHTAR_DESENI.match(anahtar):
+        raise Http404("Rapor bulunamadı.")
+    durum = pdf_rapor.rapor_durumu(request.user.id, anahtar)
+    veri = {"durum": durum}
+    if durum == pdf_rapor.HAZIR:
+        veri["url"] = reverse("randevu_pdf_dosya", args=[anahtar])
+    return JsonResponse(veri)
 
-    return render_to_pdf(
-        "randevu_pdf.html", 
-        context, 
-        filename
-    )
+
+@login_required
+def randevu_pdf_dosya(request, anahtar):
+    # Yol her zaman oturumdaki kullanicinin dizininden kurulur; baska
+    # kullanicinin raporu anahtar bilinse bile indirilemez.
+    return _rapor_dosyasi_yaniti(request, anahtar)
 
 @login_required
 @require_POST
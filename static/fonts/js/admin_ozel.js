@@ -1,60 +1,88 @@
 /* admin_ozel.js
    - Amaç: Menüdeki her sekmenin (Öğrenci, Randevu, Arıza) yanına kendi bağımsız sayısını ekler.
-   - API: views.py içindeki ayrıştırılmış verileri kullanır.
+   - API: Sayaçlar /api/badge-akisi/ (SSE) ile itilir; akış açılamazsa
+     (WSGI sunucu, eski tarayıcı) /api/onay-bekleyen-sayisi/ yoklanır.
 */
 document.addEventListener("DOMContentLoaded", function () {
+    const AKIS_URL = '/api/badge-akisi/';
+    const YOKLAMA_URL = '/api/onay-bekleyen-sayisi/';
+    const YOKLAMA_ARALIGI_MS = 30000;
+
     const checkMenu = setInterval(() => {
         // İlgili menü linklerini bul
-        const ogrenciLink = document.querySelector('a[href*="onaybekleyenler"]');
-        const randevuLink = document.querySelector('a[href*="randevu"]');
-        const arizaLink = document.querySelector('a[href*="ariza"]');
+        const linkler = {
+            pasif_ogrenci: document.querySelector('a[href*="onaybekleyenler"]'),  // Kırmızı
+            bekleyen_randevu: document.querySelector('a[href*="randevu"]'),       // Sarı
+            acik_ariza: document.querySelector('a[href*="ariza"]'),               // Kırmızı/Bordo
+        };
+        const renkler = {
+            pasif_ogrenci: ["#ff0000", "#fff"],
+            bekleyen_randevu: ["#ffc107", "#000"],
+            acik_ariza: ["#dc3545", "#fff"],
+        };
 
         // Linkler yüklendiyse işlemi başlat
-        if (ogrenciLink || randevuLink || arizaLink) {
+        if (linkler.pasif_ogrenci || linkler.bekleyen_randevu || linkler.acik_ariza) {
             clearInterval(checkMenu);
 
-            fetch('/api/onay-bekleyen-sayisi/')
-                .then(res => res.json())
-                .then(data => {
-                    // 1. Onay Bekleyen Pasif Öğrenciler (image_1c8dc0.png'deki kırmızı balon)
-                    if (ogrenciLink && data.pasif_ogrenci > 0) {
-                        addBadge(ogrenciLink, data.pasif_ogrenci, "#ff0000"); // Kırmızı
+            // Yalnızca gelen alanlar güncellenir (SSE olayları sadece değişenleri taşır).
+            const uygula = (data) => {
+                Object.keys(data).forEach((alan) => {
+                    if (linkler[alan]) {
+                        setBadge(linkler[alan], data[alan], ...renkler[alan]);
                     }
+                });
+            };
 
-                    // 2. Bekleyen Randevular (image_792300.png'deki bağımsız sayaç)
-                    if (randevuLink && data.bekleyen_randevu > 0) {
-                        addBadge(randevuLink, data.bekleyen_randevu, "#ffc107", "#000"); // Sarı
-                    }
+            let yoklamaBasladi = false;
+            const yoklamayaGec = () => {
+                if (yoklamaBasladi) return;
+                yoklamaBasladi = true;
+                const yokla = () => fetch(YOKLAMA_URL)
+                    .then(res => res.json())
+                    .then(uygula)
+                    .catch(err => console.warn('Bildirim verileri alınamadı:', err));
+                yokla();
+                setInterval(yokla, YOKLAMA_ARALIGI_MS);
+            };
 
-                    // 3. Açık Arıza Bildirimleri
-                    if (arizaLink && data.acik_ariza > 0) {
-                        addBadge(arizaLink, data.acik_ariza, "#dc3545"); // Kırmızı/Bordo
-                    }
-                })
-                .catch(err => console.warn('Bildirim verileri alınamadı:', err));
+            if (!window.EventSource) {
+                yoklamayaGec();
+                return;
+            }
+            const akis = new EventSource(AKIS_URL);
+            akis.addEventListener('badge', (e) => uygula(JSON.parse(e.data)));
+            akis.onerror = () => {
+                // 204 (WSGI) ya da kalıcı hata: tarayıcı bağlantıyı kapatır.
+                // Geçici kopmalarda readyState CONNECTING kalır, tarayıcı yeniden bağlanır.
+                if (akis.readyState === EventSource.CLOSED) {
+                    yoklamayaGec();
+                }
+            };
         }
     }, 500);
 
-    // Badge ekleme yardımcı fonksiyonu
-    function addBadge(linkElement, count, bgColor, textColor = "#fff") {
+    // Badge ekleme/kaldırma yardımcı fonksiyonu (0 => badge kaldırılır)
+    function setBadge(linkElement, count, bgColor, textColor = "#fff") {
         const pTag = linkElement.querySelector('p');
         const targetEl = pTag || linkElement;
-        
+
         // Varsa eski badge'i temizle (çift ikon hatasını önlemek için)
         const oldBadge = targetEl.querySelector('.custom-menu-badge');
         if (oldBadge) oldBadge.remove();
+        if (!(count > 0)) return;
 
         const badgeHTML = `
-            <span class="badge custom-menu-badge" 
-                  style="background-color: ${bgColor} !important; 
-                         color: ${textColor} !important; 
+            <span class="badge custom-menu-badge"
+                  style="background-color: ${bgColor} !important;
+                         color: ${textColor} !important;
                          font-weight: bold;
                          margin-left: 10px;
                          padding: 2px 8px;
                          border-radius: 10px;
                          display: inline-block;">
-                  ${count}
+                  ${Number(count)}
             </span>`;
         targetEl.insertAdjacentHTML('beforeend', badgeHTML);
     }
-});
\ No newline at end of file
+});